@@ -0,0 +1,30 @@
+import importlib
+
+# Submodules are imported on first attribute access, so ``import arabspeak`` (or a single
+# component) does not pay for onnxruntime, asyncio or multiprocessing until they are used.
+_EXPORTS = {
+    "PcmSink": ".audio",
+    "WavSink": ".audio",
+    "OpusSink": ".audio",
+    "encode_stream": ".audio",
+    "LengthBucketer": ".batching",
+    "BulkSynthesizer": ".bulk",
+    "LRUCache": ".cache",
+    "ModelSignature": ".signature",
+    "Synthesizer": ".synthesizer",
+    "SynthesizerPool": ".pool",
+}
+
+__all__ = ["PcmSink", "WavSink", "OpusSink", "encode_stream", "LengthBucketer", "BulkSynthesizer", "LRUCache", "ModelSignature", "Synthesizer", "SynthesizerPool"]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,223 @@
+import json
+from pathlib import Path
+from typing import List
+import typer
+from .components.text import TokenCache, Tokenizer
+from .batching import LengthBucketer
+from .cache import file_fingerprint
+from .synthesizer import COMPILED_TOKENIZER_FILE, TOKENIZER_CONFIG_FILE, load_tokenizer, make_warmup_profiles
+
+cli = typer.Typer()
+
+
+@cli.callback()
+def main():
+    """
+    Arabic TTS inference tools.
+    """
+
+
+def read_lines(path: str, encoding: str = "utf-16"):
+    """Reads the non-empty, stripped lines of a text file."""
+    with open(path, "r", encoding=encoding) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def parse_ints(values: str):
+    return [int(value) for value in values.split(",") if value.strip()]
+
+
+def parse_bucketer(boundaries: str, max_batch_size: int = 0):
+    """Builds a ``LengthBucketer`` from a comma separated list of boundaries, ``None`` if empty."""
+    if not boundaries:
+        return None
+    return LengthBucketer(parse_ints(boundaries), max_batch_size=max_batch_size)
+
+
+@cli.command()
+def warm_cache(export_path: str = typer.Option(..., "--export-path", help="Directory containing the exported tokenizer_config.json."),
+               cache_path: str = typer.Option(..., "--cache-path", help="Path of the sqlite token cache to fill."),
+               input_path: str = typer.Option(..., "-i", "--input", help="Text file with one sentence per line."),
+               encoding: str = typer.Option("utf-16", "--encoding", help="Encoding of the input file."),
+               batch_size: int = typer.Option(1000, "--batch-size", help="Number of sentences written per transaction.")):
+    """
+    Pre-warms a persistent token cache from a text file.
+    """
+    tokenizer = load_tokenizer(export_path)
+    cache = TokenCache(cache_path)
+    fingerprint = tokenizer.fingerprint
+
+    texts = read_lines(input_path, encoding)
+    cleaned = list(dict.fromkeys(tokenizer.text_cleaner(text) for text in texts))
+    missing = [text for text in cleaned if cache.get(fingerprint, text) is None]
+    print(f"> {len(texts)} lines, {len(cleaned)} unique, {len(missing)} not cached.")
+    for start in range(0, len(missing), batch_size):
+        chunk = missing[start:start + batch_size]
+        cache.put_many(fingerprint, [(text, tokenizer.encode_cleaned_array(text)) for text in chunk])
+    if tokenizer.unknown_characters:
+        print(f"\t|> ! Discarded unknown characters: {''.join(sorted(tokenizer.unknown_characters))}")
+    print(f"> Token cache {cache_path} holds {len(cache)} entries.")
+
+
+@cli.command()
+def compile_tokenizer(export_path: str = typer.Option(..., "--export-path", help="Directory containing the exported tokenizer_config.json.")):
+    """
+    Writes tokenizer.compiled.json, a precompiled tokenizer loaded instead of the JSON config at startup.
+    """
+    config_path = Path(export_path) / TOKENIZER_CONFIG_FILE
+    with open(config_path, "r") as f:
+        tokenizer = Tokenizer.init_from_config(json.load(f))
+    output_path = Path(export_path) / COMPILED_TOKENIZER_FILE
+    tokenizer.save_compiled(output_path, source_fingerprint=file_fingerprint(config_path))
+    print(f"> Compiled tokenizer {tokenizer.fingerprint[:12]} saved to {output_path}.")
+
+
+@cli.command()
+def serve(export_path: str = typer.Option(..., "--export-path", help="Directory containing model.onnx and tokenizer_config.json."),
+          host: str = typer.Option("127.0.0.1", "--host", help="Bind address."),
+          port: int = typer.Option(8000, "--port", help="Bind port."),
+          max_batch_size: int = typer.Option(8, "--max-batch-size", help="Maximum number of requests per model call."),
+          max_wait_ms: float = typer.Option(10.0, "--max-wait-ms", help="Maximum time to wait for a batch to fill."),
+          max_queue_size: int = typer.Option(256, "--max-queue-size", help="Requests waiting beyond this are rejected with 503."),
+          workers: int = typer.Option(1, "--workers", help="Number of batches run concurrently."),
+          processes: int = typer.Option(0, "--processes", help="Run batches on this many worker processes sharing the model weights."),
+          threads: int = typer.Option(1, "--threads", help="onnxruntime intra-op threads per worker process."),
+          token_cache_path: str = typer.Option("", "--token-cache-path", help="Optional persistent token cache."),
+          bucket_boundaries: str = typer.Option("", "--bucket-boundaries", help="Comma separated token length buckets, e.g. 32,64,128,256."),
+          warmup_lengths: str = typer.Option("", "--warmup-lengths", help="Comma separated token lengths run at startup with batch sizes 1 and --max-batch-size. Defaults to the bucket boundaries."),
+          io_binding: bool = typer.Option(False, "--io-binding", help="Run the model through onnxruntime IO binding with reusable input buffers.")):
+    """
+    Serves the synthesizer over HTTP with dynamic micro-batching.
+    """
+    import uvicorn
+    from .server import create_app
+
+    app = create_app(export_path,
+                     max_batch_size=max_batch_size,
+                     max_wait=max_wait_ms / 1000,
+                     max_queue_size=max_queue_size,
+                     num_workers=workers,
+                     num_processes=processes,
+                     intra_op_threads=threads,
+                     token_cache_path=token_cache_path or None,
+                     bucketer=parse_bucketer(bucket_boundaries),
+                     warmup_profiles=make_warmup_profiles(parse_ints(warmup_lengths or bucket_boundaries),
+                                                          sorted({1, max_batch_size})),
+                     io_binding=io_binding)
+    uvicorn.run(app, host=host, port=port)
+
+
+@cli.command()
+def benchmark(export_path: str = typer.Option(..., "--export-path", help="Directory containing model.onnx and tokenizer_config.json."),
+              input_path: str = typer.Option(..., "-i", "--input", help="Text file with one sentence per line."),
+              encoding: str = typer.Option("utf-16", "--encoding", help="Encoding of the input file."),
+              batch_sizes: str = typer.Option("1,4,8", "--batch-sizes", help="Comma separated batch sizes."),
+              threads: str = typer.Option("0", "--threads", help="Comma separated onnxruntime intra-op thread counts, 0 for the default."),
+              lengths: str = typer.Option("0", "--lengths", help="Comma separated target text lengths in characters, 0 for the corpus as is."),
+              repeats: int = typer.Option(3, "--repeats", help="Passes over the corpus per configuration."),
+              model_file: str = typer.Option("model.onnx", "--model-file", help="Model file inside the export directory."),
+              isolate: bool = typer.Option(True, "--isolate/--no-isolate", help="Run each configuration in a fresh process for a per-configuration peak RSS."),
+              output: str = typer.Option("", "-o", "--output", help="Path of the JSON report.")):
+    """
+    Measures RTF, latency percentiles, throughput and peak RSS of an exported model.
+    """
+    from .benchmark import format_report, run_benchmark
+
+    report = run_benchmark(export_path,
+                           read_lines(input_path, encoding),
+                           batch_sizes=parse_ints(batch_sizes),
+                           thread_counts=parse_ints(threads),
+                           text_lengths=parse_ints(lengths),
+                           repeats=repeats,
+                           model_file=model_file,
+                           isolate=isolate)
+    print(format_report(report))
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"> Benchmark report saved to {output}.")
+
+
+@cli.command()
+def evaluate(variants: List[str] = typer.Option(..., "--variant", help="[name=]export directory or .onnx file inside one. Repeat for each variant."),
+             input_path: str = typer.Option(..., "-i", "--input", help="Text file with one sentence per line, e.g. the training test sentences."),
+             encoding: str = typer.Option("utf-16", "--encoding", help="Encoding of the input file."),
+             reference: str = typer.Option("", "--reference", help="Name of the reference variant. Defaults to the first one."),
+             max_mcd_db: float = typer.Option(6.0, "--max-mcd-db", help="Maximum mean mel-cepstral distance to the reference."),
+             max_duration_delta: float = typer.Option(0.1, "--max-duration-delta", help="Maximum relative duration difference of any sentence."),
+             repeats: int = typer.Option(3, "--repeats", help="Timed passes over the sentences per variant."),
+             batch_size: int = typer.Option(1, "--batch-size", help="Sentences per model call while timing."),
+             sample_rate: int = typer.Option(16000, "--sample-rate", help="Sample rate of the models."),
+             output: str = typer.Option("", "-o", "--output", help="Path of the JSON report.")):
+    """
+    Compares the speed, memory and quality of exported models against a reference.
+    """
+    from .evaluation import format_evaluation, parse_variant, run_evaluation
+
+    report = run_evaluation([parse_variant(spec) for spec in variants],
+                            read_lines(input_path, encoding),
+                            reference=reference or None,
+                            max_mcd_db=max_mcd_db,
+                            max_duration_delta=max_duration_delta,
+                            repeats=repeats,
+                            batch_size=batch_size,
+                            sample_rate=sample_rate)
+    print(format_evaluation(report))
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"> Evaluation report saved to {output}.")
+
+
+@cli.command()
+def batch(export_path: str = typer.Option(..., "--export-path", help="Directory containing model.onnx and tokenizer_config.json."),
+          input_path: str = typer.Option(..., "-i", "--input", help="Text file with one sentence per line, or JSONL with a text and an optional id per line."),
+          output_path: str = typer.Option(..., "-o", "--output-path", help="Directory of the audio shards and manifest.json. An existing run is resumed."),
+          input_format: str = typer.Option("auto", "--input-format", help="text, jsonl or auto (jsonl for .jsonl files)."),
+          encoding: str = typer.Option("", "--encoding", help="Encoding of the input file. Defaults to utf-16 for text and utf-8 for jsonl."),
+          audio_format: str = typer.Option("wav", "--format", help="Audio format of the shard members: wav, pcm or opus."),
+          workers: int = typer.Option(0, "--workers", help="Number of worker processes, 0 for one per CPU, -1 to synthesize in this process."),
+          threads: int = typer.Option(1, "--threads", help="onnxruntime intra-op threads per worker."),
+          batch_size: int = typer.Option(8, "--batch-size", help="Maximum number of texts per model call."),
+          bucket_boundaries: str = typer.Option("32,64,128,256,512", "--bucket-boundaries", help="Comma separated cleaned text lengths texts are batched by."),
+          shard_size: int = typer.Option(1000, "--shard-size", help="Unique texts per shard."),
+          sample_rate: int = typer.Option(16000, "--sample-rate", help="Sample rate of the model.")):
+    """
+    Synthesizes a corpus into resumable audio shards, each text once.
+    """
+    from .bulk import BulkSynthesizer, inline_submit, read_records
+    from .synthesizer import Synthesizer
+
+    tokenizer = load_tokenizer(export_path)
+    bucketer = parse_bucketer(bucket_boundaries, batch_size) or LengthBucketer(max_batch_size=batch_size)
+    records = read_records(input_path, input_format, encoding or None)
+    pool = None
+    if workers < 0:
+        synthesizer = Synthesizer.init_from_path(export_path, sample_rate=sample_rate)
+        submit = inline_submit(synthesizer.synthesize_batch)
+    else:
+        from .pool import SynthesizerPool
+
+        pool = SynthesizerPool(export_path, num_workers=workers or None, intra_op_threads=threads, sample_rate=sample_rate)
+        submit = pool.submit
+        print(f"> Started {pool.num_workers} workers.")
+    try:
+        bulk = BulkSynthesizer(output_path, submit, sample_rate,
+                               clean=tokenizer.text_cleaner,
+                               shard_size=shard_size,
+                               bucketer=bucketer,
+                               audio_format=audio_format)
+        manifest = bulk.run(records, source=str(input_path))
+    finally:
+        if pool is not None:
+            pool.close()
+    shards = manifest["shards"].values()
+    failed = sum(shard["num_failed"] for shard in shards)
+    print(f"> {sum(shard['num_texts'] for shard in shards)} texts and {sum(shard['num_duplicates'] for shard in shards)} duplicates "
+          f"in {len(manifest['shards'])} shards saved to {output_path}.")
+    if failed:
+        print(f"\t|> ! {failed} texts failed, see the failed entries of the shard indexes.")
+
+
+if __name__ == "__main__":
+    cli()
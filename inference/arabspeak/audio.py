@@ -0,0 +1,314 @@
+import collections
+import io
+import os
+import struct
+import wave
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+
+PCM_CHUNK_SAMPLES = 16384
+SINK_BUFFER_BYTES = 64 * 1024
+# Size written in the RIFF and data fields of a WAV header whose length is not known yet.
+UNKNOWN_WAV_SIZE = 0xFFFFFFFF
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def float_to_pcm16(wav: np.ndarray, inplace: bool = False, chunk_size: int = PCM_CHUNK_SAMPLES) -> np.ndarray:
+    """Converts a ``float32`` waveform in ``[-1, 1]`` to ``int16`` PCM, clipping out of range samples.
+
+    Args:
+        wav(np.ndarray):
+            The waveform.
+        inplace(bool):
+            Writes the samples into the first half of ``wav``'s own memory, chunk by chunk, and
+            returns an ``int16`` view of it instead of allocating new arrays. ``wav`` must be a
+            writable, contiguous ``float32`` array and is overwritten. Other waveforms fall back
+            to a copy.
+        chunk_size(int):
+            Samples converted per step when ``inplace`` is set.
+    """
+    if not (inplace and wav.dtype == np.float32 and wav.flags.writeable and wav.flags.c_contiguous):
+        return (np.clip(wav, -1.0, 1.0) * 32767).astype(np.int16)
+    flat = wav.reshape(-1)
+    pcm = flat.view(np.int16)[:flat.size]
+    # The int16 output of a chunk only overlaps float samples of the same or earlier chunks.
+    for start in range(0, flat.size, chunk_size):
+        block = flat[start:start + chunk_size]
+        np.clip(block, -1.0, 1.0, out=block)
+        block *= 32767
+        pcm[start:start + block.size] = block
+    return pcm.reshape(wav.shape)
+
+
+def encode_wav(wav: np.ndarray, sample_rate: int, inplace: bool = False) -> bytes:
+    """Encodes a ``float32`` waveform as a mono 16-bit WAV file. See ``float_to_pcm16`` for ``inplace``."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(float_to_pcm16(wav, inplace=inplace).tobytes())
+    return buffer.getvalue()
+
+
+def wav_header(sample_rate: int, num_samples: Optional[int] = None) -> bytes:
+    """The 44-byte header of a mono 16-bit WAV file.
+
+    Without ``num_samples`` the sizes are set to ``0xFFFFFFFF``, which players and decoders
+    reading a stream take as "until the end of the data".
+    """
+    data_size = UNKNOWN_WAV_SIZE if num_samples is None else 2 * num_samples
+    riff_size = UNKNOWN_WAV_SIZE if num_samples is None else 36 + data_size
+    return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", riff_size, b"WAVE", b"fmt ", 16, 1, 1,
+                       sample_rate, 2 * sample_rate, 2, 16, b"data", data_size)
+
+
+class AudioSink:
+    """Encodes ``float32`` waveform chunks incrementally into an output.
+
+    Chunks are converted ``chunk_size`` samples at a time and encoded bytes are handed to the
+    output whenever ``buffer_size`` of them are pending, so the memory held by a sink does not
+    grow with the length of the audio. Subclasses write their header in ``_start``, encode a
+    block in ``_encode`` and finalize the stream in ``_finish``.
+
+    Args:
+        output:
+            A path (opened here and closed with the sink), a binary file-like object with
+            ``write``, a socket (``sendall``), or a callable receiving each block of bytes.
+        sample_rate(int):
+            The sample rate of the waveform.
+        buffer_size(int):
+            Encoded bytes held before they are written to the output.
+        chunk_size(int):
+            Samples converted per step, larger chunks are split.
+    """
+
+    mime_type = "application/octet-stream"
+
+    def __init__(self, output, sample_rate: int, buffer_size: int = SINK_BUFFER_BYTES, chunk_size: int = PCM_CHUNK_SAMPLES):
+        self.sample_rate = sample_rate
+        self.buffer_size = buffer_size
+        self.chunk_size = chunk_size
+        self.num_samples = 0
+        self.closed = False
+        self._buffer = bytearray()
+        self._file = None
+        self._owns_file = isinstance(output, (str, os.PathLike))
+        if self._owns_file:
+            self._file = open(output, "wb")
+            self._write_output = self._file.write
+        elif hasattr(output, "sendall"):
+            self._write_output = output.sendall
+        elif hasattr(output, "write"):
+            self._file = output
+            self._write_output = output.write
+        elif callable(output):
+            self._write_output = output
+        else:
+            raise TypeError(f"Cannot write audio to {type(output).__name__}.")
+        self._start()
+
+    @property
+    def content_type(self) -> str:
+        return self.mime_type.format(sample_rate=self.sample_rate)
+
+    def _start(self):
+        pass
+
+    def _encode(self, block: np.ndarray, inplace: bool):
+        self._emit(float_to_pcm16(block, inplace=inplace).astype("<i2", copy=False).tobytes())
+
+    def _finish(self):
+        pass
+
+    def _emit(self, data: bytes):
+        if not self._buffer and len(data) >= self.buffer_size:
+            self._write_output(data)
+            return
+        self._buffer += data
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def write(self, chunk: np.ndarray, inplace: bool = False):
+        """Encodes a waveform chunk. With ``inplace`` the chunk's memory is reused for the
+        conversion and overwritten, see ``float_to_pcm16``."""
+        if self.closed:
+            raise ValueError("Write to a closed audio sink.")
+        flat = np.asarray(chunk).reshape(-1)
+        for start in range(0, flat.size, self.chunk_size):
+            self._encode(flat[start:start + self.chunk_size], inplace)
+        self.num_samples += flat.size
+
+    def flush(self):
+        """Writes the pending encoded bytes to the output."""
+        if self._buffer:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            self._write_output(data)
+
+    def close(self):
+        """Finalizes the stream, flushes it and closes the output if the sink opened it."""
+        if self.closed:
+            return
+        self._finish()
+        self.flush()
+        self.closed = True
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> "AudioSink":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PcmSink(AudioSink):
+    """Raw 16-bit little-endian mono PCM."""
+
+    mime_type = "audio/L16;rate={sample_rate};channels=1"
+
+
+class WavSink(AudioSink):
+    """Mono 16-bit WAV whose header is written before the first sample.
+
+    The header holds ``num_samples`` when the length is known up front and ``0xFFFFFFFF``
+    otherwise. On close, the sizes are patched in place when the output is seekable.
+
+    Args:
+        num_samples(int):
+            The total number of samples that will be written, if known.
+    """
+
+    mime_type = "audio/wav"
+
+    def __init__(self, output, sample_rate: int, num_samples: Optional[int] = None, **kwargs):
+        self.expected_samples = num_samples
+        super().__init__(output, sample_rate, **kwargs)
+
+    def _seekable(self) -> bool:
+        seekable = getattr(self._file, "seekable", None)
+        return seekable is not None and seekable()
+
+    def _start(self):
+        self._header_offset = self._file.tell() if self._seekable() else None
+        self._emit(wav_header(self.sample_rate, self.expected_samples))
+
+    def _finish(self):
+        if self._header_offset is None or self.num_samples == self.expected_samples:
+            return
+        self.flush()
+        end = self._file.tell()
+        self._file.seek(self._header_offset)
+        self._file.write(wav_header(self.sample_rate, self.num_samples))
+        self._file.seek(end)
+
+
+class _StreamWriter:
+    """Write-only file object handing the bytes written to it to a callback, for soundfile."""
+
+    def __init__(self, emit: Callable[[bytes], None]):
+        self._emit = emit
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._emit(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        # libsndfile asks for the file length by seeking to the end, which is the current position.
+        target = {io.SEEK_SET: offset, io.SEEK_CUR: self._position + offset, io.SEEK_END: self._position + offset}[whence]
+        if target != self._position:
+            raise io.UnsupportedOperation("The audio stream is not seekable.")
+        return self._position
+
+
+def _import_soundfile():
+    try:
+        import soundfile
+    except ImportError as e:
+        raise ImportError("Opus output requires the soundfile package (libsndfile >= 1.0.29).") from e
+    return soundfile
+
+
+class OpusSink(AudioSink):
+    """Ogg/Opus through ``soundfile``, available when libsndfile is built with Opus support.
+
+    Pages are written as libsndfile produces them, so the output does not need to be
+    seekable. Opus supports 8, 12, 16, 24 and 48 kHz.
+    """
+
+    mime_type = "audio/ogg"
+
+    def _start(self):
+        if self.sample_rate not in OPUS_SAMPLE_RATES:
+            raise ValueError(f"Opus does not support a sample rate of {self.sample_rate}.")
+        soundfile = _import_soundfile()
+        self._encoder = soundfile.SoundFile(_StreamWriter(self._emit), mode="w", samplerate=self.sample_rate,
+                                            channels=1, format="OGG", subtype="OPUS")
+
+    def _encode(self, block: np.ndarray, inplace: bool):
+        if inplace and block.dtype == np.float32 and block.flags.writeable:
+            block = np.clip(block, -1.0, 1.0, out=block)
+        else:
+            block = np.clip(block, -1.0, 1.0).astype(np.float32, copy=False)
+        self._encoder.write(block)
+
+    def _finish(self):
+        self._encoder.close()
+
+
+SINKS = {"pcm": PcmSink, "wav": WavSink, "opus": OpusSink}
+
+
+def available_formats() -> List[str]:
+    """The formats ``make_sink`` can write here, ``opus`` only when soundfile supports it."""
+    formats = ["pcm", "wav"]
+    try:
+        soundfile = _import_soundfile()
+        if "OPUS" in soundfile.available_subtypes("OGG"):
+            formats.append("opus")
+    except (ImportError, OSError):
+        pass
+    return formats
+
+
+def content_type(audio_format: str, sample_rate: int) -> str:
+    """The HTTP content type of a format."""
+    return SINKS[audio_format].mime_type.format(sample_rate=sample_rate)
+
+
+def make_sink(audio_format: str, output, sample_rate: int, **kwargs) -> AudioSink:
+    """Creates the sink of a format (``pcm``, ``wav`` or ``opus``), see ``AudioSink`` for the arguments."""
+    if audio_format not in SINKS:
+        raise ValueError(f"Unknown audio format {audio_format!r}, expected one of {', '.join(SINKS)}.")
+    return SINKS[audio_format](output, sample_rate, **kwargs)
+
+
+def encode_stream(
+    chunks: Iterable[np.ndarray],
+    audio_format: str = "wav",
+    sample_rate: int = 16000,
+    inplace: bool = False,
+    **kwargs,
+) -> Iterator[bytes]:
+    """Encodes waveform chunks lazily, yielding encoded bytes as soon as the sink releases them.
+
+    At most one chunk and one sink buffer are held at a time, e.g. when streaming
+    ``Synthesizer.synthesize_stream`` into an HTTP response.
+    """
+    pending = collections.deque()
+    sink = make_sink(audio_format, pending.append, sample_rate, **kwargs)
+    for chunk in chunks:
+        sink.write(chunk, inplace=inplace)
+        while pending:
+            yield pending.popleft()
+    sink.close()
+    while pending:
+        yield pending.popleft()
@@ -0,0 +1,235 @@
+import asyncio
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a request is submitted while the batcher queue is full."""
+
+
+class LengthBucketer:
+    """Groups sequences of similar length so that batches carry little padding.
+
+    A sequence of length ``n`` falls in the first bucket whose boundary is ``>= n``; sequences
+    longer than the last boundary share an overflow bucket. Within a bucket, sequences are
+    sorted by length and split into batches of at most ``max_batch_size`` sequences.
+
+    Args:
+        boundaries(List[int]):
+            Increasing upper bounds (in tokens) of the buckets.
+        max_batch_size(int):
+            Maximum number of sequences per batch, ``0`` for no limit.
+    """
+
+    def __init__(self, boundaries: Sequence[int] = (32, 64, 128, 256, 512), max_batch_size: int = 0):
+        boundaries = list(boundaries)
+        if not boundaries or boundaries != sorted(set(boundaries)) or boundaries[0] < 1:
+            raise ValueError("Bucket boundaries must be positive and strictly increasing.")
+        self.boundaries = boundaries
+        self.max_batch_size = max_batch_size
+        self.real_tokens = 0
+        self.padded_tokens = 0
+
+    def bucket_index(self, length: int) -> int:
+        return bisect.bisect_left(self.boundaries, length)
+
+    def plan(self, lengths: Sequence[int]) -> List[List[int]]:
+        """Splits sequence indices into batches, shortest buckets first.
+
+        Args:
+            lengths(Sequence[int]):
+                The length of each sequence.
+        returns:
+            batches(List[List[int]]):
+                Indices into ``lengths``. Each index appears in exactly one batch.
+        """
+        buckets: Dict[int, List[int]] = {}
+        for i, length in enumerate(lengths):
+            buckets.setdefault(self.bucket_index(length), []).append(i)
+        batches = []
+        for bucket in sorted(buckets):
+            indices = sorted(buckets[bucket], key=lambda i: lengths[i])
+            size = self.max_batch_size or len(indices)
+            batches.extend(indices[start:start + size] for start in range(0, len(indices), size))
+        return batches
+
+    def record(self, lengths: Sequence[int], width: int):
+        """Accounts for a batch of ``lengths`` padded to ``width`` tokens."""
+        self.real_tokens += int(sum(lengths))
+        self.padded_tokens += width * len(lengths)
+
+    @property
+    def padding_efficiency(self) -> float:
+        """Fraction of the batched tokens that are real tokens rather than padding."""
+        return self.real_tokens / self.padded_tokens if self.padded_tokens else 1.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "real_tokens": self.real_tokens,
+            "padded_tokens": self.padded_tokens,
+            "padding_efficiency": self.padding_efficiency,
+        }
+
+
+class MicroBatcher:
+    """Groups concurrent synthesis requests into micro-batches.
+
+    Requests are queued on the event loop. A dispatcher task takes the first waiting request,
+    keeps collecting until ``max_batch_size`` requests are gathered or ``max_wait`` seconds
+    have passed, and runs the batch on a thread pool, so the event loop is never blocked by
+    the model.
+
+    Args:
+        synthesize_batch(Callable):
+            Synthesizes a list of texts, e.g. ``Synthesizer.synthesize_batch``.
+        max_batch_size(int):
+            Maximum number of requests per batch.
+        max_wait(float):
+            Maximum seconds to wait for a batch to fill after its first request arrived.
+        max_queue_size(int):
+            Maximum number of waiting requests. Further submissions raise ``QueueFullError``.
+        num_workers(int):
+            Number of batches run concurrently.
+    """
+
+    def __init__(
+        self,
+        synthesize_batch: Callable[[List[str]], List[np.ndarray]],
+        max_batch_size: int = 8,
+        max_wait: float = 0.01,
+        max_queue_size: int = 256,
+        num_workers: int = 1,
+    ):
+        if max_batch_size < 1 or num_workers < 1:
+            raise ValueError("max_batch_size and num_workers must be positive.")
+        self.synthesize_batch = synthesize_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue_size = max_queue_size
+        self.num_workers = num_workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running = set()
+        self.batches = 0
+        self.requests = 0
+
+    @property
+    def started(self) -> bool:
+        return self._dispatcher is not None
+
+    async def start(self):
+        if self.started:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="arabspeak")
+        self._slots = asyncio.Semaphore(self.num_workers)
+        self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def stop(self):
+        if not self.started:
+            return
+        self._dispatcher.cancel()
+        try:
+            await self._dispatcher
+        except asyncio.CancelledError:
+            pass
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+        self._executor.shutdown(wait=True)
+        self._dispatcher = None
+
+    async def submit(self, text: str) -> np.ndarray:
+        """Queues a text and waits for its waveform.
+
+        Raises:
+            QueueFullError: If ``max_queue_size`` requests are already waiting.
+        """
+        if not self.started:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((text, future))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Synthesis queue is full ({self.max_queue_size} requests waiting).")
+        return await future
+
+    async def _collect(self, batch: List[Tuple[str, asyncio.Future]]):
+        batch.append(await self._queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _dispatch(self):
+        while True:
+            await self._slots.acquire()
+            batch = []
+            try:
+                await self._collect(batch)
+            except BaseException:
+                self._slots.release()
+                for _, future in batch:
+                    future.cancel()
+                raise
+            batch = [(text, future) for text, future in batch if not future.cancelled()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        loop = asyncio.get_running_loop()
+        try:
+            texts = [text for text, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.synthesize_batch, texts)
+            except Exception:
+                if len(batch) == 1:
+                    raise
+                # One bad request must not fail the others, retry them one by one.
+                results = []
+                for text in texts:
+                    try:
+                        results.append((await loop.run_in_executor(self._executor, self.synthesize_batch, [text]))[0])
+                    except Exception as e:
+                        results.append(e)
+            self.batches += 1
+            self.requests += len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+        }
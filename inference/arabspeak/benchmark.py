@@ -0,0 +1,202 @@
+import itertools
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+from .synthesizer import MODEL_FILE, Synthesizer, make_session_options
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB.
+
+    The peak covers the whole life of the process and never goes down, so it only describes
+    one measurement when that measurement ran in a fresh process.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def percentiles(values: Sequence[float], points: Sequence[int] = (50, 95, 99)) -> Dict[str, float]:
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return {f"p{p}": 0.0 for p in points}
+    return {f"p{p}": float(np.percentile(values, p)) for p in points}
+
+
+def make_length_corpus(texts: List[str], target_chars: int) -> List[str]:
+    """Builds texts of about ``target_chars`` characters by joining consecutive corpus sentences.
+
+    ``0`` returns the corpus unchanged. One text is produced per corpus sentence, starting
+    from that sentence and cycling through the corpus.
+    """
+    if target_chars <= 0 or not texts:
+        return list(texts)
+    corpus = []
+    for start in range(len(texts)):
+        parts, length = [], 0
+        for text in itertools.islice(itertools.cycle(texts), start, None):
+            if length >= target_chars:
+                break
+            parts.append(text)
+            length += len(text) + 1
+        corpus.append(" ".join(parts))
+    return corpus
+
+
+def benchmark_synthesizer(
+    synthesizer: Synthesizer,
+    texts: List[str],
+    batch_size: int = 1,
+    repeats: int = 3,
+    warmup: int = 1,
+) -> Dict:
+    """Measures one synthesizer on a corpus.
+
+    The corpus is cut into batches of ``batch_size`` texts, each batch is timed as one
+    ``synthesize_batch`` call (tokenization included) and the whole pass is repeated
+    ``repeats`` times after ``warmup`` untimed batches.
+
+    returns:
+        A dict with the real-time factor (compute seconds per second of audio), latency
+        percentiles per batch call in milliseconds and token and audio throughput.
+    """
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    for batch in itertools.islice(itertools.cycle(batches), warmup):
+        synthesizer.synthesize_batch(batch)
+
+    tokens_per_pass = sum(synthesizer.tokenizer.encode_array(text).size for text in texts)
+    latencies, compute, audio_samples = [], 0.0, 0
+    for _ in range(repeats):
+        for batch in batches:
+            start = time.perf_counter()
+            wavs = synthesizer.synthesize_batch(batch)
+            elapsed = time.perf_counter() - start
+            latencies.append(elapsed * 1000)
+            compute += elapsed
+            audio_samples += sum(wav.size for wav in wavs)
+
+    tokens = tokens_per_pass * repeats
+    audio_seconds = audio_samples / synthesizer.sample_rate
+    return {
+        "num_texts": len(texts),
+        "num_calls": len(latencies),
+        "mean_chars": float(np.mean([len(text) for text in texts])) if texts else 0.0,
+        "rtf": compute / audio_seconds if audio_seconds else float("inf"),
+        "latency_ms": {"mean": float(np.mean(latencies)) if latencies else 0.0, **percentiles(latencies)},
+        "tokens_per_sec": tokens / compute if compute else 0.0,
+        "audio_sec_per_sec": audio_seconds / compute if compute else 0.0,
+    }
+
+
+def measure_configuration(
+    export_path: Union[str, Path],
+    texts: List[str],
+    threads: int,
+    batch_size: int,
+    repeats: int = 3,
+    warmup: int = 1,
+    model_file: str = MODEL_FILE,
+    **synthesizer_kwargs,
+) -> Dict:
+    """Loads a synthesizer with ``threads`` intra-op threads and measures it with ``benchmark_synthesizer``.
+
+    Meant to run in a fresh process, ``peak_rss_mb`` is the peak of the process that ran it.
+    """
+    synthesizer = Synthesizer.init_from_path(
+        export_path,
+        model_file=model_file,
+        session_options=make_session_options(intra_op_threads=threads),
+        **synthesizer_kwargs,
+    )
+    result = benchmark_synthesizer(synthesizer, texts, batch_size, repeats, warmup)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_benchmark(
+    export_path: Union[str, Path],
+    texts: List[str],
+    batch_sizes: Sequence[int] = (1,),
+    thread_counts: Sequence[int] = (0,),
+    text_lengths: Sequence[int] = (0,),
+    repeats: int = 3,
+    warmup: int = 1,
+    model_file: str = MODEL_FILE,
+    isolate: bool = True,
+    **synthesizer_kwargs,
+) -> Dict:
+    """Runs ``benchmark_synthesizer`` over every combination of thread count, text length and batch size.
+
+    Args:
+        export_path:
+            The export directory containing the model and ``tokenizer_config.json``.
+        texts:
+            The benchmark corpus.
+        batch_sizes:
+            Texts per ``synthesize_batch`` call.
+        thread_counts:
+            onnxruntime intra-op threads, ``0`` for the onnxruntime default. One session is
+            created per thread count.
+        text_lengths:
+            Target text lengths in characters, see ``make_length_corpus``. ``0`` uses the corpus as is.
+        model_file:
+            The model file name inside ``export_path``.
+        isolate:
+            Run each configuration in a fresh process, so each entry has its own
+            ``peak_rss_mb``. Otherwise one session is shared per thread count and only the
+            peak of this process over the whole run is reported.
+    returns:
+        A JSON-serializable report with one entry per configuration.
+    """
+    results = []
+    for threads in thread_counts:
+        if not isolate:
+            synthesizer = Synthesizer.init_from_path(
+                export_path,
+                model_file=model_file,
+                session_options=make_session_options(intra_op_threads=threads),
+                **synthesizer_kwargs,
+            )
+        for length in text_lengths:
+            corpus = make_length_corpus(texts, length)
+            for batch_size in batch_sizes:
+                if isolate:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                        result = executor.submit(measure_configuration, export_path, corpus, threads, batch_size, repeats,
+                                                 warmup, model_file, **synthesizer_kwargs).result()
+                else:
+                    result = benchmark_synthesizer(synthesizer, corpus, batch_size, repeats, warmup)
+                results.append({"threads": threads, "text_length": length, "batch_size": batch_size, **result})
+    report = {
+        "export_path": str(export_path),
+        "model_file": model_file,
+        "repeats": repeats,
+        "results": results,
+    }
+    if not isolate:
+        report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def format_report(report: Dict) -> str:
+    """Renders a benchmark report as a plain text table."""
+    header = f"{'threads':>7} {'length':>6} {'batch':>5} {'rtf':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'tok/s':>9} {'rss MB':>7}"
+    lines = [header]
+    for r in report["results"]:
+        latency = r["latency_ms"]
+        rss = f"{r['peak_rss_mb']:.0f}" if "peak_rss_mb" in r else "-"
+        lines.append(
+            f"{r['threads']:>7} {r['text_length']:>6} {r['batch_size']:>5} {r['rtf']:>7.3f} "
+            f"{latency['p50']:>8.1f} {latency['p95']:>8.1f} {latency['p99']:>8.1f} "
+            f"{r['tokens_per_sec']:>9.0f} {rss:>7}"
+        )
+    if "peak_rss_mb" in report:
+        lines.append(f"> Peak RSS of the whole run: {report['peak_rss_mb']:.0f} MB.")
+    return "\n".join(lines)
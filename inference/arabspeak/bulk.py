@@ -0,0 +1,303 @@
+import collections
+import hashlib
+import io
+import json
+import os
+import tarfile
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from .audio import make_sink
+from .batching import LengthBucketer
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2
+INPUT_FORMATS = ("text", "jsonl")
+
+
+class TextRecord(NamedTuple):
+    line: int
+    id: str
+    text: str
+
+
+def read_records(path: Union[str, Path], input_format: str = "auto", encoding: Optional[str] = None) -> Iterator[TextRecord]:
+    """Streams the non-empty records of a corpus file.
+
+    ``text`` files hold one sentence per line, UTF-16 by default like the files read by
+    ``read_test_sentences`` in training, and records are named by line number. ``jsonl``
+    files (UTF-8 by default) hold one ``{"text": ..., "id": ...}`` object per line, ``id``
+    being optional. ``auto`` picks ``jsonl`` for ``.jsonl`` files and ``text`` otherwise.
+    """
+    if input_format == "auto":
+        input_format = "jsonl" if str(path).endswith(".jsonl") else "text"
+    if input_format not in INPUT_FORMATS:
+        raise ValueError(f"Unknown input format {input_format!r}, expected one of {', '.join(INPUT_FORMATS)}.")
+    encoding = encoding or ("utf-16" if input_format == "text" else "utf-8")
+    with open(path, "r", encoding=encoding) as f:
+        for line_number, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            if input_format == "text":
+                yield TextRecord(line_number, f"line-{line_number:08d}", line)
+                continue
+            record = json.loads(line)
+            text = str(record.get("text", "")).strip()
+            if text:
+                yield TextRecord(line_number, str(record.get("id", f"line-{line_number:08d}")), text)
+
+
+def shard_name(index: int) -> str:
+    return f"shard-{index:05d}"
+
+
+class _Shard(NamedTuple):
+    index: int
+    texts: List[TextRecord]
+    # Cleaned length of each text, used to bucket the batches.
+    lengths: List[int]
+    # Records whose text was already seen, with the audio of its first occurrence.
+    aliases: List[Tuple[TextRecord, str]]
+
+
+def _plan_shards(records: Iterable[TextRecord], shard_size: int, clean: Optional[Callable[[str], str]], extension: str) -> Iterator[_Shard]:
+    """Dedupes records and splits the unique texts into shards of ``shard_size``.
+
+    The split only depends on the input, so a rerun assigns every text to the same shard.
+    """
+    seen: Dict[str, str] = {}
+    shard = _Shard(0, [], [], [])
+    for record in records:
+        key = clean(record.text) if clean is not None else record.text
+        audio = seen.get(key)
+        if audio is not None:
+            shard.aliases.append((record, audio))
+            continue
+        if len(shard.texts) == shard_size:
+            yield shard
+            shard = _Shard(shard.index + 1, [], [], [])
+        seen[key] = f"{shard_name(shard.index)}.tar/{len(seen):08d}.{extension}"
+        shard.texts.append(record)
+        shard.lengths.append(len(key))
+    if shard.texts or shard.aliases:
+        yield shard
+
+
+def _shard_fingerprint(shard: _Shard) -> str:
+    """A hash of the records planned into a shard, compared on resume to detect an edited input."""
+    records = [list(record) for record in shard.texts] + [list(record) + [audio] for record, audio in shard.aliases]
+    return hashlib.sha1(json.dumps(records, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: Path, write: Callable):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def inline_submit(synthesize_batch: Callable[[List[str]], List[np.ndarray]]) -> Callable[[List[str]], Future]:
+    """Wraps ``Synthesizer.synthesize_batch`` as a ``submit`` running in the calling thread."""
+
+    def submit(texts: List[str]) -> Future:
+        future = Future()
+        try:
+            future.set_result(synthesize_batch(texts))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    return submit
+
+
+def load_manifest(output_path: Union[str, Path]) -> Optional[Dict]:
+    path = Path(output_path) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class BulkSynthesizer:
+    """Renders a corpus into audio shards, resuming an interrupted run.
+
+    Identical texts (after cleaning) are synthesized once. The unique texts are split into
+    shards of ``shard_size``; each shard is grouped by length with a ``LengthBucketer`` and
+    its batches are submitted to ``submit`` (e.g. ``SynthesizerPool.submit``), while the
+    previous shard is written, so workers stay busy across shard boundaries.
+
+    A shard is a tar of one audio file per unique text plus ``shard-NNNNN.json`` listing
+    every input record of the shard with its audio member, duplicates pointing to the
+    member of their first occurrence. Texts that could not be synthesized, and their
+    duplicates, are listed as ``failed`` instead. Files are renamed into place and the shard
+    is committed to ``manifest.json`` last, with a fingerprint of its records, so rerunning
+    skips the shards already done, and refuses to resume when the input planned into a
+    completed shard has changed.
+
+    Args:
+        output_path:
+            The output directory.
+        submit:
+            Callable mapping a batch of texts to a ``Future`` of their waveforms.
+        sample_rate(int):
+            The sample rate of the waveforms.
+        clean:
+            The text cleaner used to find duplicates, ``None`` to compare raw texts.
+        shard_size(int):
+            Unique texts per shard. Must match the value of the run being resumed.
+        bucketer(LengthBucketer):
+            Groups texts by cleaned length in characters into batches.
+        audio_format(str):
+            ``wav``, ``pcm`` or ``opus``.
+    """
+
+    def __init__(
+        self,
+        output_path: Union[str, Path],
+        submit: Callable[[List[str]], Future],
+        sample_rate: int,
+        clean: Optional[Callable[[str], str]] = None,
+        shard_size: int = 1000,
+        bucketer: Optional[LengthBucketer] = None,
+        audio_format: str = "wav",
+    ):
+        self.output_path = Path(output_path)
+        self.submit = submit
+        self.sample_rate = sample_rate
+        self.clean = clean
+        self.shard_size = shard_size
+        self.bucketer = bucketer or LengthBucketer(max_batch_size=8)
+        self.audio_format = audio_format
+        self.manifest = None
+        # Audio members that were never written because their text failed.
+        self._failed_audio = set()
+
+    def _open_manifest(self, source: str) -> Dict:
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        manifest = load_manifest(self.output_path)
+        if manifest is None:
+            return {"version": MANIFEST_VERSION, "source": source, "shard_size": self.shard_size,
+                    "audio_format": self.audio_format, "sample_rate": self.sample_rate, "shards": {}}
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"{self.output_path} has manifest version {manifest.get('version')}, expected {MANIFEST_VERSION}.")
+        for key in ("shard_size", "audio_format", "sample_rate"):
+            if manifest[key] != getattr(self, key):
+                raise ValueError(f"{self.output_path} was written with {key}={manifest[key]}, got {getattr(self, key)}.")
+        return manifest
+
+    def _submit_shard(self, shard: _Shard) -> List[Tuple[List[int], Future]]:
+        texts = [record.text for record in shard.texts]
+        return [(batch, self.submit([texts[i] for i in batch])) for batch in self.bucketer.plan(shard.lengths)]
+
+    def _results(self, shard: _Shard, batches: List[Tuple[List[int], Future]]) -> Iterator[Tuple[int, Optional[np.ndarray], Optional[str]]]:
+        for batch, future in batches:
+            try:
+                wavs = future.result()
+            except Exception:
+                # A failing text fails its whole batch, so the batch is retried text by text.
+                for i in batch:
+                    try:
+                        yield i, self.submit([shard.texts[i].text]).result()[0], None
+                    except Exception as e:
+                        yield i, None, f"{type(e).__name__}: {e}"
+                continue
+            for i, wav in zip(batch, wavs):
+                yield i, wav, None
+
+    def _encode(self, wav: np.ndarray) -> bytes:
+        buffer = io.BytesIO()
+        kwargs = {"num_samples": wav.size} if self.audio_format == "wav" else {}
+        with make_sink(self.audio_format, buffer, self.sample_rate, **kwargs) as sink:
+            sink.write(wav)
+        return buffer.getvalue()
+
+    def _write_shard(self, shard: _Shard, batches: List[Tuple[List[int], Future]]) -> Dict:
+        name = shard_name(shard.index)
+        entries: List[Optional[Dict]] = [None] * len(shard.texts)
+        failed = []
+        # Members are numbered by unique text, and every shard before this one is full.
+        first_member = shard.index * self.shard_size
+
+        def write_tar(f):
+            with tarfile.open(fileobj=f, mode="w") as tar:
+                for i, wav, error in self._results(shard, batches):
+                    record = shard.texts[i]
+                    member = f"{first_member + i:08d}.{self.audio_format}"
+                    if error is not None:
+                        failed.append({"id": record.id, "line": record.line, "text": record.text,
+                                       "audio": f"{name}.tar/{member}", "error": error})
+                        continue
+                    data = self._encode(wav)
+                    info = tarfile.TarInfo(member)
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+                    entries[i] = {"id": record.id, "line": record.line, "text": record.text,
+                                  "audio": f"{name}.tar/{member}", "num_samples": int(wav.size)}
+
+        _atomic_write(self.output_path / f"{name}.tar", write_tar)
+        num_texts = len(shard.texts) - len(failed)
+        self._failed_audio.update(entry["audio"] for entry in failed)
+        index = [entry for entry in entries if entry is not None]
+        for record, audio in shard.aliases:
+            entry = {"id": record.id, "line": record.line, "text": record.text, "audio": audio, "duplicate": True}
+            if audio in self._failed_audio:
+                failed.append({**entry, "error": "The first occurrence of this text failed."})
+            else:
+                index.append(entry)
+        index.sort(key=lambda entry: entry["line"])
+        failed.sort(key=lambda entry: entry["line"])
+        _atomic_write(self.output_path / f"{name}.json",
+                      lambda f: f.write(json.dumps({"entries": index, "failed": failed}, ensure_ascii=False, indent=1).encode("utf-8")))
+        num_samples = sum(entry.get("num_samples", 0) for entry in index)
+        return {"name": name, "fingerprint": _shard_fingerprint(shard), "num_texts": num_texts,
+                "num_duplicates": len(index) - num_texts, "num_failed": len(failed), "num_samples": num_samples,
+                "failed_audio": sorted({entry["audio"] for entry in failed if not entry.get("duplicate")})}
+
+    def run(self, records: Iterable[TextRecord], source: str = "", log: Callable[[str], None] = print) -> Dict:
+        """Synthesizes the records not covered by a completed shard and returns the manifest.
+
+        Raises:
+            ValueError: If the output was written with other settings, or a completed shard
+                from records that differ from the ones planned into it now.
+        """
+        self.manifest = manifest = self._open_manifest(source)
+        if manifest["shards"]:
+            log(f"> Resuming, {len(manifest['shards'])} shards already done.")
+        start = time.perf_counter()
+        done_texts, done_samples = 0, 0
+        in_flight = collections.deque()
+
+        def finish(shard, batches, submitted):
+            nonlocal done_texts, done_samples
+            entry = self._write_shard(shard, batches)
+            manifest["shards"][entry["name"]] = entry
+            _atomic_write(self.output_path / MANIFEST_FILE,
+                          lambda f: f.write(json.dumps(manifest, ensure_ascii=False, indent=4).encode("utf-8")))
+            done_texts += entry["num_texts"]
+            done_samples += entry["num_samples"]
+            elapsed = time.perf_counter() - start
+            audio_seconds = done_samples / self.sample_rate
+            failed = f", {entry['num_failed']} failed" if entry["num_failed"] else ""
+            log(f"> {entry['name']}: {entry['num_texts']} texts, {entry['num_duplicates']} duplicates{failed} "
+                f"in {time.perf_counter() - submitted:.1f}s | total {done_texts} texts, {audio_seconds:.1f}s of audio, "
+                f"{done_texts / elapsed:.1f} texts/s, RTF {elapsed / max(audio_seconds, 1e-9):.3f}")
+
+        for shard in _plan_shards(records, self.shard_size, self.clean, self.audio_format):
+            done = manifest["shards"].get(shard_name(shard.index))
+            if done is not None:
+                if done["fingerprint"] != _shard_fingerprint(shard):
+                    raise ValueError(f"{shard_name(shard.index)} in {self.output_path} was written from different input "
+                                     f"records, refusing to resume. Use a new output directory for an edited corpus.")
+                self._failed_audio.update(done["failed_audio"])
+                continue
+            in_flight.append((shard, self._submit_shard(shard), time.perf_counter()))
+            if len(in_flight) > 1:
+                finish(*in_flight.popleft())
+        while in_flight:
+            finish(*in_flight.popleft())
+        return manifest
@@ -0,0 +1,101 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+
+def array_nbytes(value: Any) -> int:
+    """Size of a cached value, ``nbytes`` for numpy arrays and ``0`` otherwise."""
+    return int(getattr(value, "nbytes", 0))
+
+
+def file_fingerprint(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """SHA-1 of a file's content, used to key caches by model."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by entry count and/or total size.
+
+    Args:
+        max_entries(int):
+            Maximum number of entries, ``0`` for no limit.
+        max_bytes(int):
+            Maximum total size of the values as measured by ``sizeof``, ``0`` for no limit.
+        sizeof(Callable):
+            Returns the size of a value. Defaults to ``array_nbytes``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        if max_entries < 0 or max_bytes < 0:
+            raise ValueError("Cache limits must be non-negative.")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or array_nbytes
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        size = self._sizeof(value)
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizeof(self._data.pop(key))
+            self._data[key] = value
+            self._bytes += size
+            while (self.max_entries and len(self._data) > self.max_entries) or (
+                self.max_bytes and self._bytes > self.max_bytes
+            ):
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= self._sizeof(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._data),
+            "bytes": self._bytes,
+        }
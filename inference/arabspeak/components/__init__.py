@@ -1 +1,6 @@
-from .text import *
+import importlib
+
+
+def __getattr__(name):
+    # Forwards to the text package without importing it until a component is used.
+    return getattr(importlib.import_module(".text", __name__), name)
@@ -1,6 +1,30 @@
-from .characters import Characters
-from .cleaners import clean_text
-from .phonemizer import Phonemizer
-from .tokenizer import Tokenizer
+import importlib
 
-__all__ = ["Characters", "clean_text", "Phonemizer", "Tokenizer"]
\ No newline at end of file
+_EXPORTS = {
+    "Characters": ".characters",
+    "TextCleaner": ".cleaners",
+    "clean_text": ".cleaners",
+    "clean_batch": ".cleaners",
+    "split_segments": ".cleaners",
+    "NumberVerbalizer": ".numbers",
+    "Phonemizer": ".phonemizer",
+    "Tokenizer": ".tokenizer",
+    "EncodedBatch": ".tokenizer",
+    "TokenCache": ".token_cache",
+    "StageSink": ".profiling",
+    "HistogramSink": ".profiling",
+}
+
+__all__ = ["Characters", "TextCleaner", "clean_text", "clean_batch", "split_segments", "NumberVerbalizer", "Phonemizer", "Tokenizer", "EncodedBatch", "TokenCache", "StageSink", "HistogramSink"]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -16,6 +16,7 @@ class Characters:
         self._bos = bos
         self._blank = blank
         self._num_chars = len(char_to_id)
+        self._id_translation_table = None
         
         # Validate that special tokens are in the mappings
         self._validate_special_tokens(pad, eos, bos, blank)
@@ -45,6 +46,20 @@ class Characters:
     @property
     def num_chars(self) -> int:
         return self._num_chars
+
+    @property
+    def id_translation_table(self) -> Dict[int, str]:
+        """A ``str.translate`` table that maps each character to ``chr(id)``.
+
+        Translating a text with it and reading the code units back gives the token IDs in a
+        single C-level pass. Only single-character entries are included, so special tokens
+        like ``<PAD>`` are never matched by text.
+        """
+        if self._id_translation_table is None:
+            self._id_translation_table = {
+                ord(char): chr(idx) for char, idx in self._char_to_id.items() if len(char) == 1
+            }
+        return self._id_translation_table
     
     def char_to_id(self, char: str) -> int:
         try:
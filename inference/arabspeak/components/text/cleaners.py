@@ -1,20 +1,26 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+import functools
 import re
 
+from .numbers import NumberVerbalizer
+
+abbreviations = [
+    ("أ.د.م", "الأستاذ الدكتور المهندس"),
+    ("أ.د", "الأستاذ الدكتور"),
+    ("أ.م", "الأستاذ المهندس"),
+    ("أ", "الأستاذ"),
+    ("ا", "الأستاذ"),
+    ("د", "الدكتور"),
+    ("م", "المهندس"),
+]
+
 abbreviations_ar = [
     (re.compile("\\b%s\\." % x[0], re.IGNORECASE), x[1])
-    for x in [
-        ("أ.د.م", "الأستاذ الدكتور المهندس"),
-        ("أ.د", "الأستاذ الدكتور"),
-        ("أ.م", "الأستاذ المهندس"),
-        ("أ", "الأستاذ"),
-        ("ا", "الأستاذ"),
-        ("د", "الدكتور"),
-        ("م", "المهندس"),
-    ]
+    for x in abbreviations
 ]
 
 whitespace_regex = re.compile(r"\s+")
+segment_regex = re.compile(r"[^,?.]*[,?.]+|[^,?.]+$")
 auxilary_symbols = re.compile(r"[\<\>\(\)\[\]\"]+")
 symbols_mapping = {
     "،":",",
@@ -29,10 +35,86 @@ symbols_mapping = {
     "\'":",",
 }
 
+
+class TextCleaner:
+    """Compiled version of ``clean_text``.
+
+    Numbers, dates and times are first spelled out by ``verbalizer``, before symbol
+    replacement turns their separators into punctuation. The abbreviation table is fused into
+    a single alternation regex (earlier entries take precedence, as in ``abbreviations``), and
+    symbol replacement and auxiliary symbol removal are folded into one ``str.translate``
+    table, so a text is walked in two passes plus the whitespace collapse instead of one pass
+    per pattern.
+
+    ``to_config`` holds the tables, including the verbalizer words, so ``init_from_config``
+    rebuilds the cleaner without spelling out every number again.
+    """
+
+    def __init__(
+        self,
+        abbreviations: List = abbreviations,
+        symbols_mapping: Dict[str, str] = symbols_mapping,
+        auxilary_symbols: str = "<>()[]\"",
+        verbalizer: Optional[NumberVerbalizer] = None,
+    ):
+        self.verbalizer = verbalizer
+        self.abbreviations = abbreviations
+        self.symbols_mapping = symbols_mapping
+        self.auxilary_symbols = auxilary_symbols
+        self._replacements = [replacement for _, replacement in abbreviations]
+        alternation = "|".join(f"({pattern})" for pattern, _ in abbreviations)
+        self._abbreviations_regex = re.compile(f"\\b(?:{alternation})\\.", re.IGNORECASE)
+        table = {symbol: replacement for symbol, replacement in symbols_mapping.items()}
+        for symbol in auxilary_symbols:
+            table.setdefault(symbol, None)
+        self._table = str.maketrans(table)
+
+    def _expand(self, match: re.Match) -> str:
+        return self._replacements[match.lastindex - 1]
+
+    def expand_abbreviations(self, text: str) -> str:
+        return self._abbreviations_regex.sub(self._expand, text)
+
+    def clean(self, text: str) -> str:
+        if self.verbalizer is not None:
+            text = self.verbalizer(text)
+        text = self._abbreviations_regex.sub(self._expand, text)
+        text = text.translate(self._table)
+        return " ".join(text.split())
+
+    def clean_batch(self, texts: List[str]) -> List[str]:
+        clean = self.clean
+        return [clean(text) for text in texts]
+
+    __call__ = clean
+
+    def to_config(self) -> Dict:
+        return {
+            "abbreviations": [list(entry) for entry in self.abbreviations],
+            "symbols_mapping": self.symbols_mapping,
+            "auxilary_symbols": self.auxilary_symbols,
+            "verbalizer": self.verbalizer.tables() if self.verbalizer is not None else None,
+        }
+
+    @staticmethod
+    def init_from_config(config: Dict) -> "TextCleaner":
+        tables = config["verbalizer"]
+        return TextCleaner(
+            abbreviations=[tuple(entry) for entry in config["abbreviations"]],
+            symbols_mapping=config["symbols_mapping"],
+            auxilary_symbols=config["auxilary_symbols"],
+            verbalizer=NumberVerbalizer(tables=tables) if tables is not None else None,
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def default_cleaner() -> TextCleaner:
+    """The cleaner of ``clean_text``, built on first use: the verbalizer tables take ~20 ms."""
+    return TextCleaner(verbalizer=NumberVerbalizer())
+
+
 def expand_abbreviations(text):
-    for regex, replacement in abbreviations_ar:
-        text = re.sub(regex, replacement, text)
-    return text
+    return default_cleaner().expand_abbreviations(text)
 
 def remove_aux_symbols(text):
     text = auxilary_symbols.sub("", text)
@@ -46,11 +128,44 @@ def replace_symbols(text):
 def collapse_whitespace(text):
     return whitespace_regex.sub(" ", text).strip()
 
-#TODO: replace numbers, dates, and times.
+def verbalize_numbers(text):
+    return default_cleaner().verbalizer(text)
 
 def clean_text(text):
-    text = expand_abbreviations(text)
-    text = replace_symbols(text)
-    text = remove_aux_symbols(text)
-    text = collapse_whitespace(text)
-    return text
+    return default_cleaner().clean(text)
+
+def clean_batch(texts: List[str]) -> List[str]:
+    return default_cleaner().clean_batch(texts)
+
+def split_segments(text: str, max_chars: int = 0) -> List[str]:
+    """
+    Splits cleaned text into clauses at the punctuation normalized by ``clean_text`` (``,``, ``?``, ``.``).
+    args:
+        text (str): The cleaned text to split.
+        max_chars (int): If positive, clauses longer than this are further split at whitespace.
+    returns:
+        List[str]: The non-empty segments, punctuation kept at the end of each one.
+    """
+    segments = []
+    for match in segment_regex.finditer(text):
+        segment = match.group().strip()
+        if not segment.strip(",?. "):
+            continue
+        if max_chars > 0 and len(segment) > max_chars:
+            segments.extend(_split_long_segment(segment, max_chars))
+        else:
+            segments.append(segment)
+    return segments
+
+def _split_long_segment(segment: str, max_chars: int) -> List[str]:
+    parts = []
+    current = ""
+    for word in segment.split(" "):
+        if current and len(current) + 1 + len(word) > max_chars:
+            parts.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        parts.append(current)
+    return parts
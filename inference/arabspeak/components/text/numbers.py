@@ -0,0 +1,338 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import re
+
+DIGITS = "[0-9٠-٩۰-۹]"
+_ascii_digits = str.maketrans("٠١٢٣٤٥٦٧٨٩"
+                              "۰۱۲۳۴۵۶۷۸۹",
+                              "01234567890123456789")
+
+ZERO = "صِفْر"
+AND = "وَ"
+POINT = "فَاصِلَة"
+PERCENT = "بِالْمِئَة"
+NEGATIVE = "سَالِب"
+OF = "مِنْ"
+YEAR = "سَنَة"
+HOUR = "السَّاعَة"
+_strip_diacritics = str.maketrans("", "", "".join(chr(c) for c in range(0x064B, 0x0653)))
+# Definite articles turning a number into an ordinal (القرن الـ21), longest first.
+articles = ("والـ", "وال", "الـ", "ال")
+# Letters the article assimilates to, doubling them (الثَّالِث but الْخَامِس).
+sun_letters = "تثدذرزسشصضطظلن"
+SHADDA = "\u0651"
+
+# Indexed by gender of the counted noun (masculine, feminine), then 1..19. Masculine nouns
+# take the numerals ending in taa marbuta (ثَلَاثَة رِجَال), feminine ones the short forms.
+ones = {
+    "masculine": ["", "وَاحِد", "اِثْنَان", "ثَلَاثَة", "أَرْبَعَة", "خَمْسَة", "سِتَّة", "سَبْعَة", "ثَمَانِيَة", "تِسْعَة", "عَشَرَة",
+                  "أَحَدَ عَشَر", "اِثْنَا عَشَر"],
+    "feminine": ["", "وَاحِدَة", "اِثْنَتَان", "ثَلَاث", "أَرْبَع", "خَمْس", "سِتّ", "سَبْع", "ثَمَانِي", "تِسْع", "عَشْر",
+                 "إِحْدَى عَشْرَة", "اِثْنَتَا عَشْرَة"],
+}
+teens_suffix = {"masculine": "عَشَر", "feminine": "عَشْرَة"}
+tens = ["", "", "عِشْرُون", "ثَلَاثُون", "أَرْبَعُون", "خَمْسُون", "سِتُّون", "سَبْعُون", "ثَمَانُون", "تِسْعُون"]
+hundreds = ["", "مِئَة", "مِئَتَان", "ثَلَاثُمِئَة", "أَرْبَعُمِئَة", "خَمْسُمِئَة", "سِتُّمِئَة", "سَبْعُمِئَة", "ثَمَانِمِئَة", "تِسْعُمِئَة"]
+# Nominative endings and their genitive/accusative counterparts.
+oblique_endings = [("ثْنَا", "ثْنَيْ"), ("ثْنَتَا", "ثْنَتَيْ"), ("َان", "َيْن"), ("ُون", "ِين")]
+
+ordinals = ["", "الْأَوَّل", "الثَّانِي", "الثَّالِث", "الرَّابِع", "الْخَامِس", "السَّادِس", "السَّابِع", "الثَّامِن", "التَّاسِع", "الْعَاشِر"]
+ordinal_tens = ["", "", "الْعِشْرُون", "الثَّلَاثُون", "الْأَرْبَعُون", "الْخَمْسُون", "السِّتُّون", "السَّبْعُون", "الثَّمَانُون", "التِّسْعُون"]
+
+months = ["", "يَنَايِر", "فِبْرَايِر", "مَارِس", "أَبْرِيل", "مَايُو", "يُونْيُو", "يُولْيُو", "أَغُسْطُس", "سِبْتَمْبِر", "أُكْتُوبَر", "نُوفَمْبِر", "دِيسَمْبِر"]
+
+
+class Noun(NamedTuple):
+    """The forms of a counted noun: ``1`` and ``100+`` take ``singular``, ``2`` the dual,
+    ``3..10`` the plural and ``11..99`` the accusative singular."""
+    singular: str
+    dual: str
+    plural: str
+    accusative: str
+    feminine: bool = False
+
+
+scales = [
+    Noun("أَلْف", "أَلْفَان", "آلَاف", "أَلْفًا"),
+    Noun("مِلْيُون", "مِلْيُونَان", "مَلَايِين", "مِلْيُونًا"),
+    Noun("مِلْيَار", "مِلْيَارَان", "مِلْيَارَات", "مِلْيَارًا"),
+    Noun("تِرِلْيُون", "تِرِلْيُونَان", "تِرِلْيُونَات", "تِرِلْيُونًا"),
+]
+minute = Noun("دَقِيقَة", "دَقِيقَتَان", "دَقَائِق", "دَقِيقَة", feminine=True)
+second = Noun("ثَانِيَة", "ثَانِيَتَان", "ثَوَانٍ", "ثَانِيَة", feminine=True)
+
+# symbol: (unit, hundredth of the unit)
+currencies = {
+    "$": (Noun("دُولَار", "دُولَارَان", "دُولَارَات", "دُولَارًا"), Noun("سِنْت", "سِنْتَان", "سِنْتَات", "سِنْتًا")),
+    "€": (Noun("يُورُو", "اِثْنَان يُورُو", "يُورُو", "يُورُو"), Noun("سِنْت", "سِنْتَان", "سِنْتَات", "سِنْتًا")),
+    "£": (Noun("جُنَيْه", "جُنَيْهَان", "جُنَيْهَات", "جُنَيْهًا"), Noun("بِنْس", "بِنْسَان", "بِنْسَات", "بِنْسًا")),
+}
+
+
+def _and(word: str) -> str:
+    # The kasra of a hamzat wasl is not pronounced after the conjunction.
+    return AND + (word[0] + word[2:] if word.startswith("اِ") else word)
+
+
+def _int(text: str) -> int:
+    return int(text.translate(_ascii_digits).replace(",", "").replace("٬", ""))
+
+
+def _definite(words: str) -> str:
+    """Puts the definite article on the first word."""
+    if words[0] not in sun_letters:
+        return "الْ" + words
+    vowel = 2 if len(words) > 1 and "\u064b" <= words[1] <= "\u0650" else 1
+    return "ال" + words[:vowel] + SHADDA + words[vowel:]
+
+
+def _oblique(words: str) -> str:
+    result = []
+    for word in words.split(" "):
+        for nominative, oblique in oblique_endings:
+            if word.endswith(nominative):
+                word = word[:-len(nominative)] + oblique
+                break
+        result.append(word)
+    return " ".join(result)
+
+
+class NumberVerbalizer:
+    """Expands numbers, dates, times, percentages and currency amounts into diacritized Arabic words.
+
+    The words of every number below a thousand are built once per gender and case, so reading
+    a number is a few table lookups per group of three digits. Text is scanned once, left to
+    right: a character class finds the next possible token start (a digit, minus or currency
+    sign) and one anchored regex, whose named groups are the token kinds (date, time, amount
+    with its sign, currency or percent sign), reads the token there. Text without digits is
+    returned as is after one search.
+
+    Recognized forms, with Arabic-Indic digits accepted everywhere:
+        ``1,250.5`` cardinals and decimals, ``-3`` negatives, ``الـ21`` or ``والـ3`` ordinals, ``15%``,
+        ``$3.50``/``3.50$`` currency, ``5/3/2024`` or ``2024-03-05`` dates and ``14:30`` times.
+        Numbers with a leading zero or more than fifteen digits are read digit by digit.
+
+    Args:
+        months(List[str]):
+            Month names, indexed from 1.
+        currencies(Dict[str, tuple]):
+            Currency symbol to the ``Noun`` of its unit and of its hundredth.
+        tables(Dict):
+            Word tables returned by ``tables()``, reused instead of being rebuilt.
+    """
+
+    def __init__(self, months: List[str] = months, currencies: Dict[str, tuple] = currencies, tables: Optional[Dict] = None):
+        self.months = months
+        self.currencies = currencies
+        if tables is None:
+            self._groups = {(gender, oblique): [self._group(n, gender, oblique) for n in range(1000)]
+                            for gender in ones for oblique in (False, True)}
+            self._ordinals = [self._ordinal(n) for n in range(100)]
+        else:
+            self._groups = {(gender, bool(oblique)): words for gender, cases in tables["groups"].items()
+                            for oblique, words in enumerate(cases)}
+            self._ordinals = tables["ordinals"]
+        symbols = re.escape("".join(currencies))
+        self._digits_regex = re.compile(DIGITS)
+        self._digit_run_regex = re.compile(DIGITS + "+")
+        self._start_regex = re.compile(f"{DIGITS[:-1]}\\-{symbols}]")
+        self._regex = re.compile(
+            rf"""(?:
+                (?P<date>(?P<first>{DIGITS}{{1,4}})(?P<separator>[/.\-])(?P<month>{DIGITS}{{1,2}})(?P=separator)(?P<last>{DIGITS}{{1,4}}))
+                |(?P<time>(?P<hour>{DIGITS}{{1,2}}):(?P<minute>{DIGITS}{{2}})(?::(?P<second>{DIGITS}{{2}}))?)
+                |(?P<sign>-)?
+                 (?:(?P<prefix>[{symbols}])\s?)?
+                 (?P<integer>{DIGITS}{{1,3}}(?:[,٬]{DIGITS}{{3}})+|{DIGITS}+)
+                 (?:[.٫](?P<fraction>{DIGITS}+))?
+                 (?:\s?(?P<suffix>[%٪{symbols}]))?
+            )(?!{DIGITS})""",
+            re.VERBOSE,
+        )
+
+    def tables(self) -> Dict:
+        """The words of the numbers below a thousand, by gender then case, and of the ordinals."""
+        return {
+            "groups": {gender: [self._groups[(gender, False)], self._groups[(gender, True)]] for gender in ones},
+            "ordinals": self._ordinals,
+        }
+
+    @staticmethod
+    def _group(n: int, gender: str, oblique: bool) -> str:
+        words = []
+        if n >= 100:
+            words.append(hundreds[n // 100])
+        n %= 100
+        if 0 < n < 13:
+            words.append(ones[gender][n])
+        elif 13 <= n < 20:
+            words.append(ones[gender][n - 10] + "َ " + teens_suffix[gender])
+        elif n >= 20:
+            words.append(f"{ones[gender][n % 10]} {_and(tens[n // 10])}" if n % 10 else tens[n // 10])
+        text = " ".join(words[:1] + [_and(word) for word in words[1:]])
+        return _oblique(text) if oblique else text
+
+    @staticmethod
+    def _ordinal(n: int) -> str:
+        if n <= 10:
+            return ordinals[n]
+        if n < 20:
+            return ("الْحَادِي" if n == 11 else ordinals[n - 10]) + " عَشَر"
+        if n % 10 == 0:
+            return ordinal_tens[n // 10]
+        unit = "الْحَادِي" if n % 10 == 1 else ordinals[n % 10]
+        return f"{unit} {AND}{ordinal_tens[n // 10]}"
+
+    def digits(self, text: str) -> str:
+        """Reads a string of digits one by one."""
+        return " ".join(ZERO if digit == "0" else ones["masculine"][int(digit)] for digit in text.translate(_ascii_digits))
+
+    def cardinal(self, n: int, feminine: bool = False, oblique: bool = False) -> str:
+        """The words of ``n``, agreeing with a counted noun of the given gender and in the
+        nominative or, with ``oblique``, the genitive/accusative case."""
+        if n == 0:
+            return ZERO
+        if n >= 1000 ** (len(scales) + 1):
+            return self.digits(str(n))
+        groups = self._groups[("feminine" if feminine else "masculine", oblique)]
+        if n < 1000:
+            return groups[n]
+        words = [groups[n % 1000]] if n % 1000 else []
+        n //= 1000
+        for scale in scales:
+            if not n:
+                break
+            if n % 1000:
+                words.append(self.count(n % 1000, scale, oblique))
+            n //= 1000
+        words.reverse()
+        return " ".join(words[:1] + [_and(word) for word in words[1:]])
+
+    def count(self, n: int, noun: Noun, oblique: bool = False) -> str:
+        """``n`` followed by ``noun`` in the form the number requires."""
+        if n == 1:
+            return noun.singular
+        if n == 2:
+            return _oblique(noun.dual) if oblique else noun.dual
+        words = self.cardinal(n, noun.feminine, oblique)
+        rest = n % 100
+        if 3 <= rest <= 10:
+            return f"{words} {noun.plural}"
+        if 11 <= rest <= 99:
+            return f"{words} {noun.accusative}"
+        return f"{words} {noun.singular}"
+
+    def ordinal(self, n: int) -> str:
+        """The definite masculine ordinal of ``n``, the definite cardinal from 100 on (الْمِئَة)."""
+        return self._ordinals[n] if 0 < n < 100 else _definite(self.cardinal(n))
+
+    def number(self, integer: str, fraction: Optional[str] = None) -> str:
+        """Reads an integer string and an optional decimal fraction."""
+        integer = integer.translate(_ascii_digits).replace(",", "").replace("٬", "")
+        words = self.digits(integer) if len(integer) > 1 and integer.startswith("0") else self.cardinal(int(integer))
+        if fraction is None:
+            return words
+        fraction = fraction.translate(_ascii_digits)
+        if len(fraction) > 2:
+            return f"{words} {POINT} {self.digits(fraction)}"
+        significant = fraction.lstrip("0")
+        zeros = [ZERO] * (len(fraction) - len(significant))
+        return " ".join([words, POINT] + zeros + ([self.cardinal(int(significant))] if significant else []))
+
+    def _date(self, match: re.Match) -> Optional[str]:
+        first, month, last = (_int(match.group(name)) for name in ("first", "month", "last"))
+        day, year = (last, first) if len(match.group("first")) > 2 else (first, last)
+        if not (1 <= day <= 31 and 1 <= month <= 12):
+            return None
+        return f"{self.ordinal(day)} {OF} {self.months[month]} {YEAR} {self.cardinal(year, oblique=True)}"
+
+    def _time(self, match: re.Match) -> Optional[str]:
+        hour, minutes = _int(match.group("hour")), _int(match.group("minute"))
+        seconds = _int(match.group("second")) if match.group("second") else 0
+        if hour > 24 or minutes > 59 or seconds > 59:
+            return None
+        # Not repeated after a written "الساعة".
+        preceding = match.string[max(0, match.start() - 16):match.start()].rstrip().translate(_strip_diacritics)
+        words = [self.cardinal(hour) if preceding.endswith("ساعة") else f"{HOUR} {self.cardinal(hour)}"]
+        if minutes:
+            words.append(_and(self.count(minutes, minute)))
+        if seconds:
+            words.append(_and(self.count(seconds, second)))
+        return " ".join(words)
+
+    @staticmethod
+    def _article(text: str, start: int) -> str:
+        for article in articles:
+            if text.endswith(article, 0, start):
+                begin = start - len(article)
+                if not begin or not text[begin - 1].isalnum():
+                    return article
+        return ""
+
+    def _amount(self, match: re.Match) -> Tuple[int, str]:
+        integer, fraction = match.group("integer"), match.group("fraction")
+        symbol = match.group("prefix") or match.group("suffix")
+        article = "" if fraction or symbol or match.group("sign") else self._article(match.string, match.start())
+        if article:
+            words = self.ordinal(_int(integer))
+            return match.start() - len(article), _and(words) if article.startswith("و") else words
+        words = []
+        if match.group("sign"):
+            words.append(NEGATIVE)
+        if symbol in self.currencies:
+            unit, hundredth = self.currencies[symbol]
+            value = _int(integer)
+            if fraction is not None and len(fraction) == 2:
+                cents = _int(fraction)
+                parts = [self.count(value, unit)] if value or not cents else []
+                if cents:
+                    parts.append(self.count(cents, hundredth))
+                words.append(" ".join(parts[:1] + [_and(part) for part in parts[1:]]))
+            elif fraction is None:
+                words.append(self.count(value, unit))
+            else:
+                words.append(f"{self.number(integer, fraction)} {unit.singular}")
+        else:
+            words.append(self.number(integer, fraction))
+            if symbol:
+                words.append(PERCENT)
+        return match.start(), " ".join(words)
+
+    def _expand(self, match: re.Match) -> Tuple[int, str]:
+        """The words of a token and where they start, before the token when it has an article."""
+        start = match.start()
+        if match.group("date"):
+            words = self._date(match)
+        elif match.group("time"):
+            words = self._time(match)
+        else:
+            start, words = self._amount(match)
+        if words is None:
+            # An impossible date or time, its numbers are read one after the other.
+            words = " ".join(self.number(part) for part in self._digit_run_regex.findall(match.group()))
+        return start, words
+
+    def verbalize(self, text: str) -> str:
+        """Replaces the numbers of ``text`` with words, separated from adjacent text by a space."""
+        if self._digits_regex.search(text) is None:
+            return text
+        pieces, position = [], 0
+        candidate = self._start_regex.search(text)
+        while candidate is not None:
+            match = self._regex.match(text, candidate.start())
+            if match is None or (match.group("sign") and match.start() and text[match.start() - 1].isalnum()):
+                # Not a number, or a dash between words rather than a minus sign.
+                candidate = self._start_regex.search(text, candidate.start() + 1)
+                continue
+            start, words = self._expand(match)
+            end = match.end()
+            pieces.append(text[position:start])
+            if start and text[start - 1].isalnum():
+                pieces.append(" ")
+            pieces.append(words)
+            if end < len(text) and text[end].isalnum():
+                pieces.append(" ")
+            position = end
+            candidate = self._start_regex.search(text, position)
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+    __call__ = verbalize
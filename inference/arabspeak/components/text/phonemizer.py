@@ -1,11 +1,22 @@
 from typing import Dict, List
 
+# Joins a batch into one string so it can be translated in a single call.
+_BATCH_SEPARATOR = "\x00"
+
 class Phonemizer:
     def __init__(self,
                  char_to_phonem: Dict[str, str],):
 
         self._char_to_phonem = char_to_phonem.copy()
         self._phonem_to_char = {v: k for k, v in char_to_phonem.items()}
+        # Text is transliterated one character at a time, so only single-character keys can ever
+        # match; their values may be of any length.
+        self._to_buckwalter_table = str.maketrans(
+            {k: v for k, v in self._char_to_phonem.items() if len(k) == 1})
+        self._to_arabic_table = str.maketrans(
+            {k: v for k, v in self._phonem_to_char.items() if len(k) == 1})
+        self._batch_safe = not any(
+            _BATCH_SEPARATOR in k or _BATCH_SEPARATOR in v for k, v in self._char_to_phonem.items())
 
     def arabic_to_buckwalter(self, text: str) -> str:
         """
@@ -15,13 +26,7 @@ class Phonemizer:
         returns:
             str: The Buckwalter transliteration of the input text.
         """
-        buckwalter_text = ""
-        for char in text:
-            if char in self._char_to_phonem:
-                buckwalter_text += self._char_to_phonem[char]
-            else:
-                buckwalter_text += char
-        return buckwalter_text
+        return text.translate(self._to_buckwalter_table)
     
     def buckwalter_to_arabic(self, text: str) -> str:
         """
@@ -31,13 +36,7 @@ class Phonemizer:
         returns:
             str: The Arabic text corresponding to the input Buckwalter transliteration.
         """
-        arabic_text = ""
-        for char in text:
-            if char in self._phonem_to_char:
-                arabic_text += self._phonem_to_char[char]
-            else:
-                arabic_text += char
-        return arabic_text
+        return text.translate(self._to_arabic_table)
 
     def phonemize(self, text: str) -> str:
         """
@@ -58,8 +57,12 @@ class Phonemizer:
         returns:
             List[List[str]]: A list of lists of phonemes corresponding to the input texts.
         """
-        phonemized_texts = [self.phonemize(text) for text in texts]
-        return phonemized_texts
+        if not texts:
+            return []
+        if not self._batch_safe or any(_BATCH_SEPARATOR in text for text in texts):
+            return [self.phonemize(text) for text in texts]
+        joined = _BATCH_SEPARATOR.join(texts)
+        return self.phonemize(joined).split(_BATCH_SEPARATOR)
 
     @staticmethod
     def init_from_config(config: Dict) -> "Phonemizer":
@@ -0,0 +1,74 @@
+import abc
+import bisect
+import threading
+from typing import Dict, List, Sequence
+
+
+class StageSink(abc.ABC):
+    """Receives the duration of each front-end stage.
+
+    Subclass it to forward timings to a metrics backend. ``record`` is called on the
+    thread that ran the stage, so implementations must be thread-safe.
+    """
+
+    @abc.abstractmethod
+    def record(self, stage: str, seconds: float):
+        """Records that ``stage`` took ``seconds``."""
+
+
+# Histogram bucket upper bounds in seconds, from 1us to 10s.
+DEFAULT_BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 1) for m in (1, 2.5, 5)) + (10.0,)
+
+
+class HistogramSink(StageSink):
+    """Keeps per-stage call counters, total time and a fixed-bucket latency histogram."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = list(buckets)
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._totals: Dict[str, float] = {}
+        self._histograms: Dict[str, List[int]] = {}
+
+    def record(self, stage: str, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            if stage not in self._counts:
+                self._counts[stage] = 0
+                self._totals[stage] = 0.0
+                self._histograms[stage] = [0] * (len(self.buckets) + 1)
+            self._counts[stage] += 1
+            self._totals[stage] += seconds
+            self._histograms[stage][index] += 1
+
+    def quantile(self, stage: str, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile of a stage."""
+        histogram = self._histograms[stage]
+        target = q * self._counts[stage]
+        seen = 0
+        for index, count in enumerate(histogram):
+            seen += count
+            if seen >= target and count:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, total and mean seconds and approximate p50/p95/p99 of every stage."""
+        with self._lock:
+            return {
+                stage: {
+                    "count": count,
+                    "total": self._totals[stage],
+                    "mean": self._totals[stage] / count,
+                    "p50": self.quantile(stage, 0.50),
+                    "p95": self.quantile(stage, 0.95),
+                    "p99": self.quantile(stage, 0.99),
+                }
+                for stage, count in self._counts.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._totals.clear()
+            self._histograms.clear()
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+
+class TokenCache:
+    """Persistent cache of token IDs backed by a sqlite database.
+
+    Entries are keyed by the tokenizer config fingerprint and a hash of the cleaned text, so
+    a cache built for one tokenizer is never used by another. The database runs in WAL mode
+    and every process/thread opens its own connection, so several workers can read and write
+    the same file concurrently.
+
+    Args:
+        path(str):
+            The database file. Parent directories are created if needed.
+        timeout(float):
+            Seconds to wait for a lock held by another process.
+    """
+
+    def __init__(self, path: Union[str, Path], timeout: float = 30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross fork or thread boundaries.
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tokens ("
+                "fingerprint TEXT NOT NULL, text_hash BLOB NOT NULL, ids BLOB NOT NULL, "
+                "PRIMARY KEY (fingerprint, text_hash)) WITHOUT ROWID"
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def text_hash(text: str) -> bytes:
+        return hashlib.sha1(text.encode("utf-8")).digest()
+
+    def get(self, fingerprint: str, text: str) -> Optional[np.ndarray]:
+        """Returns the cached token IDs of a cleaned text, or ``None``."""
+        row = self._connection().execute(
+            "SELECT ids FROM tokens WHERE fingerprint = ? AND text_hash = ?",
+            (fingerprint, self.text_hash(text)),
+        ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.int64)
+
+    def put(self, fingerprint: str, text: str, token_ids: np.ndarray):
+        self.put_many(fingerprint, [(text, token_ids)])
+
+    def put_many(self, fingerprint: str, items: Iterable[Tuple[str, np.ndarray]]):
+        """Stores several entries in a single transaction."""
+        rows = [
+            (fingerprint, self.text_hash(text), np.asarray(token_ids, dtype=np.int64).tobytes())
+            for text, token_ids in items
+        ]
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN")
+            connection.executemany("INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)", rows)
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+
+    def clear(self, fingerprint: Optional[str] = None):
+        """Removes all entries, or only those of one tokenizer fingerprint."""
+        connection = self._connection()
+        if fingerprint is None:
+            connection.execute("DELETE FROM tokens")
+        else:
+            connection.execute("DELETE FROM tokens WHERE fingerprint = ?", (fingerprint,))
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            connection.close()
+        self._local = threading.local()
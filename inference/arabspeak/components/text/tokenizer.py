@@ -1,7 +1,43 @@
-from typing import Callable, Dict, List, Union
-from arabic_phonemizer import ArabicPhonemizer
+import hashlib
+import json
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Set, Union
+import numpy as np
 from .characters import Characters
-from .cleaners import clean_text
+from .cleaners import TextCleaner, clean_text, default_cleaner
+from .profiling import StageSink
+
+if TYPE_CHECKING:
+    from .token_cache import TokenCache
+
+
+# Bumped whenever the compiled tokenizer artifact changes shape.
+COMPILED_FORMAT_VERSION = 3
+# Encoding and dtype used to read the translated IDs back, by the largest ID.
+ID_ENCODINGS = {"latin-1": ("latin-1", np.uint8), "utf-32-le": ("utf-32-le", np.uint32)}
+
+
+class _IdTranslationTable(dict):
+    """Translation table that deletes unknown characters and records them."""
+
+    def __init__(self, table: Dict[int, str], unknown_characters: Set[str]):
+        super().__init__(table)
+        self.unknown_characters = unknown_characters
+
+    def __missing__(self, codepoint: int):
+        self.unknown_characters.add(chr(codepoint))
+        return None
+
+
+class EncodedBatch(NamedTuple):
+    tokens: np.ndarray
+    """``[batch, width]`` ``int64`` token IDs padded with the pad ID."""
+    lengths: np.ndarray
+    """``[batch]`` ``int64`` unpadded length of each row."""
+    attention_mask: Optional[np.ndarray] = None
+    """``[batch, width]`` boolean mask, ``True`` on real tokens."""
+    inverse_permutation: Optional[np.ndarray] = None
+    """When sorted by length, row ``inverse_permutation[i]`` holds input text ``i``."""
 
 
 class Tokenizer:
@@ -11,13 +47,33 @@ class Tokenizer:
         characters: "Characters" = None,
         add_blank: bool = False,
         use_eos_bos: bool=False,
+        token_cache: Optional["TokenCache"] = None,
+        stage_sink: Optional[StageSink] = None,
     ):
         self.text_cleaner = text_cleaner
         self.add_blank = add_blank
         self.use_eos_bos = use_eos_bos
         self.characters = characters
         self.not_found_characters = []
-        self.phonemizer = ArabicPhonemizer()
+        self.unknown_characters = set()
+        self._id_table = None
+        self._fingerprint = None
+        self._fingerprint_state = None
+        self.token_cache = token_cache
+        self.stage_sink = stage_sink
+        self._phonemizer = None
+
+    @property
+    def phonemizer(self):
+        """The ``ArabicPhonemizer``, imported and created on first use to keep startup cheap."""
+        if self._phonemizer is None:
+            from arabic_phonemizer import ArabicPhonemizer
+            self._phonemizer = ArabicPhonemizer()
+        return self._phonemizer
+
+    @phonemizer.setter
+    def phonemizer(self, phonemizer):
+        self._phonemizer = phonemizer
 
     def encode(self, text: str) -> List[int]:  # pylint: disable=unused-argument
         """Converts a string of text to a sequence of token IDs as follows:
@@ -27,6 +83,8 @@ class Tokenizer:
         4. Add BOS and EOS characters if specified
         5. Text to token IDs
 
+        If a ``stage_sink`` is set, the duration of each step is recorded to it.
+
         Args:
             text(str):
                 The text to convert to token IDs.
@@ -34,16 +92,33 @@ class Tokenizer:
             token_ids(List[int]):
                 The token IDs of the text.
         """
+        sink = self.stage_sink
+        start = time.perf_counter() if sink else 0.0
         if self.text_cleaner is not None:
             text = self.text_cleaner(text)
+            if sink:
+                start = self._record("clean", start)
         text = self.phonemizer.phonemize(text)
+        if sink:
+            start = self._record("phonemize", start)
         text = self.text_to_ids(text)
+        if sink:
+            start = self._record("text_to_ids", start)
         if self.add_blank:
             text = self.intersperse_blank_char(text)
+            if sink:
+                start = self._record("intersperse_blank", start)
         if self.use_eos_bos:
             text = self.pad_with_bos_eos(text)
+            if sink:
+                start = self._record("pad_bos_eos", start)
         return text
 
+    def _record(self, stage: str, start: float) -> float:
+        now = time.perf_counter()
+        self.stage_sink.record(stage, now - start)
+        return now
+
     def text_to_ids(self, text: str) -> List[int]:
         """Encodes a string of text to a sequence of IDs."""
         token_ids = []
@@ -59,8 +134,147 @@ class Tokenizer:
                     print(f" [!] Character {repr(char)} not found in the vocabulary. Discarding it.")
         return token_ids
 
+    def encode_array(self, text: str) -> np.ndarray:
+        """Fast variant of ``encode`` that returns an ``int64`` array ready for the ONNX session.
+
+        Characters are mapped through ``Characters.id_translation_table`` in one pass, unknown
+        characters are recorded in ``unknown_characters`` instead of being printed, and the blank
+        and BOS/EOS tokens are written into a single preallocated array. If a ``token_cache``
+        is set, the result is looked up by cleaned text before phonemizing.
+
+        Args:
+            text(str):
+                The text to convert to token IDs.
+        returns:
+            token_ids(np.ndarray):
+                The token IDs of the text.
+        """
+        sink = self.stage_sink
+        start = time.perf_counter() if sink else 0.0
+        if self.text_cleaner is not None:
+            text = self.text_cleaner(text)
+            if sink:
+                self._record("clean", start)
+        if self.token_cache is None:
+            return self.encode_cleaned_array(text)
+        start = time.perf_counter() if sink else 0.0
+        fingerprint = self.fingerprint
+        token_ids = self.token_cache.get(fingerprint, text)
+        if sink:
+            self._record("token_cache", start)
+        if token_ids is None:
+            token_ids = self.encode_cleaned_array(text)
+            self.token_cache.put(fingerprint, text, token_ids)
+        return token_ids
+
+    def encode_cleaned_array(self, text: str) -> np.ndarray:
+        """Runs ``encode_array`` on already cleaned text, bypassing the token cache."""
+        sink = self.stage_sink
+        start = time.perf_counter() if sink else 0.0
+        text = self.phonemizer.phonemize(text)
+        if sink:
+            start = self._record("phonemize", start)
+        ids = self.text_to_id_array(text)
+        if sink:
+            start = self._record("text_to_ids", start)
+        offset = 1 if self.use_eos_bos else 0
+        length = 2 * ids.size + 1 if self.add_blank else ids.size
+        token_ids = np.empty(length + 2 * offset, dtype=np.int64)
+        if self.use_eos_bos:
+            token_ids[0] = self.characters.bos_id
+            token_ids[-1] = self.characters.eos_id
+        body = token_ids[offset:offset + length]
+        if self.add_blank:
+            body[0::2] = self.characters.blank_id
+            body[1::2] = ids
+        else:
+            body[:] = ids
+        if sink:
+            self._record("add_special_tokens", start)
+        return token_ids
+
+    def encode_batch(
+        self,
+        texts: List[str],
+        pad_to_multiple_of: Optional[int] = None,
+        max_length: Optional[int] = None,
+        return_attention_mask: bool = False,
+        sort_by_length: bool = False,
+    ) -> EncodedBatch:
+        """Encodes a list of texts into one padded ``int64`` matrix.
+
+        Args:
+            texts(List[str]):
+                The texts to encode.
+            pad_to_multiple_of(int):
+                If set, the padded width is rounded up to a multiple of this value.
+            max_length(int):
+                If set, sequences longer than this are truncated.
+            return_attention_mask(bool):
+                Whether to also return a boolean mask of the real tokens.
+            sort_by_length(bool):
+                Whether to sort the rows by decreasing length. The permutation needed to
+                restore the input order is returned as ``inverse_permutation``.
+        returns:
+            batch(EncodedBatch):
+                The padded tokens, lengths and the optional mask and inverse permutation.
+        """
+        sequences = [self.encode_array(text) for text in texts]
+        if max_length is not None:
+            sequences = [seq[:max_length] for seq in sequences]
+        return self.pad_batch(sequences, pad_to_multiple_of, return_attention_mask, sort_by_length)
+
+    def pad_batch(
+        self,
+        sequences: List[np.ndarray],
+        pad_to_multiple_of: Optional[int] = None,
+        return_attention_mask: bool = False,
+        sort_by_length: bool = False,
+    ) -> EncodedBatch:
+        """Pads already encoded sequences into an ``EncodedBatch``. See ``encode_batch``."""
+        lengths = np.fromiter((len(seq) for seq in sequences), dtype=np.int64, count=len(sequences))
+        inverse_permutation = None
+        if sort_by_length:
+            order = np.argsort(-lengths, kind="stable")
+            inverse_permutation = np.argsort(order)
+            sequences = [sequences[i] for i in order]
+            lengths = lengths[order]
+        width = int(lengths.max()) if lengths.size else 0
+        if pad_to_multiple_of:
+            width = -(-width // pad_to_multiple_of) * pad_to_multiple_of
+        mask = np.arange(width) < lengths[:, None]
+        tokens = np.full(mask.shape, self.characters.pad_id, dtype=np.int64)
+        if sequences:
+            tokens[mask] = np.concatenate(sequences)
+        return EncodedBatch(
+            tokens=tokens,
+            lengths=lengths,
+            attention_mask=mask if return_attention_mask else None,
+            inverse_permutation=inverse_permutation,
+        )
+
+    def text_to_id_array(self, text: str) -> np.ndarray:
+        """Encodes a string of text to an ``int64`` array of IDs, discarding unknown characters."""
+        if self._id_table is None:
+            table = self.characters.id_translation_table
+            self._id_table = _IdTranslationTable(table, self.unknown_characters)
+            # IDs below 256 fit in one byte per character
+            if max(map(ord, table.values()), default=0) < 256:
+                self._id_encoding = ID_ENCODINGS["latin-1"]
+            else:
+                self._id_encoding = ID_ENCODINGS["utf-32-le"]
+        encoding, dtype = self._id_encoding
+        translated = text.translate(self._id_table)
+        return np.frombuffer(translated.encode(encoding), dtype=dtype).astype(np.int64)
+
     def pad_with_bos_eos(self, char_sequence: List[str]):
         """Pads a sequence with the special BOS and EOS characters."""
+        if isinstance(char_sequence, np.ndarray):
+            result = np.empty(char_sequence.size + 2, dtype=np.int64)
+            result[0] = self.characters.bos_id
+            result[1:-1] = char_sequence
+            result[-1] = self.characters.eos_id
+            return result
         return [self.characters.bos_id] + list(char_sequence) + [self.characters.eos_id]
 
     def intersperse_blank_char(self, char_sequence: List[str]):
@@ -69,10 +283,100 @@ class Tokenizer:
         Use the ```blank``` character if defined else use the ```pad``` character.
         """
         char_to_use = self.characters.blank_id 
+        if isinstance(char_sequence, np.ndarray):
+            result = np.full(char_sequence.size * 2 + 1, char_to_use, dtype=np.int64)
+            result[1::2] = char_sequence
+            return result
         result = [char_to_use] * (len(char_sequence) * 2 + 1)
         result[1::2] = char_sequence
         return result
 
+    def to_config(self) -> Dict:
+        return {
+            "add_blank": self.add_blank,
+            "use_eos_bos": self.use_eos_bos,
+            "characters": self.characters.to_config(),
+        }
+
+    @property
+    def fingerprint(self) -> str:
+        """A hash of the tokenizer config, used to key caches of encoded text."""
+        state = (self.add_blank, self.use_eos_bos, id(self.characters))
+        if state == self._fingerprint_state:
+            return self._fingerprint
+        config = json.dumps(self.to_config(), sort_keys=True, ensure_ascii=False)
+        self._fingerprint = hashlib.sha1(config.encode("utf-8")).hexdigest()
+        self._fingerprint_state = state
+        return self._fingerprint
+
+    def compile(self) -> "Tokenizer":
+        """Builds the lazily computed lookup tables and the fingerprint up front."""
+        self.text_to_id_array("")
+        self.fingerprint
+        return self
+
+    def save_compiled(self, path: str, source_fingerprint: Optional[str] = None):
+        """Writes a compiled tokenizer artifact.
+
+        The artifact is plain JSON holding the vocabulary, the ID translation table, the
+        fingerprint and the cleaner tables (``TextCleaner.to_config``), so ``load_compiled``
+        builds the tokenizer from them without hashing the config or spelling out the number
+        words of the verbalizer. It holds data only: loading it never runs code from the file.
+
+        Args:
+            path:
+                The artifact path.
+            source_fingerprint:
+                The SHA-1 of the ``tokenizer_config.json`` compiled, checked by ``load_compiled``.
+        """
+        if self.text_cleaner is None or isinstance(self.text_cleaner, TextCleaner):
+            cleaner = self.text_cleaner
+        elif self.text_cleaner is clean_text:
+            cleaner = default_cleaner()
+        else:
+            raise ValueError(f"Cannot compile the text cleaner {self.text_cleaner!r}, expected a TextCleaner.")
+        self.compile()
+        artifact = {
+            "version": COMPILED_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "source_fingerprint": source_fingerprint,
+            "config": self.to_config(),
+            "id_table": {"chars": "".join(map(chr, self._id_table)), "ids": "".join(self._id_table.values())},
+            "id_encoding": self._id_encoding[0],
+            "cleaner": cleaner.to_config() if cleaner is not None else None,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, ensure_ascii=False)
+
+    @staticmethod
+    def load_compiled(path: str, source_fingerprint: Optional[str] = None) -> "Tokenizer":
+        """Loads an artifact written by ``save_compiled``.
+
+        Raises:
+            ValueError: If the artifact was written by an incompatible version, or from a config
+                other than the one of ``source_fingerprint`` when it is given.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            artifact = json.load(f)
+        if not isinstance(artifact, dict) or artifact.get("version") != COMPILED_FORMAT_VERSION:
+            raise ValueError(f"{path} is not a compiled tokenizer of format version {COMPILED_FORMAT_VERSION}.")
+        if source_fingerprint is not None and artifact["source_fingerprint"] != source_fingerprint:
+            raise ValueError(f"{path} was compiled from another tokenizer config.")
+        config = artifact["config"]
+        cleaner = artifact["cleaner"]
+        tokenizer = Tokenizer(
+            text_cleaner=TextCleaner.init_from_config(cleaner) if cleaner is not None else None,
+            characters=Characters(**config["characters"]),
+            add_blank=config["add_blank"],
+            use_eos_bos=config["use_eos_bos"],
+        )
+        tokenizer._fingerprint = artifact["fingerprint"]
+        tokenizer._fingerprint_state = (tokenizer.add_blank, tokenizer.use_eos_bos, id(tokenizer.characters))
+        id_table = artifact["id_table"]
+        tokenizer._id_table = _IdTranslationTable(str.maketrans(id_table["chars"], id_table["ids"]), tokenizer.unknown_characters)
+        tokenizer._id_encoding = ID_ENCODINGS[artifact["id_encoding"]]
+        return tokenizer
+
     @staticmethod
     def init_from_config(config: dict):
         """Init Tokenizer object from config
@@ -0,0 +1,249 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .benchmark import benchmark_synthesizer, peak_rss_mb
+from .synthesizer import MODEL_FILE, Synthesizer
+
+# 10 / ln(10) * sqrt(2), the usual mel-cepstral distance scaling to dB.
+MCD_SCALE = 10.0 / np.log(10.0) * np.sqrt(2.0)
+
+
+class Variant(NamedTuple):
+    name: str
+    export_path: str
+    model_file: str
+
+
+def parse_variant(spec: str) -> Variant:
+    """Parses ``[name=]path``, where ``path`` is an export directory or an ``.onnx`` file inside one.
+
+    The name defaults to the directory name for a directory and to ``directory/file`` for a model file.
+    """
+    name, _, path = spec.rpartition("=")
+    path = Path(path)
+    if path.suffix in (".onnx", ".ort"):
+        return Variant(name or f"{path.parent.name}/{path.name}", str(path.parent), path.name)
+    return Variant(name or path.name, str(path), MODEL_FILE)
+
+
+def model_size_bytes(model_path) -> int:
+    """Size of a model file plus the external data files its initializers are stored in.
+
+    ``.ort`` files hold all their weights.
+    """
+    model_path = Path(model_path)
+    size = os.path.getsize(model_path)
+    if model_path.suffix != ".onnx":
+        return size
+    import onnx
+
+    graph = onnx.load(str(model_path), load_external_data=False).graph
+    locations = {entry.value for tensor in graph.initializer if tensor.data_location == onnx.TensorProto.EXTERNAL
+                 for entry in tensor.external_data if entry.key == "location"}
+    return size + sum(os.path.getsize(model_path.parent / location) for location in locations)
+
+
+def mel_filterbank(sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+    """Triangular filters on the HTK mel scale, ``[n_mels, n_fft // 2 + 1]``."""
+    def to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    edges = to_hz(np.linspace(0.0, to_mel(sample_rate / 2), n_mels + 2))
+    bins = np.linspace(0.0, sample_rate / 2, n_fft // 2 + 1)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / np.maximum(center - lower, 1e-10)
+    falling = (upper - bins) / np.maximum(upper - center, 1e-10)
+    return np.maximum(0.0, np.minimum(rising, falling))
+
+
+def mel_cepstrum(wav: np.ndarray, sample_rate: int, n_fft: int = 1024, hop_length: int = 256,
+                 n_mels: int = 80, n_coefficients: int = 13) -> np.ndarray:
+    """Mel cepstral coefficients ``c1..cN`` of each frame, ``[frames, n_coefficients]``.
+
+    ``c0`` (the frame energy) is left out, as usual for mel-cepstral distance.
+    """
+    wav = np.asarray(wav, dtype=np.float64)
+    wav = np.pad(wav, (n_fft // 2, n_fft // 2 + max(0, n_fft - wav.size)))
+    num_frames = 1 + (wav.size - n_fft) // hop_length
+    frames = np.lib.stride_tricks.sliding_window_view(wav, n_fft)[::hop_length][:num_frames]
+    magnitude = np.abs(np.fft.rfft(frames * np.hanning(n_fft), axis=1))
+    log_mel = np.log(np.maximum(magnitude @ mel_filterbank(sample_rate, n_fft, n_mels).T, 1e-10))
+    k = np.arange(1, n_coefficients + 1)[:, None]
+    dct = np.sqrt(2.0 / n_mels) * np.cos(np.pi / n_mels * (np.arange(n_mels) + 0.5) * k)
+    return log_mel @ dct.T
+
+
+def dtw_mean_cost(cost: np.ndarray) -> float:
+    """Mean cost along the dynamic time warping path through a ``[n, m]`` cost matrix.
+
+    The recursion is vectorized over anti-diagonals, whose cells only depend on the two
+    previous ones.
+    """
+    n, m = cost.shape
+    acc = np.full((n + 1, m + 1), np.inf)
+    steps = np.zeros((n + 1, m + 1))
+    acc[0, 0] = 0.0
+    for d in range(2, n + m + 1):
+        i = np.arange(max(1, d - m), min(n, d - 1) + 1)
+        j = d - i
+        candidates = np.stack([acc[i - 1, j - 1], acc[i - 1, j], acc[i, j - 1]])
+        choice = candidates.argmin(axis=0)
+        cells = np.arange(i.size)
+        acc[i, j] = candidates[choice, cells] + cost[i - 1, j - 1]
+        steps[i, j] = np.stack([steps[i - 1, j - 1], steps[i - 1, j], steps[i, j - 1]])[choice, cells] + 1
+    return float(acc[n, m] / steps[n, m])
+
+
+def mel_cepstral_distance(reference: np.ndarray, candidate: np.ndarray, sample_rate: int) -> float:
+    """Mel-cepstral distance in dB between two waveforms, frames aligned with DTW.
+
+    Aligning the frames keeps the distance meaningful between models that speak at slightly
+    different rates; the rate itself is reported separately as a duration delta. The cost
+    matrix is filled one reference frame at a time, so the memory used is that of the
+    ``[n, m]`` matrix DTW needs anyway.
+    """
+    ref = mel_cepstrum(reference, sample_rate)
+    cand = mel_cepstrum(candidate, sample_rate)
+    cost = np.empty((ref.shape[0], cand.shape[0]))
+    for i, frame in enumerate(ref):
+        cost[i] = np.sqrt(((cand - frame) ** 2).sum(axis=-1))
+    return dtw_mean_cost(MCD_SCALE * cost)
+
+
+def measure_variant(variant: Variant, texts: List[str], repeats: int = 3, batch_size: int = 1,
+                    **synthesizer_kwargs) -> Tuple[Dict, List[np.ndarray]]:
+    """Loads a variant, times it with ``benchmark_synthesizer`` and synthesizes each text once.
+
+    Noise is disabled so the waveforms are deterministic and comparable between variants.
+
+    returns:
+        The measurements and the waveform of each text.
+    """
+    synthesizer_kwargs = {"noise_scale": 0.0, "noise_scale_w": 0.0, **synthesizer_kwargs}
+    start = time.perf_counter()
+    synthesizer = Synthesizer.init_from_path(variant.export_path, model_file=variant.model_file, **synthesizer_kwargs)
+    load_sec = time.perf_counter() - start
+    speed = benchmark_synthesizer(synthesizer, texts, batch_size=batch_size, repeats=repeats)
+    wavs = [synthesizer.synthesize(text) for text in texts]
+    result = {
+        "export_path": variant.export_path,
+        "model_file": variant.model_file,
+        "size_bytes": model_size_bytes(Path(variant.export_path) / variant.model_file),
+        "load_sec": load_sec,
+        "rtf": speed["rtf"],
+        "latency_ms": speed["latency_ms"],
+        "audio_sec": sum(wav.size for wav in wavs) / synthesizer.sample_rate,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return result, wavs
+
+
+def compare_variant(reference: List[np.ndarray], wavs: List[np.ndarray], sample_rate: int) -> Dict:
+    """Mel-cepstral distances and relative duration deltas of ``wavs`` against the reference waveforms."""
+    mcd = [mel_cepstral_distance(ref, wav, sample_rate) for ref, wav in zip(reference, wavs)]
+    deltas = [(wav.size - ref.size) / ref.size if ref.size else 0.0 for ref, wav in zip(reference, wavs)]
+    return {
+        "mcd_db": {"mean": float(np.mean(mcd)), "max": float(np.max(mcd))},
+        "duration_delta": {"mean_abs": float(np.mean(np.abs(deltas))), "max_abs": float(np.max(np.abs(deltas))),
+                           "total": sum(wav.size for wav in wavs) / max(1, sum(ref.size for ref in reference)) - 1},
+    }
+
+
+def run_evaluation(
+    variants: Sequence[Variant],
+    texts: List[str],
+    reference: Optional[str] = None,
+    max_mcd_db: float = 6.0,
+    max_duration_delta: float = 0.1,
+    repeats: int = 3,
+    batch_size: int = 1,
+    isolate: bool = True,
+    **synthesizer_kwargs,
+) -> Dict:
+    """Measures speed, memory and quality of every variant against a reference variant.
+
+    A variant passes when its mean mel-cepstral distance to the reference is at most
+    ``max_mcd_db`` and no text's duration differs by more than ``max_duration_delta``
+    (relative). ``selected`` is the smallest passing variant, the faster one on ties.
+
+    Args:
+        variants:
+            The variants to compare, see ``parse_variant``.
+        texts:
+            The evaluation sentences, e.g. the test sentences of the training config.
+        reference:
+            Name of the reference variant. Defaults to the first one.
+        repeats:
+            Timed passes over the texts per variant.
+        batch_size:
+            Texts per ``synthesize_batch`` call while timing.
+        isolate:
+            Run each variant in a fresh process, so ``peak_rss_mb`` is the variant's own
+            peak. Otherwise it is the peak of this process so far.
+        **synthesizer_kwargs:
+            Forwarded to ``Synthesizer.init_from_path``.
+    returns:
+        A JSON-serializable report.
+    """
+    if not texts:
+        raise ValueError("At least one text is needed to evaluate the variants.")
+    names = [variant.name for variant in variants]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Variant names must be unique, got {names}.")
+    reference = reference or names[0]
+    if reference not in names:
+        raise ValueError(f"Unknown reference variant {reference!r}, expected one of {names}.")
+
+    results, waveforms = {}, {}
+    for variant in variants:
+        print(f"> Evaluating {variant.name} ({Path(variant.export_path) / variant.model_file}).")
+        args = (variant, texts, repeats, batch_size)
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                results[variant.name], waveforms[variant.name] = executor.submit(measure_variant, *args, **synthesizer_kwargs).result()
+        else:
+            results[variant.name], waveforms[variant.name] = measure_variant(*args, **synthesizer_kwargs)
+
+    sample_rate = synthesizer_kwargs.get("sample_rate", 16000)
+    for name, result in results.items():
+        if name == reference:
+            continue
+        result.update(compare_variant(waveforms[reference], waveforms[name], sample_rate))
+        result["passed"] = bool(result["mcd_db"]["mean"] <= max_mcd_db
+                                and result["duration_delta"]["max_abs"] <= max_duration_delta)
+
+    candidates = [name for name, result in results.items() if result.get("passed", name == reference)]
+    selected = min(candidates, key=lambda name: (results[name]["size_bytes"], results[name]["rtf"]))
+    return {
+        "reference": reference,
+        "num_texts": len(texts),
+        "sample_rate": sample_rate,
+        "tolerance": {"max_mcd_db": max_mcd_db, "max_duration_delta": max_duration_delta},
+        "selected": selected,
+        "variants": results,
+    }
+
+
+def format_evaluation(report: Dict) -> str:
+    """Renders an evaluation report as a plain text table."""
+    lines = [f"{'variant':>20} {'size MB':>8} {'rtf':>7} {'p50 ms':>8} {'rss MB':>7} {'mcd dB':>7} {'dur %':>6} {'status':>6}"]
+    for name, r in report["variants"].items():
+        if name == report["reference"]:
+            mcd, duration, status = "-", "-", "ref"
+        else:
+            mcd = f"{r['mcd_db']['mean']:.2f}"
+            duration = f"{r['duration_delta']['max_abs'] * 100:.1f}"
+            status = "ok" if r["passed"] else "FAIL"
+        lines.append(f"{name:>20} {r['size_bytes'] / 2 ** 20:>8.2f} {r['rtf']:>7.3f} {r['latency_ms']['p50']:>8.1f} "
+                     f"{r['peak_rss_mb']:>7.0f} {mcd:>7} {duration:>6} {status:>6}")
+    lines.append(f"> Selected {report['selected']}: the smallest variant within the tolerance.")
+    return "\n".join(lines)
@@ -0,0 +1,89 @@
+import threading
+from typing import List, Sequence
+
+import numpy as np
+import onnxruntime as ort
+
+from .signature import ModelSignature
+
+
+class _Buffers:
+    """Per-thread input buffers and IO binding."""
+
+    def __init__(self, session: ort.InferenceSession):
+        self.binding = session.io_binding()
+        self.tokens = np.empty(0, dtype=np.int64)
+        self.lengths = np.empty(0, dtype=np.int64)
+
+
+class BoundSession:
+    """Runs a session through onnxruntime IO binding with reusable input buffers.
+
+    Token and length buffers are grown geometrically and reused across calls, so a worker
+    serving similar batch shapes stops allocating inputs after the first few requests. The
+    outputs are allocated by onnxruntime (their length depends on the predicted durations)
+    and returned without a copy. Buffers are kept per thread, so one instance can be shared by
+    the threads of a ``MicroBatcher``.
+
+    Args:
+        session(ort.InferenceSession):
+            The model session.
+        signature(ModelSignature):
+            The model signature, used to bind inputs and outputs by name.
+        pad_id(int):
+            The token ID written to padded positions.
+    """
+
+    def __init__(self, session: ort.InferenceSession, signature: ModelSignature, pad_id: int = 0):
+        self.session = session
+        self.signature = signature
+        self.pad_id = pad_id
+        self._local = threading.local()
+
+    def _buffers(self) -> _Buffers:
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = _Buffers(self.session)
+        return buffers
+
+    @staticmethod
+    def _view(buffer: np.ndarray, size: int) -> np.ndarray:
+        if buffer.size < size:
+            buffer = np.empty(max(size, 2 * buffer.size), dtype=buffer.dtype)
+        return buffer
+
+    def pad(self, sequences: Sequence[np.ndarray]):
+        """Pads sequences into this thread's reusable buffers.
+
+        returns:
+            tokens(np.ndarray):
+                ``[batch, width]`` view of the token buffer, valid until the next call on this thread.
+            lengths(np.ndarray):
+                ``[batch]`` view of the length buffer.
+        """
+        buffers = self._buffers()
+        batch_size = len(sequences)
+        buffers.lengths = self._view(buffers.lengths, batch_size)
+        lengths = buffers.lengths[:batch_size]
+        for i, seq in enumerate(sequences):
+            lengths[i] = len(seq)
+        width = int(lengths.max()) if batch_size else 0
+        buffers.tokens = self._view(buffers.tokens, batch_size * width)
+        # The first batch_size * width elements of the flat buffer form a contiguous [batch, width] array.
+        tokens = buffers.tokens[:batch_size * width].reshape(batch_size, width)
+        for row, seq in zip(tokens, sequences):
+            row[:len(seq)] = seq
+            row[len(seq):] = self.pad_id
+        return tokens, lengths
+
+    def run(self, tokens: np.ndarray, lengths: np.ndarray, scales: np.ndarray, output_names: Sequence[str]) -> List[np.ndarray]:
+        """Runs the model and returns the raw outputs without copying them."""
+        binding = self._buffers().binding
+        for name, value in self.signature.bind(tokens, lengths, scales).items():
+            binding.bind_cpu_input(name, value)
+        for name in output_names:
+            binding.bind_output(name, "cpu")
+        self.session.run_with_iobinding(binding)
+        outputs = [output.numpy() for output in binding.get_outputs()]
+        binding.clear_binding_outputs()
+        return outputs
@@ -0,0 +1,276 @@
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from .synthesizer import MODEL_FILE, Synthesizer, make_session_options
+
+EXTERNAL_MODEL_FILE = "model.external.onnx"
+# onnxruntime memory-maps external initializers whose offset is aligned to the allocation granularity.
+EXTERNAL_DATA_ALIGNMENT = 64 * 1024
+
+
+def externalize_model(
+    model_path: Union[str, Path],
+    output_path: Optional[Union[str, Path]] = None,
+    size_threshold: int = 1024,
+) -> Path:
+    """Rewrites a model so its weights live in an aligned external data file.
+
+    onnxruntime maps such a file into memory instead of copying the weights into each
+    session, so processes loading the same model share the pages through the OS cache.
+    The output is reused while it is newer than the input model.
+
+    Args:
+        model_path:
+            The source ``.onnx`` file.
+        output_path:
+            The rewritten model. Defaults to ``model.external.onnx`` next to the source. The
+            weights are written to the same path with a ``.data`` suffix.
+        size_threshold:
+            Initializers smaller than this many bytes stay inside the graph.
+    returns:
+        The path of the rewritten model.
+    """
+    import onnx
+    from onnx.external_data_helper import set_external_data
+
+    model_path = Path(model_path)
+    output_path = Path(output_path) if output_path else model_path.with_name(EXTERNAL_MODEL_FILE)
+    data_path = output_path.with_name(output_path.name + ".data")
+    if (output_path.exists() and data_path.exists()
+            and output_path.stat().st_mtime >= model_path.stat().st_mtime):
+        return output_path
+
+    model = onnx.load(str(model_path))
+    tmp_data_path = data_path.with_name(data_path.name + f".tmp{os.getpid()}")
+    with open(tmp_data_path, "wb") as f:
+        for tensor in model.graph.initializer:
+            if not tensor.HasField("raw_data") or len(tensor.raw_data) < size_threshold:
+                continue
+            offset = f.tell()
+            padding = -offset % EXTERNAL_DATA_ALIGNMENT
+            f.write(b"\0" * padding)
+            set_external_data(tensor, data_path.name, offset=offset + padding, length=len(tensor.raw_data))
+            f.write(tensor.raw_data)
+            tensor.data_location = onnx.TensorProto.EXTERNAL
+            tensor.ClearField("raw_data")
+    tmp_model_path = output_path.with_name(output_path.name + f".tmp{os.getpid()}")
+    onnx.save(model, str(tmp_model_path))
+    os.replace(tmp_data_path, data_path)
+    os.replace(tmp_model_path, output_path)
+    return output_path
+
+
+def _worker_main(export_path, model_file, session_config, synthesizer_kwargs, tasks, results):
+    try:
+        synthesizer = Synthesizer.init_from_path(
+            export_path,
+            model_file=model_file,
+            session_options=make_session_options(**session_config),
+            **synthesizer_kwargs,
+        )
+    except Exception as e:
+        results.put((None, None, _picklable(e)))
+        return
+    results.put((None, os.getpid(), None))
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        task_id, texts = task
+        try:
+            results.put((task_id, synthesizer.synthesize_batch(texts), None))
+        except Exception as e:
+            results.put((task_id, None, _picklable(e)))
+
+
+def _picklable(error: Exception) -> Exception:
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+class SynthesizerPool:
+    """Runs synthesis on several processes, each with its own onnxruntime session.
+
+    With ``share_weights`` the model is first rewritten with aligned external weights (see
+    ``externalize_model``) that every worker memory-maps, so ``N`` workers do not take ``N``
+    times the model size in RSS. Batches are put on a shared task queue that idle workers
+    pull from, and results come back on a result queue.
+
+    Args:
+        export_path:
+            The export directory containing ``model.onnx`` and ``tokenizer_config.json``.
+        num_workers:
+            Number of worker processes. Defaults to the number of CPUs.
+        intra_op_threads:
+            onnxruntime intra-op threads per worker. One thread per worker scales best when
+            there are as many workers as cores.
+        inter_op_threads:
+            onnxruntime inter-op threads per worker.
+        share_weights:
+            Memory-map the model weights so they are shared between workers.
+        start_method:
+            The multiprocessing start method. ``spawn`` is the default because onnxruntime
+            is not fork-safe once a session exists in the parent.
+        **synthesizer_kwargs:
+            Forwarded to ``Synthesizer.init_from_path`` in each worker.
+    """
+
+    def __init__(
+        self,
+        export_path: Union[str, Path],
+        num_workers: Optional[int] = None,
+        intra_op_threads: int = 1,
+        inter_op_threads: int = 1,
+        share_weights: bool = True,
+        start_method: str = "spawn",
+        **synthesizer_kwargs,
+    ):
+        self.export_path = Path(export_path)
+        self.num_workers = num_workers or os.cpu_count() or 1
+        model_file = MODEL_FILE
+        if share_weights:
+            model_file = externalize_model(self.export_path / MODEL_FILE).name
+        session_config = {
+            "intra_op_threads": intra_op_threads,
+            "inter_op_threads": inter_op_threads,
+            "share_weights": share_weights,
+        }
+        context = multiprocessing.get_context(start_method)
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._workers = [
+            context.Process(
+                target=_worker_main,
+                args=(str(self.export_path), model_file, session_config, synthesizer_kwargs, self._tasks, self._results),
+                daemon=True,
+            )
+            for _ in range(self.num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = False
+        self._error: Optional[Exception] = None
+        self._wait_until_ready()
+        self._collector = threading.Thread(target=self._collect, name="arabspeak-pool", daemon=True)
+        self._collector.start()
+
+    def _wait_until_ready(self):
+        ready = 0
+        while ready < self.num_workers:
+            try:
+                _, _, error = self._results.get(timeout=1.0)
+            except queue.Empty:
+                if any(worker.exitcode is not None for worker in self._workers):
+                    self._terminate()
+                    raise RuntimeError("A synthesis worker exited during startup.")
+                continue
+            if error is not None:
+                self._terminate()
+                raise error
+            ready += 1
+
+    def _collect(self):
+        while True:
+            try:
+                task_id, wavs, error = self._results.get(timeout=1.0)
+            except queue.Empty:
+                if self._closed:
+                    return
+                if any(worker.exitcode is not None for worker in self._workers):
+                    self._fail_pending(RuntimeError("A synthesis worker exited unexpectedly."))
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                future = self._pending.pop(task_id, None)
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(wavs)
+
+    def _fail_pending(self, error: Exception):
+        with self._lock:
+            self._error = error
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(error)
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queues one batch for the next idle worker and returns a future of its waveforms."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The pool is closed.")
+            if self._error is not None:
+                raise self._error
+            task_id = next(self._ids)
+            self._pending[task_id] = future
+        self._tasks.put((task_id, list(texts)))
+        return future
+
+    def synthesize_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[np.ndarray]:
+        """Splits texts into batches, runs them across the workers and returns waveforms in input order.
+
+        Args:
+            texts:
+                The texts to synthesize.
+            batch_size:
+                Texts per worker batch. Defaults to spreading the texts evenly over the workers.
+        """
+        if not texts:
+            return []
+        batch_size = batch_size or -(-len(texts) // self.num_workers)
+        futures = [self.submit(texts[start:start + batch_size]) for start in range(0, len(texts), batch_size)]
+        return [wav for future in futures for wav in future.result()]
+
+    def map_batches(self, batches: List[List[str]]) -> List[List[np.ndarray]]:
+        """Runs pre-formed batches across the workers and returns their results in order."""
+        futures = [self.submit(batch) for batch in batches]
+        return [future.result() for future in futures]
+
+    def _terminate(self):
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in self._workers:
+            worker.join()
+
+    def close(self):
+        """Stops the workers once the queued batches are done."""
+        if self._closed:
+            return
+        with self._lock:
+            self._closed = True
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._collector.join()
+        for q in (self._tasks, self._results):
+            q.close()
+            q.join_thread()
+        self._fail_pending(RuntimeError("The pool is closed."))
+
+    def __enter__(self) -> "SynthesizerPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,146 @@
+import json
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .audio import available_formats, content_type, encode_stream
+from .batching import MicroBatcher, QueueFullError
+from .pool import SynthesizerPool
+from .synthesizer import Synthesizer
+
+
+class SynthesisServer:
+    """Minimal ASGI application serving synthesis behind a ``MicroBatcher``.
+
+    Routes:
+        ``POST /synthesize`` with a JSON body ``{"text": "...", "format": "wav" | "pcm" | "opus"}``
+        returns a WAV file, raw 16-bit little-endian PCM or, when soundfile supports it,
+        Ogg/Opus. The audio is encoded and sent in chunks.
+        ``GET /health`` returns the batcher statistics.
+
+    Run it with any ASGI server, e.g. ``python -m arabspeak serve``.
+    """
+
+    def __init__(
+        self,
+        batcher: MicroBatcher,
+        sample_rate: int = 16000,
+        max_body_bytes: int = 64 * 1024,
+        on_shutdown: Optional[Callable[[], None]] = None,
+    ):
+        self.batcher = batcher
+        self.sample_rate = sample_rate
+        self.on_shutdown = on_shutdown
+        self.max_body_bytes = max_body_bytes
+        self.formats = available_formats()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            status, headers, body = await self._handle(scope, receive)
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            if isinstance(body, bytes):
+                await send({"type": "http.response.body", "body": body})
+                return
+            for chunk in body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.batcher.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.batcher.stop()
+                if self.on_shutdown is not None:
+                    self.on_shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _handle(self, scope, receive) -> Tuple[int, List, Union[bytes, Iterable[bytes]]]:
+        path, method = scope["path"], scope["method"]
+        if path == "/health":
+            if method != "GET":
+                return _json_response(405, {"error": "Method not allowed."})
+            return _json_response(200, {"status": "ok", **self.batcher.stats()})
+        if path != "/synthesize":
+            return _json_response(404, {"error": "Not found."})
+        if method != "POST":
+            return _json_response(405, {"error": "Method not allowed."})
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if len(body) > self.max_body_bytes:
+                return _json_response(413, {"error": "Request body too large."})
+            if not message.get("more_body", False):
+                break
+        try:
+            request = json.loads(body)
+            text = request["text"]
+            audio_format = request.get("format", "wav")
+        except (ValueError, KeyError, TypeError):
+            return _json_response(400, {"error": "Expected a JSON body with a 'text' field."})
+        if not isinstance(text, str) or not text.strip():
+            return _json_response(400, {"error": "'text' must be a non-empty string."})
+        if audio_format not in self.formats:
+            return _json_response(400, {"error": f"'format' must be one of {', '.join(self.formats)}."})
+
+        try:
+            wav = await self.batcher.submit(text)
+        except QueueFullError as e:
+            return _json_response(503, {"error": str(e)}, [(b"retry-after", b"1")])
+        except ValueError as e:
+            return _json_response(400, {"error": str(e)})
+
+        # The waveform belongs to this request only, so it is converted in place when writable,
+        # and its length is known, so the WAV header is exact.
+        kwargs = {"num_samples": wav.size} if audio_format == "wav" else {}
+        body = encode_stream([wav], audio_format, self.sample_rate, inplace=True, **kwargs)
+        return 200, [(b"content-type", content_type(audio_format, self.sample_rate).encode())], body
+
+
+def _json_response(status: int, content: Dict, headers: List = ()) -> Tuple[int, List, bytes]:
+    return status, [(b"content-type", b"application/json"), *headers], json.dumps(content).encode()
+
+
+def create_app(
+    export_path: str,
+    max_batch_size: int = 8,
+    max_wait: float = 0.01,
+    max_queue_size: int = 256,
+    num_workers: int = 1,
+    num_processes: int = 0,
+    intra_op_threads: int = 1,
+    **synthesizer_kwargs,
+) -> SynthesisServer:
+    """Builds the ASGI application for an export directory.
+
+    With ``num_processes`` the batches are run by a ``SynthesizerPool`` of that many worker
+    processes instead of a session in the server process, and ``num_workers`` is raised to
+    keep every process busy.
+    """
+    on_shutdown = None
+    if num_processes:
+        pool = SynthesizerPool(export_path, num_workers=num_processes, intra_op_threads=intra_op_threads, **synthesizer_kwargs)
+
+        def synthesize_batch(texts):
+            return pool.submit(texts).result()
+
+        sample_rate = synthesizer_kwargs.get("sample_rate", 16000)
+        num_workers = max(num_workers, num_processes)
+        on_shutdown = pool.close
+    else:
+        synthesizer = Synthesizer.init_from_path(export_path, **synthesizer_kwargs)
+        synthesize_batch = synthesizer.synthesize_batch
+        sample_rate = synthesizer.sample_rate
+    batcher = MicroBatcher(
+        synthesize_batch,
+        max_batch_size=max_batch_size,
+        max_wait=max_wait,
+        max_queue_size=max_queue_size,
+        num_workers=num_workers,
+    )
+    return SynthesisServer(batcher, sample_rate=sample_rate, on_shutdown=on_shutdown)
@@ -0,0 +1,136 @@
+from typing import Dict, List, NamedTuple, Sequence, Union
+
+import numpy as np
+import onnxruntime as ort
+
+SIGNATURE_FILE = "signature.json"
+# Positional order of the VITS export, used when no manifest is available.
+INPUT_ROLES = ("tokens", "lengths", "scales")
+OUTPUT_ROLES = ("audio",)
+# Outputs older exports do not have: the number of real samples of each batch row.
+OPTIONAL_OUTPUT_ROLES = ("audio_lengths",)
+
+_ORT_DTYPES = {"float": "float32", "double": "float64"}
+
+
+def ort_type_to_dtype(ort_type: str) -> str:
+    """Converts an onnxruntime type string such as ``tensor(int64)`` to a numpy dtype name."""
+    name = ort_type[len("tensor("):-1] if ort_type.startswith("tensor(") else ort_type
+    return _ORT_DTYPES.get(name, name)
+
+
+class TensorSpec(NamedTuple):
+    """Name, dtype and shape of a model input or output.
+
+    Dynamic axes are the ones whose dimension is a symbolic name (or ``None``) instead of an integer.
+    """
+    name: str
+    role: str
+    dtype: str
+    shape: List[Union[int, str, None]]
+
+    @property
+    def dynamic_axes(self) -> Dict[int, str]:
+        return {axis: dim or f"dim_{axis}" for axis, dim in enumerate(self.shape) if not isinstance(dim, int)}
+
+    def to_config(self) -> Dict:
+        return {
+            "name": self.name,
+            "role": self.role,
+            "dtype": self.dtype,
+            "shape": list(self.shape),
+            "dynamic_axes": {str(axis): dim for axis, dim in self.dynamic_axes.items()},
+        }
+
+    @staticmethod
+    def init_from_config(config: Dict) -> "TensorSpec":
+        return TensorSpec(name=config["name"], role=config["role"], dtype=config["dtype"], shape=list(config["shape"]))
+
+
+class ModelSignature:
+    """Input/output manifest of an exported model.
+
+    Inputs and outputs are addressed by role (``tokens``, ``lengths``, ``scales``, ``audio`` and
+    the optional ``audio_lengths``) so the synthesizer binds them by name instead of relying on
+    the graph's input order.
+
+    Args:
+        inputs(List[TensorSpec]):
+            The model inputs.
+        outputs(List[TensorSpec]):
+            The model outputs.
+    """
+
+    def __init__(self, inputs: Sequence[TensorSpec], outputs: Sequence[TensorSpec]):
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self._by_role = {spec.role: spec for spec in self.inputs + self.outputs}
+        missing = [role for role in INPUT_ROLES + OUTPUT_ROLES if role not in self._by_role]
+        if missing:
+            raise ValueError(f"Model signature has no {missing} entries.")
+
+    def __getitem__(self, role: str) -> TensorSpec:
+        return self._by_role[role]
+
+    def __contains__(self, role: str) -> bool:
+        return role in self._by_role
+
+    def bind(self, tokens: np.ndarray, lengths: np.ndarray, scales: np.ndarray) -> Dict[str, np.ndarray]:
+        """Maps the model inputs to their names, casting them to the declared dtypes."""
+        inputs = {}
+        for role, value in zip(INPUT_ROLES, (tokens, lengths, scales)):
+            spec = self._by_role[role]
+            inputs[spec.name] = value if value.dtype == spec.dtype else value.astype(spec.dtype)
+        return inputs
+
+    def validate(self, session: ort.InferenceSession):
+        """Checks the manifest against a loaded session.
+
+        Raises:
+            ValueError: If a name is missing from the session, a dtype or rank differs, a fixed
+                dimension differs, or an axis declared dynamic is fixed in the graph.
+        """
+        actual = {tensor.name: tensor for tensor in list(session.get_inputs()) + list(session.get_outputs())}
+        errors = []
+        for spec in self.inputs + self.outputs:
+            tensor = actual.get(spec.name)
+            if tensor is None:
+                errors.append(f"'{spec.name}' is not in the model")
+                continue
+            dtype = ort_type_to_dtype(tensor.type)
+            if dtype != spec.dtype:
+                errors.append(f"'{spec.name}' has dtype {dtype}, expected {spec.dtype}")
+            if len(tensor.shape) != len(spec.shape):
+                errors.append(f"'{spec.name}' has rank {len(tensor.shape)}, expected {len(spec.shape)}")
+                continue
+            for axis, (dim, expected) in enumerate(zip(tensor.shape, spec.shape)):
+                if isinstance(expected, int) and dim != expected:
+                    errors.append(f"'{spec.name}' axis {axis} is {dim}, expected {expected}")
+                elif not isinstance(expected, int) and isinstance(dim, int):
+                    errors.append(f"'{spec.name}' axis {axis} is fixed to {dim}, expected dynamic")
+        if errors:
+            raise ValueError("Model does not match its signature: " + "; ".join(errors) + ".")
+
+    def to_config(self) -> Dict:
+        return {
+            "inputs": [spec.to_config() for spec in self.inputs],
+            "outputs": [spec.to_config() for spec in self.outputs],
+        }
+
+    @staticmethod
+    def init_from_config(config: Dict) -> "ModelSignature":
+        return ModelSignature(
+            inputs=[TensorSpec.init_from_config(spec) for spec in config["inputs"]],
+            outputs=[TensorSpec.init_from_config(spec) for spec in config["outputs"]],
+        )
+
+    @staticmethod
+    def init_from_session(session: ort.InferenceSession) -> "ModelSignature":
+        """Infers the signature from a session, assigning roles in the VITS export's positional order."""
+        def specs(tensors, roles):
+            return [TensorSpec(t.name, role, ort_type_to_dtype(t.type), list(t.shape)) for t, role in zip(tensors, roles)]
+
+        inputs, outputs = session.get_inputs(), session.get_outputs()
+        if len(inputs) != len(INPUT_ROLES):
+            raise ValueError(f"Model expects {len(inputs)} inputs, expected {len(INPUT_ROLES)} (tokens, lengths, scales).")
+        return ModelSignature(specs(inputs, INPUT_ROLES), specs(outputs, OUTPUT_ROLES + OPTIONAL_OUTPUT_ROLES))
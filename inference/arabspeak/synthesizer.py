@@ -0,0 +1,407 @@
+import itertools
+import json
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import onnxruntime as ort
+
+from .audio import SINK_BUFFER_BYTES, make_sink
+from .cache import LRUCache, file_fingerprint
+from .components.text.cleaners import split_segments
+from .components.text.profiling import StageSink
+from .components.text.tokenizer import Tokenizer
+from .iobinding import BoundSession
+from .signature import SIGNATURE_FILE, ModelSignature
+
+if TYPE_CHECKING:
+    from .batching import LengthBucketer
+
+MODEL_FILE = "model.onnx"
+TOKENIZER_CONFIG_FILE = "tokenizer_config.json"
+COMPILED_TOKENIZER_FILE = "tokenizer.compiled.json"
+
+
+def make_session_options(
+    intra_op_threads: int = 0,
+    inter_op_threads: int = 0,
+    share_weights: bool = False,
+) -> ort.SessionOptions:
+    """Builds onnxruntime session options.
+
+    Args:
+        intra_op_threads:
+            Threads used inside an operator, ``0`` for the onnxruntime default.
+        inter_op_threads:
+            Threads used across operators, ``0`` for the onnxruntime default.
+        share_weights:
+            Disables weight prepacking, which would copy memory-mapped weights into private memory.
+    """
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    if share_weights:
+        options.add_session_config_entry("session.disable_prepacking", "1")
+    return options
+
+
+def make_warmup_profiles(lengths: Sequence[int], batch_sizes: Sequence[int] = (1,)) -> List[Tuple[int, int]]:
+    """Every ``(batch_size, length)`` combination, e.g. the bucket boundaries times the served batch sizes."""
+    return [(batch_size, length) for batch_size, length in itertools.product(batch_sizes, lengths)]
+
+
+def load_tokenizer(path: Union[str, Path]) -> Tokenizer:
+    """Loads the tokenizer of an export directory.
+
+    ``tokenizer.compiled.json`` (see ``Tokenizer.save_compiled``) is preferred when it was
+    compiled from the ``tokenizer_config.json`` next to it, as checked by the SHA-1 of the
+    config. The JSON config is parsed otherwise, or when the compiled artifact cannot be
+    loaded for any reason.
+    """
+    path = Path(path)
+    config_path = path / TOKENIZER_CONFIG_FILE
+    compiled_path = path / COMPILED_TOKENIZER_FILE
+    if compiled_path.exists():
+        try:
+            source_fingerprint = file_fingerprint(config_path) if config_path.exists() else None
+            return Tokenizer.load_compiled(compiled_path, source_fingerprint=source_fingerprint)
+        except Exception as e:
+            print(f"\t|> ! Could not load {compiled_path}: {e} Falling back to {TOKENIZER_CONFIG_FILE}.")
+    with open(config_path, "r") as f:
+        return Tokenizer.init_from_config(json.load(f))
+
+
+class Synthesizer:
+    """Runs an exported VITS model on Arabic text.
+
+    The synthesizer owns a single ``onnxruntime.InferenceSession`` that is created once
+    and reused across calls, so the cost of loading the graph is only paid at startup.
+    With ``io_binding`` the session is run through a ``BoundSession``: padded inputs are
+    written to reusable per-thread buffers and the returned waveforms are views of the
+    model output rather than copies.
+    """
+
+    def __init__(
+        self,
+        session: ort.InferenceSession,
+        tokenizer: Tokenizer,
+        sample_rate: int = 16000,
+        noise_scale: float = 0.667,
+        length_scale: float = 1.0,
+        noise_scale_w: float = 1.0,
+        encode_cache_size: int = 0,
+        audio_cache_bytes: int = 0,
+        model_fingerprint: Optional[str] = None,
+        bucketer: Optional["LengthBucketer"] = None,
+        signature: Optional[ModelSignature] = None,
+        io_binding: bool = False,
+    ):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.sample_rate = sample_rate
+        self.noise_scale = noise_scale
+        self.length_scale = length_scale
+        self.noise_scale_w = noise_scale_w
+        self.signature = signature or ModelSignature.init_from_session(session)
+        self._output_names = [self.signature[role].name for role in ("audio", "audio_lengths") if role in self.signature]
+        self.encode_cache = LRUCache(max_entries=encode_cache_size) if encode_cache_size else None
+        self.audio_cache = LRUCache(max_bytes=audio_cache_bytes) if audio_cache_bytes else None
+        self.model_fingerprint = model_fingerprint or f"session-{id(session)}"
+        self.bucketer = bucketer
+        self.bound_session = BoundSession(session, self.signature, tokenizer.characters.pad_id) if io_binding else None
+
+    @property
+    def stage_sink(self) -> Optional[StageSink]:
+        """Sink receiving the front-end stage timings (see ``Tokenizer.stage_sink``) and the ``model`` stage."""
+        return self.tokenizer.stage_sink
+
+    @stage_sink.setter
+    def stage_sink(self, sink: Optional[StageSink]):
+        self.tokenizer.stage_sink = sink
+
+    @property
+    def scales(self) -> np.ndarray:
+        return np.array([self.noise_scale, self.length_scale, self.noise_scale_w], dtype=np.float32)
+
+    def prepare_inputs(self, inputs: Sequence[np.ndarray]) -> Dict[str, np.ndarray]:
+        """Binds the model inputs (tokens, lengths, scales) to their names in the signature."""
+        if len(inputs) != len(self.signature.inputs):
+            raise ValueError(f"Model expects {len(self.signature.inputs)} inputs, got {len(inputs)}.")
+        return self.signature.bind(*inputs)
+
+    def run(self, tokens: np.ndarray, lengths: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Runs the model on a padded batch.
+
+        returns:
+            The raw ``[batch, samples]`` output and, when the model exports ``audio_lengths``,
+            the number of real samples of each row (``None`` otherwise).
+        """
+        sink = self.stage_sink
+        start = time.perf_counter() if sink else 0.0
+        outputs = self._run_model(tokens, lengths)
+        if sink:
+            sink.record("model", time.perf_counter() - start)
+        audio = outputs[0]
+        return audio.reshape(audio.shape[0], -1), (outputs[1].reshape(-1) if len(outputs) > 1 else None)
+
+    def _run_model(self, tokens: np.ndarray, lengths: np.ndarray) -> List[np.ndarray]:
+        if self.bound_session is not None:
+            return self.bound_session.run(tokens, lengths, self.scales, self._output_names)
+        return self.session.run(self._output_names, self.prepare_inputs([tokens, lengths, self.scales]))
+
+    def warmup(self, profiles: Sequence[Tuple[int, int]]) -> Dict[Tuple[int, int], float]:
+        """Runs the model once per ``(batch_size, length)`` profile.
+
+        The first call with a new input shape pays for kernel and memory setup, so warming
+        the shapes that will be served moves that cost from the first requests to startup.
+
+        returns:
+            The seconds taken by each profile.
+        """
+        timings = {}
+        for batch_size, length in profiles:
+            tokens = np.zeros((batch_size, length), dtype=np.int64)
+            lengths = np.full(batch_size, length, dtype=np.int64)
+            start = time.perf_counter()
+            self._run_model(tokens, lengths)
+            timings[(batch_size, length)] = time.perf_counter() - start
+        return timings
+
+    def synthesize(self, text: str) -> np.ndarray:
+        """Synthesizes a single utterance.
+
+        Args:
+            text(str):
+                The text to synthesize.
+        returns:
+            wav(np.ndarray):
+                The ``float32`` waveform.
+        """
+        return self.synthesize_batch([text])[0]
+
+    def synthesize_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Synthesizes a list of utterances with a single model call.
+
+        Token sequences are padded into one tensor with per-row lengths, and the output is
+        split back into one waveform per input text.
+
+        Args:
+            texts(List[str]):
+                The texts to synthesize.
+        returns:
+            wavs(List[np.ndarray]):
+                The ``float32`` waveform of each text, in input order.
+        """
+        if not texts:
+            return []
+        sequences = self.encode(texts)
+        empty = [i for i, seq in enumerate(sequences) if seq.size == 0]
+        if empty:
+            raise ValueError(f"Texts at positions {empty} produced no tokens.")
+        return self.synthesize_sequences(sequences)
+
+    def encode(self, texts: List[str]) -> List[np.ndarray]:
+        """Encodes texts to token IDs, memoized by raw text and tokenizer config when the encode cache is enabled."""
+        if self.encode_cache is None:
+            return [self.tokenizer.encode_array(text) for text in texts]
+        fingerprint = self.tokenizer.fingerprint
+        sequences = []
+        for text in texts:
+            key = (fingerprint, text)
+            token_ids = self.encode_cache.get(key)
+            if token_ids is None:
+                token_ids = self.tokenizer.encode_array(text)
+                token_ids.flags.writeable = False
+                self.encode_cache.put(key, token_ids)
+            sequences.append(token_ids)
+        return sequences
+
+    def synthesize_sequences(self, sequences: List[np.ndarray]) -> List[np.ndarray]:
+        """Synthesizes already encoded sequences.
+
+        When the audio cache is enabled, waveforms are looked up by token IDs, scales and model
+        fingerprint first, and only the misses are sent to the model. Cached waveforms are
+        returned read-only. The misses are run in a single model call, or, when a ``bucketer``
+        is set, in one call per length bucket. Results are always in input order.
+        """
+        wavs = [None] * len(sequences)
+        keys = [None] * len(sequences)
+        if self.audio_cache is not None:
+            scales = tuple(self.scales.tolist())
+            for i, seq in enumerate(sequences):
+                keys[i] = (self.model_fingerprint, scales, seq.tobytes())
+                wavs[i] = self.audio_cache.get(keys[i])
+        missing = [i for i, wav in enumerate(wavs) if wav is None]
+        if not missing:
+            return wavs
+        if self.bucketer is None:
+            groups = [missing]
+        else:
+            plan = self.bucketer.plan([sequences[i].size for i in missing])
+            groups = [[missing[j] for j in group] for group in plan]
+        for group in groups:
+            if self.bound_session is not None:
+                tokens, lengths = self.bound_session.pad([sequences[i] for i in group])
+            else:
+                tokens, lengths = self.tokenizer.pad_batch([sequences[i] for i in group])[:2]
+            if self.bucketer is not None:
+                self.bucketer.record(lengths, tokens.shape[1])
+            outputs, output_lengths = self.run(tokens, lengths)
+            for row, (i, wav) in enumerate(zip(group, outputs)):
+                if output_lengths is not None:
+                    wav = wav[: int(output_lengths[row])]
+                if self.audio_cache is not None:
+                    wav = wav.copy()
+                    wav.flags.writeable = False
+                    self.audio_cache.put(keys[i], wav)
+                wavs[i] = wav
+        return wavs
+
+    def synthesize_stream(
+        self,
+        text: str,
+        max_segment_chars: int = 150,
+        silence: float = 0.0,
+        crossfade: float = 0.0,
+    ) -> Iterator[np.ndarray]:
+        """Synthesizes long text clause by clause and yields audio as soon as each clause is ready.
+
+        The text is cleaned once and split at ``,``, ``?`` and ``.`` (see ``split_segments``), so
+        the latency of the first chunk depends on the first clause only, not on the whole
+        paragraph. Segments are encoded with ``encode_cleaned_array`` and not cleaned again.
+
+        Args:
+            text(str):
+                The text to synthesize.
+            max_segment_chars(int):
+                Clauses longer than this are split at whitespace. ``0`` disables the limit.
+            silence(float):
+                Seconds of silence inserted between segments.
+            crossfade(float):
+                Seconds of linear crossfade between consecutive segments. Ignored when ``silence`` is set.
+        yields:
+            chunk(np.ndarray):
+                ``float32`` waveform chunks, in order.
+        """
+        if self.tokenizer.text_cleaner is not None:
+            text = self.tokenizer.text_cleaner(text)
+        segments = split_segments(text, max_chars=max_segment_chars)
+        gap = np.zeros(int(silence * self.sample_rate), dtype=np.float32)
+        fade_len = 0 if gap.size else int(crossfade * self.sample_rate)
+        tail = None
+        for i, segment in enumerate(segments):
+            token_ids = self.tokenizer.encode_cleaned_array(segment)
+            if token_ids.size == 0:
+                raise ValueError(f"Segment {i} produced no tokens.")
+            wav = self.synthesize_sequences([token_ids])[0]
+            if gap.size and i > 0:
+                yield gap
+            if fade_len:
+                wav, tail = self._crossfade(tail, wav, fade_len, last=i == len(segments) - 1)
+            if wav.size:
+                yield wav
+        if tail is not None and tail.size:
+            yield tail
+
+    def synthesize_to(self, text: str, output, audio_format: str = "wav", buffer_size: int = SINK_BUFFER_BYTES, **stream_kwargs) -> int:
+        """Synthesizes long text segment by segment and encodes each segment into ``output`` as it is ready.
+
+        Only one segment of audio is held at a time, so the memory used does not depend on the
+        length of the text. A WAV header is patched with the final length when ``output`` is a
+        path or a seekable file.
+
+        Args:
+            output:
+                A path, a binary file-like object, a socket or a callable receiving bytes, see ``AudioSink``.
+            audio_format(str):
+                ``wav``, ``pcm`` or ``opus``.
+            buffer_size(int):
+                Encoded bytes held before they are written to ``output``.
+            **stream_kwargs:
+                Forwarded to ``synthesize_stream``.
+        returns:
+            The number of samples written.
+        """
+        with make_sink(audio_format, output, self.sample_rate, buffer_size=buffer_size) as sink:
+            for chunk in self.synthesize_stream(text, **stream_kwargs):
+                sink.write(chunk)
+        return sink.num_samples
+
+    @staticmethod
+    def _crossfade(tail: Optional[np.ndarray], wav: np.ndarray, fade_len: int, last: bool):
+        """Blends the held-back tail of the previous chunk into the head of ``wav``.
+
+        returns:
+            The chunk ready to be emitted and the new tail to hold back.
+        """
+        if tail is not None:
+            n = min(tail.size, wav.size)
+            ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+            wav = wav.copy()
+            wav[:n] = tail[:n] * (1.0 - ramp) + wav[:n] * ramp
+        if last:
+            return wav, None
+        n = min(fade_len, wav.size)
+        return wav[: wav.size - n], wav[wav.size - n :]
+
+    @staticmethod
+    def init_from_path(
+        path: Union[str, Path],
+        providers: Optional[List[str]] = None,
+        session_options: Optional[ort.SessionOptions] = None,
+        token_cache_path: Optional[Union[str, Path]] = None,
+        model_file: str = MODEL_FILE,
+        warmup_profiles: Optional[Sequence[Tuple[int, int]]] = None,
+        **kwargs,
+    ) -> "Synthesizer":
+        """Loads a synthesizer from a directory written by ``export_model``.
+
+        Args:
+            path:
+                The export directory containing ``model.onnx`` and ``tokenizer_config.json``
+                (or a compiled ``tokenizer.compiled.json``, see ``load_tokenizer``).
+            providers:
+                The onnxruntime execution providers. Defaults to CPU.
+            session_options:
+                Optional onnxruntime session options.
+            token_cache_path:
+                Optional sqlite file used as a persistent token cache (see ``TokenCache``).
+            model_file:
+                The model file name inside ``path``, to load a variant instead of ``model.onnx``.
+            warmup_profiles:
+                Optional ``(batch_size, length)`` shapes to run once before returning, see ``warmup``.
+
+        When ``signature.json`` is present, inputs are bound by the names it declares and the
+        model is checked against it, so an export with mismatched names, dtypes or fixed
+        dynamic axes fails at load time rather than on the first request.
+        """
+        path = Path(path)
+        model_path = path / model_file
+        config_path = path / TOKENIZER_CONFIG_FILE
+        for file in (model_path, config_path):
+            if not file.exists():
+                raise FileNotFoundError(f"{file} does not exist.")
+
+        tokenizer = load_tokenizer(path)
+        if token_cache_path is not None:
+            from .components.text.token_cache import TokenCache
+            tokenizer.token_cache = TokenCache(token_cache_path)
+
+        session = ort.InferenceSession(
+            str(model_path),
+            sess_options=session_options,
+            providers=providers or ["CPUExecutionProvider"],
+        )
+        signature_path = path / SIGNATURE_FILE
+        if signature_path.exists() and "signature" not in kwargs:
+            with open(signature_path, "r") as f:
+                signature = ModelSignature.init_from_config(json.load(f))
+            signature.validate(session)
+            kwargs["signature"] = signature
+        if kwargs.get("audio_cache_bytes") and not kwargs.get("model_fingerprint"):
+            kwargs["model_fingerprint"] = file_fingerprint(model_path)
+        synthesizer = Synthesizer(session=session, tokenizer=tokenizer, **kwargs)
+        if warmup_profiles:
+            synthesizer.warmup(warmup_profiles)
+        return synthesizer
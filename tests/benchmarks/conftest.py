@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pytest
+
+BENCHMARKS_DIR = Path(__file__).parent
+
+
+def benchmarks_selected(config) -> bool:
+    """Whether this directory was passed on the command line or a benchmark run was requested."""
+    if config.getoption("benchmark_only", False) or config.getoption("benchmark_enable", False):
+        return True
+    for arg in config.args:
+        path = Path(config.invocation_params.dir, arg.split("::")[0]).resolve()
+        if path == BENCHMARKS_DIR or BENCHMARKS_DIR in path.parents:
+            return True
+    return False
+
+
+def pytest_collection_modifyitems(config, items):
+    # a plain ``pytest tests`` skips the microbenchmarks instead of timing each of them
+    if benchmarks_selected(config):
+        return
+    skip = pytest.mark.skip(reason="microbenchmark, run with python -m pytest tests/benchmarks")
+    for item in items:
+        if BENCHMARKS_DIR in Path(str(item.fspath)).parents:
+            item.add_marker(skip)
@@ -0,0 +1,79 @@
+"""Microbenchmarks of the text front-end stages.
+
+Run with ``python -m pytest tests/benchmarks`` (requires ``pytest-benchmark``). A run that does
+not select this directory skips them, see ``conftest.py``.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from inference.arabspeak.components.text import NumberVerbalizer, Phonemizer, TextCleaner, Tokenizer, clean_text  # noqa: E402
+
+COMPONENTS = Path(__file__).parents[2] / "inference" / "arabspeak" / "components"
+SENTENCE = "الشَّمْسُ تَغْرُبُ فِي الأُفُقْ، مُلَوِّنَةً السَّمَاءَ بِألْوَانٍ دَافِئَةٍ."
+INPUTS = {
+    "short": "السَّلامُ عَلَيكُم",
+    "medium": SENTENCE,
+    "long": " ".join([SENTENCE] * 40),
+    "numbers": "وُلِدَ فِي 5/3/2024 السَّاعَة 14:30، وَدَفَعَ $3.50 أَيْ 15% مِنْ 1,250 جُنَيْه.",
+}
+
+
+@pytest.fixture(scope="module")
+def config():
+    with open(COMPONENTS / "tokenizer.json", "r") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def tokenizer(config):
+    return Tokenizer.init_from_config(dict(config, add_blank=True, use_eos_bos=True))
+
+
+@pytest.fixture(params=list(INPUTS))
+def text(request):
+    return INPUTS[request.param]
+
+
+def test_clean_text(benchmark, text):
+    benchmark(clean_text, text)
+
+
+def test_clean_text_without_numbers(benchmark, text):
+    # The cleaner before number verbalization, as a baseline for test_clean_text.
+    benchmark(TextCleaner().clean, text)
+
+
+def test_verbalize_numbers(benchmark, text):
+    benchmark(NumberVerbalizer(), text)
+
+
+def test_arabic_phonemizer(benchmark, tokenizer, text):
+    benchmark(tokenizer.phonemizer.phonemize, clean_text(text))
+
+
+def test_buckwalter_phonemizer(benchmark, config, text):
+    benchmark(Phonemizer.init_from_config(config["phonemizer"]).phonemize, clean_text(text))
+
+
+def test_text_to_ids(benchmark, tokenizer, text):
+    benchmark(tokenizer.text_to_ids, tokenizer.phonemizer.phonemize(clean_text(text)))
+
+
+def test_text_to_id_array(benchmark, tokenizer, text):
+    benchmark(tokenizer.text_to_id_array, tokenizer.phonemizer.phonemize(clean_text(text)))
+
+
+def test_intersperse_blank_char(benchmark, tokenizer, text):
+    benchmark(tokenizer.intersperse_blank_char, tokenizer.text_to_ids(tokenizer.phonemizer.phonemize(clean_text(text))))
+
+
+def test_encode(benchmark, tokenizer, text):
+    benchmark(tokenizer.encode, text)
+
+
+def test_encode_array(benchmark, tokenizer, text):
+    benchmark(tokenizer.encode_array, text)
@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+
+import onnx
+import pytest
+from onnx import TensorProto, helper
+
+from inference.arabspeak.components.text import Tokenizer
+
+TOKENIZER_CONFIG = Path(__file__).parents[1] / "inference" / "arabspeak" / "components" / "tokenizer.json"
+
+
+def make_dummy_vits(path: Path):
+    """Writes a tiny graph with the VITS export signature.
+
+    The output echoes the token IDs (scaled by the length scale), so padded positions come back as zeros,
+    and ``output_lengths`` echoes the input lengths, like the number of real samples of each row.
+    """
+    axis = helper.make_tensor("axis", TensorProto.INT64, [1], [1])
+    index = helper.make_tensor("index", TensorProto.INT64, [], [1])
+    nodes = [
+        helper.make_node("Cast", ["input"], ["input_float"], to=TensorProto.FLOAT),
+        helper.make_node("Gather", ["scales", "index"], ["length_scale"], axis=0),
+        helper.make_node("Mul", ["input_float", "length_scale"], ["scaled"]),
+        helper.make_node("Unsqueeze", ["scaled", "axis"], ["output"]),
+        helper.make_node("Identity", ["input_lengths"], ["output_lengths"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "dummy_vits",
+        inputs=[
+            helper.make_tensor_value_info("input", TensorProto.INT64, ["batch_size", "phonemes"]),
+            helper.make_tensor_value_info("input_lengths", TensorProto.INT64, ["batch_size"]),
+            helper.make_tensor_value_info("scales", TensorProto.FLOAT, [3]),
+        ],
+        outputs=[
+            helper.make_tensor_value_info("output", TensorProto.FLOAT, ["batch_size", 1, "time"]),
+            helper.make_tensor_value_info("output_lengths", TensorProto.INT64, ["batch_size"]),
+        ],
+        initializer=[axis, index],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 15)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    with open(TOKENIZER_CONFIG, "r") as f:
+        config = json.load(f)
+    config.pop("phonemizer", None)
+    with open(tmp_path / "tokenizer_config.json", "w") as f:
+        json.dump(config, f)
+    make_dummy_vits(tmp_path / "model.onnx")
+    return tmp_path
+
+
+@pytest.fixture
+def tokenizer_texts():
+    """Diacritized and plain Arabic, Latin text and digits, and an empty text."""
+    return [
+        "الشَّمْسُ تَغْرُبُ فِي الأُفُقْ، مُلَوِّنَةً السَّمَاءَ بِألْوَانٍ دَافِئَةٍ.",
+        "وَرَجَحَتْ مَدْرَسَةْ سُعُودُ الثَانَوِيَّةُ ذلك .",
+        "abc 123",
+        "",
+    ]
+
+
+@pytest.fixture
+def make_tokenizer():
+    """Builds a ``Tokenizer`` from the shipped config with the given blank and BOS/EOS options."""
+    def make(add_blank=False, use_eos_bos=False):
+        with open(TOKENIZER_CONFIG, "r") as f:
+            config = json.load(f)
+        config["add_blank"] = add_blank
+        config["use_eos_bos"] = use_eos_bos
+        return Tokenizer.init_from_config(config)
+
+    return make
@@ -0,0 +1,71 @@
+import io
+import socket
+import wave
+
+import numpy as np
+import pytest
+
+from inference.arabspeak.audio import (PcmSink, WavSink, available_formats, encode_stream, encode_wav,
+                                       float_to_pcm16, make_sink)
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture
+def wav():
+    return np.random.default_rng(0).uniform(-1.2, 1.2, 50001).astype(np.float32)
+
+
+def test_encode_stream_matches_encode_wav(wav):
+    chunks = list(encode_stream(np.array_split(wav, 5), "wav", SAMPLE_RATE, num_samples=wav.size, buffer_size=4096))
+    assert b"".join(chunks) == encode_wav(wav, SAMPLE_RATE)
+    assert len(chunks) > 1 and max(len(chunk) for chunk in chunks) <= 2 * PcmSink(io.BytesIO(), SAMPLE_RATE).chunk_size
+
+
+def test_encode_stream_pcm(wav):
+    assert b"".join(encode_stream([wav[:100], wav[100:]], "pcm", SAMPLE_RATE)) == float_to_pcm16(wav).astype("<i2").tobytes()
+
+
+def test_wav_sink_patches_seekable_output(wav, tmp_path):
+    path = tmp_path / "out.wav"
+    with make_sink("wav", path, SAMPLE_RATE, buffer_size=1000) as sink:
+        for chunk in np.array_split(wav, 7):
+            sink.write(chunk)
+    assert path.read_bytes() == encode_wav(wav, SAMPLE_RATE)
+
+
+def test_wav_sink_streaming_header(wav):
+    received = []
+    with WavSink(received.append, SAMPLE_RATE) as sink:
+        sink.write(wav)
+    data = b"".join(received)
+    assert data[4:8] == data[40:44] == b"\xff\xff\xff\xff"
+    with wave.open(io.BytesIO(data)) as f:
+        assert f.getframerate() == SAMPLE_RATE
+        assert np.array_equal(np.frombuffer(f.readframes(wav.size), dtype="<i2"), float_to_pcm16(wav))
+
+
+def test_sink_writes_to_socket(wav):
+    left, right = socket.socketpair()
+    with left, right:
+        with PcmSink(left, SAMPLE_RATE) as sink:
+            sink.write(wav[:1000])
+        assert right.recv(4096) == float_to_pcm16(wav[:1000]).astype("<i2").tobytes()
+
+
+def test_make_sink_errors():
+    with pytest.raises(ValueError):
+        make_sink("mp3", io.BytesIO(), SAMPLE_RATE)
+    with pytest.raises(TypeError):
+        make_sink("wav", 1, SAMPLE_RATE)
+    sink = make_sink("pcm", io.BytesIO(), SAMPLE_RATE)
+    sink.close()
+    with pytest.raises(ValueError):
+        sink.write(np.zeros(1, dtype=np.float32))
+
+
+def test_opus_sink(wav):
+    if "opus" not in available_formats():
+        pytest.skip("soundfile with Opus support is not installed")
+    data = b"".join(encode_stream(np.array_split(wav, 3), "opus", SAMPLE_RATE))
+    assert data[:4] == b"OggS"
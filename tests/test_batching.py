@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from inference.arabspeak import LengthBucketer, Synthesizer
+
+
+def test_bucketer_plan():
+    bucketer = LengthBucketer([4, 8], max_batch_size=2)
+    lengths = [3, 9, 7, 1, 20, 4, 5]
+    batches = bucketer.plan(lengths)
+    assert batches == [[3, 0], [5], [6, 2], [1, 4]]
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+
+
+def test_bucketer_validation():
+    with pytest.raises(ValueError):
+        LengthBucketer([8, 4])
+    with pytest.raises(ValueError):
+        LengthBucketer([])
+
+
+def test_bucketer_padding_efficiency():
+    bucketer = LengthBucketer([8])
+    assert bucketer.padding_efficiency == 1.0
+    bucketer.record([2, 4], 4)
+    assert bucketer.padding_efficiency == 0.75
+
+
+def test_synthesizer_bucketed_order(export_dir):
+    texts = [
+        "الكَلََامْ " * 12,
+        "يَا",
+        "الشَّمْسُ تَغْرُبُ فِي الأُفُقْ، مُلَوِّنَةً السَّمَاءَ بِألْوَانٍ دَافِئَةٍ.",
+        "قَمَر",
+    ]
+    plain = Synthesizer.init_from_path(export_dir)
+    bucketed = Synthesizer.init_from_path(export_dir, bucketer=LengthBucketer([8, 32], max_batch_size=2))
+    for a, b in zip(plain.synthesize_batch(texts), bucketed.synthesize_batch(texts)):
+        np.testing.assert_array_equal(a, b)
+    naive = plain.tokenizer.encode_batch(texts)
+    naive_efficiency = naive.lengths.sum() / naive.tokens.size
+    assert bucketed.bucketer.padding_efficiency > naive_efficiency
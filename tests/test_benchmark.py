@@ -0,0 +1,39 @@
+import json
+
+from inference.arabspeak.benchmark import format_report, make_length_corpus, percentiles, run_benchmark
+
+TEXTS = ["السَّلامُ عَلَيكُم", "يَا صَدِيقِي", "كَيْفَ حَالُكَ"]
+
+
+def test_make_length_corpus():
+    assert make_length_corpus(TEXTS, 0) == TEXTS
+    corpus = make_length_corpus(TEXTS, 40)
+    assert len(corpus) == len(TEXTS)
+    assert all(len(text) >= 40 for text in corpus)
+    assert corpus[1].startswith(TEXTS[1])
+
+
+def test_percentiles():
+    assert percentiles(range(101)) == {"p50": 50.0, "p95": 95.0, "p99": 99.0}
+    assert percentiles([]) == {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+
+
+def test_run_benchmark(export_dir):
+    report = run_benchmark(export_dir, TEXTS, batch_sizes=[1, 2], thread_counts=[1], text_lengths=[0, 50], repeats=2,
+                           isolate=False)
+    assert len(report["results"]) == 4
+    result = report["results"][0]
+    assert result["num_calls"] == 6
+    assert result["rtf"] > 0 and result["tokens_per_sec"] > 0
+    # a shared process only has one meaningful peak
+    assert "peak_rss_mb" not in result and report["peak_rss_mb"] > 0
+    assert "Peak RSS of the whole run" in format_report(report)
+    json.dumps(report)
+
+
+def test_run_benchmark_isolated(export_dir):
+    report = run_benchmark(export_dir, TEXTS, batch_sizes=[1], thread_counts=[1], repeats=1)
+    result = report["results"][0]
+    assert result["num_calls"] == 3 and result["peak_rss_mb"] > 0
+    assert "peak_rss_mb" not in report
+    json.dumps(report)
@@ -0,0 +1,168 @@
+import io
+import json
+import tarfile
+import wave
+
+import numpy as np
+import pytest
+from inference.arabspeak import Synthesizer
+from inference.arabspeak.batching import LengthBucketer
+from inference.arabspeak.bulk import BulkSynthesizer, TextRecord, inline_submit, load_manifest, read_records
+
+TEXTS = ["السَّلامُ عَلَيكُم", "يَا صَدِيقِي", "السَّلامُ عَلَيكُم", "كَيْفَ حَالُكَ", "قَمَر", "يَا صَدِيقِي", "شَمْس"]
+
+
+def records(texts=TEXTS):
+    return [TextRecord(i, f"line-{i:08d}", text) for i, text in enumerate(texts)]
+
+
+def read_shard(path, name):
+    with open(path / f"{name}.json", "r", encoding="utf-8") as f:
+        index = json.load(f)
+    with tarfile.open(path / f"{name}.tar") as tar:
+        members = {member.name: tar.extractfile(member).read() for member in tar.getmembers()}
+    return index, members
+
+
+def test_read_records(tmp_path):
+    with open(tmp_path / "sentences.txt", "w", encoding="utf-16") as f:
+        f.write("قَمَر\n\n  شَمْس \n")
+    assert list(read_records(tmp_path / "sentences.txt")) == [
+        TextRecord(0, "line-00000000", "قَمَر"),
+        TextRecord(2, "line-00000002", "شَمْس"),
+    ]
+
+    with open(tmp_path / "sentences.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "a", "text": "قَمَر"}, ensure_ascii=False) + "\n")
+        f.write(json.dumps({"text": "شَمْس"}, ensure_ascii=False) + "\n")
+        f.write(json.dumps({"id": "c", "text": " "}) + "\n")
+    assert list(read_records(tmp_path / "sentences.jsonl")) == [
+        TextRecord(0, "a", "قَمَر"),
+        TextRecord(1, "line-00000001", "شَمْس"),
+    ]
+
+    with pytest.raises(ValueError):
+        list(read_records(tmp_path / "sentences.txt", input_format="csv"))
+
+
+def test_bulk_synthesizer(export_dir, tmp_path):
+    synthesizer = Synthesizer.init_from_path(export_dir)
+    calls = []
+
+    def synthesize_batch(texts):
+        calls.append(texts)
+        return synthesizer.synthesize_batch(texts)
+
+    output_path = tmp_path / "out"
+    bulk = BulkSynthesizer(output_path, inline_submit(synthesize_batch), synthesizer.sample_rate,
+                           clean=synthesizer.tokenizer.text_cleaner, shard_size=2,
+                           bucketer=LengthBucketer([8, 16], max_batch_size=2))
+    manifest = bulk.run(records(), log=lambda message: None)
+
+    assert sorted(text for batch in calls for text in batch) == sorted(set(TEXTS))
+    assert list(manifest["shards"]) == ["shard-00000", "shard-00001", "shard-00002"]
+    assert sum(shard["num_texts"] for shard in manifest["shards"].values()) == 5
+    assert sum(shard["num_duplicates"] for shard in manifest["shards"].values()) == 2
+    assert load_manifest(output_path) == manifest
+
+    index, members = read_shard(output_path, "shard-00000")
+    assert [entry["line"] for entry in index["entries"]] == [0, 1, 2]
+    assert index["entries"][2]["audio"] == "shard-00000.tar/00000000.wav"
+    assert sorted(members) == ["00000000.wav", "00000001.wav"]
+    with wave.open(io.BytesIO(members["00000000.wav"])) as f:
+        assert f.getframerate() == synthesizer.sample_rate
+        assert f.getnframes() == synthesizer.synthesize(TEXTS[0]).size
+
+    index, members = read_shard(output_path, "shard-00001")
+    duplicates = [entry for entry in index["entries"] if entry.get("duplicate")]
+    assert [(entry["line"], entry["audio"]) for entry in duplicates] == [(5, "shard-00000.tar/00000001.wav")]
+    assert sorted(members) == ["00000002.wav", "00000003.wav"]
+
+
+def test_bulk_synthesizer_resumes(export_dir, tmp_path):
+    synthesizer = Synthesizer.init_from_path(export_dir)
+    output_path = tmp_path / "out"
+    calls = []
+
+    def interrupted(texts):
+        # Shard 0 is written once shard 1 is submitted, the interrupt hits shard 2.
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        calls.append(texts)
+        return synthesizer.synthesize_batch(texts)
+
+    bulk = BulkSynthesizer(output_path, inline_submit(interrupted), synthesizer.sample_rate,
+                           clean=synthesizer.tokenizer.text_cleaner, shard_size=2,
+                           bucketer=LengthBucketer(max_batch_size=2))
+    with pytest.raises(KeyboardInterrupt):
+        bulk.run(records(), log=lambda message: None)
+    assert list(load_manifest(output_path)["shards"]) == ["shard-00000"]
+
+    calls.clear()
+
+    def synthesize_batch(texts):
+        calls.append(texts)
+        return synthesizer.synthesize_batch(texts)
+
+    bulk.submit = inline_submit(synthesize_batch)
+    manifest = bulk.run(records(), log=lambda message: None)
+    assert list(manifest["shards"]) == ["shard-00000", "shard-00001", "shard-00002"]
+    assert sorted(text for batch in calls for text in batch) == sorted(["كَيْفَ حَالُكَ", "قَمَر", "شَمْس"])
+
+    with pytest.raises(ValueError):
+        BulkSynthesizer(output_path, bulk.submit, synthesizer.sample_rate, shard_size=3).run(records())
+
+
+def test_bulk_synthesizer_refuses_edited_input(export_dir, tmp_path):
+    synthesizer = Synthesizer.init_from_path(export_dir)
+    bulk = BulkSynthesizer(tmp_path, inline_submit(synthesizer.synthesize_batch), synthesizer.sample_rate,
+                           clean=synthesizer.tokenizer.text_cleaner, shard_size=2)
+    bulk.run(records(), log=lambda message: None)
+    # rerunning the same input finds every shard done
+    assert bulk.run(records(), log=lambda message: None) == load_manifest(tmp_path)
+
+    edited = list(TEXTS)
+    edited[1] = "نَجْم"
+    with pytest.raises(ValueError, match="shard-00000"):
+        bulk.run(records(edited), log=lambda message: None)
+
+
+def test_bulk_synthesizer_isolates_failures(export_dir, tmp_path):
+    synthesizer = Synthesizer.init_from_path(export_dir)
+
+    def synthesize_batch(texts):
+        if "قَمَر" in texts:
+            raise ValueError("bad text")
+        return synthesizer.synthesize_batch(texts)
+
+    bulk = BulkSynthesizer(tmp_path, inline_submit(synthesize_batch), synthesizer.sample_rate,
+                           bucketer=LengthBucketer([64], max_batch_size=8))
+    manifest = bulk.run(records(["قَمَر", "شَمْس", "يَا صَدِيقِي"]), log=lambda message: None)
+    assert manifest["shards"]["shard-00000"]["num_failed"] == 1
+    index, members = read_shard(tmp_path, "shard-00000")
+    assert [(entry["id"], entry["audio"]) for entry in index["failed"]] == [("line-00000000", "shard-00000.tar/00000000.wav")]
+    assert [entry["text"] for entry in index["entries"]] == ["شَمْس", "يَا صَدِيقِي"]
+    assert len(members) == 2
+    np.testing.assert_array_equal(np.frombuffer(members["00000001.wav"][44:], dtype=np.int16).size,
+                                  synthesizer.synthesize("شَمْس").size)
+
+
+def test_bulk_synthesizer_fails_duplicates_of_failures(export_dir, tmp_path):
+    synthesizer = Synthesizer.init_from_path(export_dir)
+
+    def synthesize_batch(texts):
+        if "قَمَر" in texts:
+            raise ValueError("bad text")
+        return synthesizer.synthesize_batch(texts)
+
+    bulk = BulkSynthesizer(tmp_path, inline_submit(synthesize_batch), synthesizer.sample_rate, shard_size=2)
+    manifest = bulk.run(records(["قَمَر", "شَمْس", "قَمَر", "يَا صَدِيقِي", "قَمَر", "شَمْس"]), log=lambda message: None)
+    # the duplicates of the failed text point to a member that was never written
+    for name, failed_lines, entry_lines in [("shard-00000", [0, 2], [1]), ("shard-00001", [4], [3, 5])]:
+        index, members = read_shard(tmp_path, name)
+        assert [entry["line"] for entry in index["failed"]] == failed_lines
+        assert [entry["line"] for entry in index["entries"]] == entry_lines
+        assert all(entry["audio"].split("/")[1] in members for entry in index["entries"]
+                   if entry["audio"].startswith(name))
+    assert [shard["num_failed"] for shard in manifest["shards"].values()] == [2, 1]
+    assert [shard["num_duplicates"] for shard in manifest["shards"].values()] == [0, 1]
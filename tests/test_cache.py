@@ -0,0 +1,46 @@
+import numpy as np
+from inference.arabspeak import LRUCache, Synthesizer
+
+
+def test_lru_eviction_by_entries():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_eviction_by_bytes():
+    cache = LRUCache(max_bytes=100)
+    cache.put("a", np.zeros(10, dtype=np.float32))
+    cache.put("b", np.zeros(10, dtype=np.float32))
+    cache.put("c", np.zeros(10, dtype=np.float32))
+    assert "a" not in cache and len(cache) == 2
+    assert cache.nbytes == 80
+    cache.put("big", np.zeros(100, dtype=np.float32))
+    assert "big" not in cache
+
+
+def test_lru_counters():
+    cache = LRUCache(max_entries=1)
+    assert cache.get("a") is None
+    cache.put("a", 1)
+    cache.get("a")
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_synthesizer_caches(export_dir):
+    synthesizer = Synthesizer.init_from_path(export_dir, encode_cache_size=8, audio_cache_bytes=1 << 20)
+    texts = ["السَّلامُ عَلَيكُم", "يَا صَدِيقِي"]
+    first = synthesizer.synthesize_batch(texts)
+    second = synthesizer.synthesize_batch(texts)
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+        assert not b.flags.writeable
+    assert synthesizer.encode_cache.stats()["hits"] == 2
+    assert synthesizer.audio_cache.stats()["hits"] == 2
+    synthesizer.length_scale = 2.0
+    np.testing.assert_array_equal(synthesizer.synthesize(texts[0]), first[0] * 2)
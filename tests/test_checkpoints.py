@@ -0,0 +1,113 @@
+import copy
+import json
+import pickle
+import threading
+
+import pytest
+
+from training.arabic_tts.checkpoints import INDEX_FILE, CheckpointManager
+
+
+def pickle_save(state, path):
+    with open(path, "wb") as f:
+        pickle.dump(state, f)
+
+
+def load(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def make_manager(directory, **kwargs):
+    return CheckpointManager(directory, save_func=kwargs.pop("save_func", pickle_save), snapshot=copy.deepcopy, **kwargs)
+
+
+def test_save_indexes_checkpoints(tmp_path):
+    with make_manager(tmp_path) as manager:
+        for step, loss in [(100, 0.5), (200, 0.3), (300, 0.4)]:
+            state = {"step": step, "epoch": step // 100, "model_loss": loss, "model": {"w": [step]}}
+            manager.save(state, tmp_path / f"checkpoint_{step}.pth")
+            # the snapshot is saved, not the state the training loop keeps mutating
+            state["model"]["w"].append(-1)
+
+    assert load(tmp_path / "checkpoint_200.pth")["model"] == {"w": [200]}
+    assert not list(tmp_path.glob("*.tmp"))
+    with open(tmp_path / INDEX_FILE, "r") as f:
+        index = json.load(f)
+    assert [entry["step"] for entry in index["checkpoints"]] == [100, 200, 300]
+    assert index["checkpoints"][1]["metrics"] == {"model_loss": 0.3}
+    assert index["checkpoints"][1]["size"] == (tmp_path / "checkpoint_200.pth").stat().st_size
+
+    manager = make_manager(tmp_path)
+    assert manager.latest() == tmp_path / "checkpoint_300.pth"
+    assert manager.best() == tmp_path / "checkpoint_200.pth"
+
+    # files removed by the trainer are skipped and dropped from the index on the next save
+    (tmp_path / "checkpoint_300.pth").unlink()
+    (tmp_path / "checkpoint_200.pth").unlink()
+    assert manager.latest() == tmp_path / "checkpoint_100.pth"
+    assert manager.best() == tmp_path / "checkpoint_100.pth"
+    manager.save({"step": 400}, tmp_path / "checkpoint_400.pth", wait=True)
+    assert [entry["step"] for entry in manager.entries()] == [100, 400]
+
+
+def test_save_indexes_dict_losses(tmp_path):
+    # recent coqui trainers save the train and eval losses together
+    losses = [(100, 0.5, 0.9), (200, 0.3, 0.7), (300, 0.2, 0.8)]
+    with make_manager(tmp_path) as manager:
+        for step, train_loss, eval_loss in losses:
+            state = {"step": step, "model_loss": {"train_loss": train_loss, "eval_loss": eval_loss}}
+            manager.save(state, tmp_path / f"checkpoint_{step}.pth")
+        manager.save({"step": 400, "model_loss": {"train_loss": 0.1, "eval_loss": None}}, tmp_path / "checkpoint_400.pth")
+
+    manager = make_manager(tmp_path)
+    assert manager.entries()[1]["metrics"] == {"train_loss": 0.3, "eval_loss": 0.7}
+    assert manager.entries()[3]["metrics"] == {"train_loss": 0.1}
+    assert manager.best() == tmp_path / "checkpoint_200.pth"
+    assert manager.best("train_loss") == tmp_path / "checkpoint_400.pth"
+    assert manager.best("model_loss") is None
+
+
+def test_save_runs_in_background(tmp_path):
+    release = threading.Event()
+
+    def slow_save(state, path):
+        release.wait(5)
+        pickle_save(state, path)
+
+    manager = make_manager(tmp_path, save_func=slow_save)
+    manager.save({"step": 1}, tmp_path / "checkpoint_1.pth")
+    assert not (tmp_path / "checkpoint_1.pth").exists()
+    assert manager.latest() is None
+    release.set()
+    manager.wait()
+    assert manager.latest() == tmp_path / "checkpoint_1.pth"
+
+    # best models are copied by coqui right after saving, so they are written before returning
+    release.clear()
+    timer = threading.Timer(0.05, release.set)
+    timer.start()
+    manager.save_model({"step": 2, "model_loss": 0.1}, str(tmp_path / "best_model_2.pth"))
+    assert (tmp_path / "best_model_2.pth").exists()
+    assert manager.best() == tmp_path / "best_model_2.pth"
+
+
+def test_save_errors_are_raised(tmp_path):
+    def failing_save(state, path):
+        raise OSError("disk full")
+
+    manager = make_manager(tmp_path, save_func=failing_save)
+    manager.save({"step": 1}, tmp_path / "checkpoint_1.pth")
+    with pytest.raises(RuntimeError):
+        manager.close()
+    assert not (tmp_path / "checkpoint_1.pth").exists()
+
+
+def test_latest_indexes_older_runs(tmp_path):
+    for step in (5, 1000, 20):
+        pickle_save({"step": step}, tmp_path / f"checkpoint_{step}.pth")
+    (tmp_path / "best_model.pth").touch()
+
+    assert make_manager(tmp_path).latest() == tmp_path / "checkpoint_1000.pth"
+    assert [entry["step"] for entry in make_manager(tmp_path).entries()] == [1000]
+    assert make_manager(tmp_path / "missing").latest() is None
@@ -0,0 +1,60 @@
+from inference.arabspeak.components.text import TextCleaner, clean_batch, clean_text, split_segments
+
+
+def test_clean_text_symbols():
+    assert clean_text("مرحبا،  كيف الحال؟") == "مرحبا, كيف الحال?"
+
+
+def test_split_segments():
+    assert split_segments("أ, ب? ج. د") == ["أ,", "ب?", "ج.", "د"]
+
+
+def test_split_segments_skips_empty():
+    assert split_segments(", . ?") == []
+
+
+def test_split_segments_max_chars():
+    segments = split_segments("كلمة كلمة كلمة كلمة.", max_chars=10)
+    assert segments == ["كلمة كلمة", "كلمة كلمة."]
+    assert all(len(s) <= 10 for s in segments)
+
+
+def test_text_cleaner_matches_steps():
+    from inference.arabspeak.components.text.cleaners import (
+        collapse_whitespace,
+        expand_abbreviations,
+        remove_aux_symbols,
+        replace_symbols,
+    )
+    text = "أ.د.م. محمد و د. علي (قال) \"نعم\" - [x] <y> ا.د: ؟  \t  "
+    expected = collapse_whitespace(remove_aux_symbols(replace_symbols(expand_abbreviations(text))))
+    assert TextCleaner().clean(text) == expected
+    assert clean_text(text) == expected
+
+
+def test_text_cleaner_abbreviations():
+    assert clean_text("أ.د.م. محمد") == "الأستاذ الدكتور المهندس محمد"
+    assert clean_text("د. علي و م. أحمد") == "الدكتور علي و المهندس أحمد"
+    # expansions are not re-scanned by later patterns
+    assert clean_text("د.م.") == "الدكتورالمهندس"
+
+
+def test_clean_batch():
+    texts = ["مرحبا،  كيف الحال؟", "د. علي"]
+    assert clean_batch(texts) == [clean_text(t) for t in texts]
+
+
+def test_clean_text_verbalizes_numbers():
+    assert clean_text("عام 2020: 15%") == "عام أَلْفَان وَعِشْرُون, خَمْسَةَ عَشَر بِالْمِئَة"
+    assert TextCleaner().clean("عام 2020") == "عام 2020"
+
+
+def test_text_cleaner_config_round_trip():
+    import json
+
+    from inference.arabspeak.components.text.cleaners import default_cleaner
+
+    config = json.loads(json.dumps(default_cleaner().to_config(), ensure_ascii=False))
+    cleaner = TextCleaner.init_from_config(config)
+    text = "أ.د. علي (قال): الـ21 و 1,250.5 في 5/3/2024 - 15%"
+    assert cleaner(text) == clean_text(text)
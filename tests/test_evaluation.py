@@ -0,0 +1,90 @@
+import json
+import shutil
+
+import numpy as np
+import onnx
+import onnx.numpy_helper
+import pytest
+
+from inference.arabspeak.evaluation import (Variant, compare_variant, dtw_mean_cost, format_evaluation,
+                                            mel_cepstral_distance, model_size_bytes, parse_variant, run_evaluation)
+from inference.arabspeak.pool import externalize_model
+
+TEXTS = ["السَّلامُ عَلَيكُم", "يَا صَدِيقِي", "كَيْفَ حَالُكَ"]
+SAMPLE_RATE = 16000
+
+
+def tone(seconds, frequency=220.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def test_parse_variant():
+    assert parse_variant("exports/a") == Variant("a", "exports/a", "model.onnx")
+    assert parse_variant("exports/a/model.int8.onnx") == Variant("a/model.int8.onnx", "exports/a", "model.int8.onnx")
+    assert parse_variant("int8=exports/a/model.int8.onnx") == Variant("int8", "exports/a", "model.int8.onnx")
+
+
+def test_model_size_bytes(export_dir):
+    model_path = export_dir / "model.onnx"
+    model = onnx.load(str(model_path))
+    model.graph.initializer.append(onnx.numpy_helper.from_array(np.zeros(4096, dtype=np.float32), "weights"))
+    onnx.save(model, str(model_path))
+    assert model_size_bytes(model_path) == model_path.stat().st_size
+    external_path = externalize_model(model_path, size_threshold=0)
+    data_path = external_path.with_name(external_path.name + ".data")
+    assert data_path.stat().st_size >= 4096 * 4
+    assert model_size_bytes(external_path) == external_path.stat().st_size + data_path.stat().st_size
+
+
+def test_dtw_mean_cost():
+    cost = np.array([[1.0, 5.0], [2.0, 1.0], [5.0, 3.0]])
+    # the cheapest path (0,0) (1,1) (2,1) costs 5 over 3 steps
+    assert dtw_mean_cost(cost) == pytest.approx(5 / 3)
+    assert dtw_mean_cost(np.zeros((4, 7))) == 0.0
+
+
+def test_mel_cepstral_distance():
+    rng = np.random.default_rng(0)
+    wav = tone(1.0) + 0.01 * rng.standard_normal(SAMPLE_RATE).astype(np.float32)
+    assert mel_cepstral_distance(wav, wav, SAMPLE_RATE) == pytest.approx(0.0, abs=1e-9)
+    # a slower rendition of the same sound is close once aligned, another sound is not
+    slower = np.concatenate([wav, wav[: SAMPLE_RATE // 10]])
+    other = tone(1.0, frequency=1500.0)
+    assert mel_cepstral_distance(wav, slower, SAMPLE_RATE) < mel_cepstral_distance(wav, other, SAMPLE_RATE)
+
+
+def test_compare_variant():
+    reference = [tone(1.0), tone(0.5)]
+    result = compare_variant(reference, [tone(1.1), tone(0.5)], SAMPLE_RATE)
+    assert result["duration_delta"]["max_abs"] == pytest.approx(0.1)
+    assert result["duration_delta"]["mean_abs"] == pytest.approx(0.05)
+    assert result["duration_delta"]["total"] == pytest.approx(0.1 / 1.5)
+    assert result["mcd_db"]["max"] < 1.0
+
+
+def test_run_evaluation(export_dir):
+    shutil.copy(export_dir / "model.onnx", export_dir / "model.copy.onnx")
+    variants = [parse_variant(f"fp32={export_dir}"), parse_variant(f"copy={export_dir / 'model.copy.onnx'}")]
+    report = run_evaluation(variants, TEXTS, repeats=1, isolate=False)
+    assert report["reference"] == "fp32"
+    copy = report["variants"]["copy"]
+    assert copy["mcd_db"]["mean"] == pytest.approx(0.0, abs=1e-9)
+    assert copy["duration_delta"]["max_abs"] == 0.0
+    assert copy["passed"]
+    assert report["selected"] in ("fp32", "copy")
+    assert "passed" not in report["variants"]["fp32"]
+    assert "copy" in format_evaluation(report)
+    json.dumps(report)
+
+    with pytest.raises(ValueError):
+        run_evaluation(variants, TEXTS, reference="int8", isolate=False)
+    with pytest.raises(ValueError):
+        run_evaluation(variants + variants[:1], TEXTS, isolate=False)
+
+
+def test_run_evaluation_isolated(export_dir):
+    report = run_evaluation([parse_variant(str(export_dir))], TEXTS, repeats=1)
+    result = report["variants"][export_dir.name]
+    assert result["rtf"] > 0 and result["peak_rss_mb"] > 0
+    assert report["selected"] == export_dir.name
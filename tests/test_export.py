@@ -0,0 +1,34 @@
+import json
+
+import numpy as np
+import pytest
+
+from training.arabic_tts.export import METADATA_FILE, compare_waveforms, export_variants
+
+SEQUENCES = [[3, 5, 7, 9], [12, 4, 1]]
+
+
+def test_compare_waveforms():
+    reference = np.array([1.0, -1.0, 0.5, 0.25], dtype=np.float32)
+    assert compare_waveforms(reference, reference)["snr_db"] == float("inf")
+    result = compare_waveforms(reference, reference[:2] * 1.1)
+    assert result["length_ratio"] == 0.5
+    assert result["max_abs_diff"] == pytest.approx(0.1)
+    assert result["snr_db"] == pytest.approx(20.0)
+
+
+def test_export_variants(export_dir):
+    metadata = export_variants(export_dir, ["optimized", "ort", "int8", "fp16"], SEQUENCES, sample_rate=16000)
+    assert set(metadata["variants"]) == {"fp32", "optimized", "ort", "int8", "fp16"}
+    for name, variant in metadata["variants"].items():
+        assert (export_dir / variant["file"]).exists()
+        assert variant["size_bytes"] > 0 and variant["rtf"] > 0
+        if name != "fp32":
+            assert variant["parity"]["passed"]
+    with open(export_dir / METADATA_FILE) as f:
+        assert json.load(f) == json.loads(json.dumps(metadata))
+
+
+def test_export_variants_unknown(export_dir):
+    with pytest.raises(ValueError):
+        export_variants(export_dir, ["int4"], SEQUENCES, sample_rate=16000)
@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from inference.arabspeak.audio import float_to_pcm16
+from inference.arabspeak.batching import LengthBucketer
+from inference.arabspeak.synthesizer import Synthesizer
+
+TEXTS = ["السَّلامُ عَلَيكُم", "يَا صَدِيقِي", "كَيْفَ حَالُكَ يَا صَدِيقِي العَزِيز"]
+
+
+def test_io_binding_matches_session_run(export_dir):
+    expected = Synthesizer.init_from_path(export_dir).synthesize_batch(TEXTS)
+    bucketer = LengthBucketer([8, 32], max_batch_size=2)
+    for synthesizer in (Synthesizer.init_from_path(export_dir, io_binding=True),
+                        Synthesizer.init_from_path(export_dir, io_binding=True, bucketer=bucketer)):
+        for wav, reference in zip(synthesizer.synthesize_batch(TEXTS), expected):
+            np.testing.assert_array_equal(wav, reference)
+
+
+def test_bound_session_reuses_buffers(export_dir):
+    bound = Synthesizer.init_from_path(export_dir, io_binding=True).bound_session
+    long, short = np.arange(1, 41), np.arange(1, 6)
+    tokens, _ = bound.pad([long, long])
+    again, lengths = bound.pad([short, long[:20]])
+    assert np.shares_memory(tokens, again)
+    assert again.shape == (2, 20) and lengths.tolist() == [5, 20]
+    assert again[0, 5:].tolist() == [bound.pad_id] * 15
+
+
+def test_io_binding_threads(export_dir):
+    synthesizer = Synthesizer.init_from_path(export_dir, io_binding=True)
+    expected = [synthesizer.synthesize(text) for text in TEXTS]
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(synthesizer.synthesize, TEXTS * 8))
+    for wav, reference in zip(results, expected * 8):
+        np.testing.assert_array_equal(wav, reference)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_float_to_pcm16_inplace(chunk_size):
+    wav = np.random.default_rng(0).normal(scale=0.7, size=1001).astype(np.float32)
+    expected = float_to_pcm16(wav)
+    pcm = float_to_pcm16(wav, inplace=True, chunk_size=chunk_size)
+    assert np.shares_memory(pcm, wav)
+    np.testing.assert_array_equal(pcm, expected)
+
+    readonly = np.zeros(4, dtype=np.float32)
+    readonly.flags.writeable = False
+    assert not np.shares_memory(float_to_pcm16(readonly, inplace=True), readonly)
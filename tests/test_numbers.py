@@ -0,0 +1,56 @@
+import pytest
+
+from inference.arabspeak.components.text import NumberVerbalizer
+
+
+@pytest.fixture(scope="module")
+def verbalizer():
+    return NumberVerbalizer()
+
+
+@pytest.mark.parametrize("n, expected", [
+    (0, "صِفْر"),
+    (12, "اِثْنَا عَشَر"),
+    (15, "خَمْسَةَ عَشَر"),
+    (21, "وَاحِد وَعِشْرُون"),
+    (200, "مِئَتَان"),
+    (3000, "ثَلَاثَة آلَاف"),
+    (11000, "أَحَدَ عَشَر أَلْفًا"),
+    (1234567, "مِلْيُون وَمِئَتَان وَأَرْبَعَة وَثَلَاثُون أَلْفًا وَخَمْسُمِئَة وَسَبْعَة وَسِتُّون"),
+])
+def test_cardinal(verbalizer, n, expected):
+    assert verbalizer.cardinal(n) == expected
+
+
+def test_cardinal_agreement(verbalizer):
+    assert verbalizer.cardinal(13, feminine=True) == "ثَلَاثَ عَشْرَة"
+    assert verbalizer.cardinal(2024, oblique=True) == "أَلْفَيْن وَأَرْبَعَة وَعِشْرِين"
+    assert verbalizer.cardinal(12, oblique=True) == "اِثْنَيْ عَشَر"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1,250.5", "أَلْف وَمِئَتَان وَخَمْسُون فَاصِلَة خَمْسَة"),
+    ("0.05", "صِفْر فَاصِلَة صِفْر خَمْسَة"),
+    ("-3", "سَالِب ثَلَاثَة"),
+    ("007", "صِفْر صِفْر سَبْعَة"),
+    ("١٢٣", "مِئَة وَثَلَاثَة وَعِشْرُون"),
+    ("الـ21 والـ3", "الْحَادِي وَالْعِشْرُون وَالثَّالِث"),
+    ("القرن الـ100 والـ300", "القرن الْمِئَة وَالثَّلَاثُمِئَة"),
+    ("15%", "خَمْسَةَ عَشَر بِالْمِئَة"),
+    ("$3.50", "ثَلَاثَة دُولَارَات وَخَمْسُون سِنْتًا"),
+    ("2 €", "اِثْنَان يُورُو"),
+    ("5/3/2024", "الْخَامِس مِنْ مَارِس سَنَة أَلْفَيْن وَأَرْبَعَة وَعِشْرِين"),
+    ("2024-03-05", "الْخَامِس مِنْ مَارِس سَنَة أَلْفَيْن وَأَرْبَعَة وَعِشْرِين"),
+    ("9:05:02", "السَّاعَة تِسْعَة وَخَمْس دَقَائِق وَثَانِيَتَان"),
+    ("الساعة 14:30", "الساعة أَرْبَعَةَ عَشَر وَثَلَاثُون دَقِيقَة"),
+    ("25:99", "خَمْسَة وَعِشْرُون تِسْعَة وَتِسْعُون"),
+])
+def test_verbalize(verbalizer, text, expected):
+    assert verbalizer(text) == expected
+
+
+def test_verbalize_spacing(verbalizer):
+    assert verbalizer("عندي3كتب") == "عندي ثَلَاثَة كتب"
+    assert verbalizer("عام 2020.") == "عام أَلْفَان وَعِشْرُون."
+    text = "لا أرقام هنا"
+    assert verbalizer(text) is text
@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+import pytest
+from inference.arabspeak.components.text import Phonemizer
+
+CONFIG = Path(__file__).parents[1] / "inference" / "arabspeak" / "components" / "tokenizer.json"
+
+
+def reference_transliterate(mapping, text):
+    # Character by character lookup, as the transliteration was originally written.
+    return "".join(mapping.get(char, char) for char in text)
+
+
+@pytest.fixture
+def phonemizer():
+    with open(CONFIG, "r") as f:
+        config = json.load(f)
+    return Phonemizer.init_from_config(config["phonemizer"])
+
+
+def test_arabic_to_buckwalter(phonemizer):
+    text = "الشَّمْسُ تَغْرُبُ فِي الأُفُقْ، مُلَوِّنَةً 12 abc"
+    expected = reference_transliterate(phonemizer._char_to_phonem, text)
+    assert phonemizer.arabic_to_buckwalter(text) == expected
+    assert phonemizer.arabic_to_buckwalter("شمس") == "$ms"
+
+
+def test_buckwalter_round_trip(phonemizer):
+    text = "الشَّمْسُ تَغْرُبُ"
+    assert phonemizer.buckwalter_to_arabic(phonemizer.arabic_to_buckwalter(text)) == text
+
+
+def test_multi_character_mapping():
+    phonemizer = Phonemizer({"ش": "sh", "م": "m", "ab": "X"})
+    assert phonemizer.arabic_to_buckwalter("شمab") == "shmab"
+    assert phonemizer.buckwalter_to_arabic("shm") == "shم"
+
+
+def test_phonemize_batch(phonemizer):
+    texts = ["شمس", "", "قمر\x00", "سماء"]
+    assert phonemizer.phonemize_batch(texts) == [phonemizer.phonemize(t) for t in texts]
+    assert phonemizer.phonemize_batch(texts[:2]) == ["$ms", ""]
+    assert phonemizer.phonemize_batch([]) == []
@@ -0,0 +1,51 @@
+import numpy as np
+import onnx
+import pytest
+import onnxruntime as ort
+from onnx import TensorProto, helper, numpy_helper
+from inference.arabspeak import Synthesizer
+from inference.arabspeak.pool import EXTERNAL_DATA_ALIGNMENT, SynthesizerPool, externalize_model
+
+TEXTS = ["السَّلامُ عَلَيكُم", "يَا صَدِيقِي", "كَيْفَ حَالُكَ", "الكَلََامْ " * 5, "قَمَر"]
+
+
+def test_externalize_model(tmp_path):
+    weights = np.random.rand(64, 64).astype(np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["x", "w"], ["y"])],
+        "matmul",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 64])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 64])],
+        [numpy_helper.from_array(weights, "w")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 15)])
+    model.ir_version = 8
+    onnx.save(model, str(tmp_path / "model.onnx"))
+
+    path = externalize_model(tmp_path / "model.onnx")
+    tensor = onnx.load(str(path), load_external_data=False).graph.initializer[0]
+    assert tensor.data_location == TensorProto.EXTERNAL
+    offset = int({entry.key: entry.value for entry in tensor.external_data}["offset"])
+    assert offset % EXTERNAL_DATA_ALIGNMENT == 0
+    assert externalize_model(tmp_path / "model.onnx") == path
+
+    x = np.random.rand(1, 64).astype(np.float32)
+    session = ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+    np.testing.assert_allclose(session.run(None, {"x": x})[0], x @ weights, rtol=1e-5)
+
+
+def test_pool_matches_synthesizer(export_dir):
+    expected = Synthesizer.init_from_path(export_dir).synthesize_batch(TEXTS)
+    with SynthesizerPool(export_dir, num_workers=2) as pool:
+        wavs = pool.synthesize_batch(TEXTS, batch_size=2)
+        batches = pool.map_batches([TEXTS[:1], TEXTS[1:]])
+    for a, b in zip(expected, wavs):
+        np.testing.assert_array_equal(a, b)
+    assert [len(b) for b in batches] == [1, 4]
+
+
+def test_pool_propagates_errors(export_dir):
+    with SynthesizerPool(export_dir, num_workers=1) as pool:
+        future = pool.submit(["@@@"])
+        with pytest.raises(ValueError):
+            future.result(timeout=30)
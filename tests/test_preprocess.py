@@ -0,0 +1,124 @@
+import json
+import wave
+
+import numpy as np
+import pytest
+
+from training.arabic_tts.preprocess import (MANIFEST_FILE, PreprocessedCorpus, PreprocessedTokenizer,
+                                            preprocess_metadata, read_pcm16)
+
+LINES = ["a_1|ab", "a_2|abc", "", "a_3|bad", "a_4|a", "a_5|bcd"]
+
+
+class FakeProcessor:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, audio_id, text):
+        self.calls += 1
+        if text == "bad":
+            raise ValueError("broken wav")
+        mel = np.arange(2 * len(text), dtype=np.float32).reshape(2, -1)
+        return {"token_ids": np.array([ord(c) for c in text], dtype=np.int32), "num_samples": 100 * len(text),
+                "num_frames": mel.shape[1], "mel_sum": mel.sum(axis=1), "mel_sq_sum": (mel ** 2).sum(axis=1)}
+
+
+@pytest.fixture
+def metadata(tmp_path):
+    path = tmp_path / "metadata.txt"
+    path.write_text("\n".join(LINES), encoding="utf-16")
+    return path
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_preprocess_metadata(metadata, tmp_path, num_workers):
+    manifest = preprocess_metadata(metadata, tmp_path / "out", FakeProcessor(), num_workers=num_workers, shard_size=2)
+    assert sorted(manifest["shards"]) == ["shard-00000", "shard-00001", "shard-00002"]
+    assert manifest["shards"]["shard-00001"]["failed"] == {"a_3": "ValueError: broken wav"}
+    assert manifest["mel_stats"]["num_frames"] == 2 + 3 + 1 + 3
+
+    corpus = PreprocessedCorpus(tmp_path / "out")
+    assert len(corpus) == 4 and "a_3" not in corpus
+    item = corpus.get("a_5")
+    assert item["token_ids"].tolist() == [ord(c) for c in "bcd"]
+    assert item["num_samples"] == 300 and isinstance(item["token_ids"], np.memmap)
+    assert [corpus[i]["audio_id"] for i in range(len(corpus))] == ["a_1", "a_2", "a_4", "a_5"]
+
+
+def test_preprocess_metadata_resumes(metadata, tmp_path):
+    output_path = tmp_path / "out"
+    preprocess_metadata(metadata, output_path, FakeProcessor(), shard_size=2)
+    with open(output_path / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    del manifest["shards"]["shard-00002"]
+    with open(output_path / MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f)
+
+    processor = FakeProcessor()
+    manifest = preprocess_metadata(metadata, output_path, processor, shard_size=2)
+    assert processor.calls == 2 and len(manifest["shards"]) == 3
+    with pytest.raises(ValueError):
+        preprocess_metadata(metadata, output_path, processor, shard_size=3)
+
+
+def test_preprocessed_tokenizer(metadata, tmp_path):
+    class Tokenizer:
+        add_blank = True
+
+        def text_to_ids(self, text, language=None):
+            return [0]
+
+    preprocess_metadata(metadata, tmp_path / "out", FakeProcessor(), shard_size=2)
+    tokenizer = PreprocessedTokenizer(Tokenizer(), PreprocessedCorpus(tmp_path / "out"))
+    assert list(tokenizer.text_to_ids("abc")) == [97, 98, 99]
+    assert tokenizer.text_to_ids("zzz") == [0] and tokenizer.misses == 1
+    assert tokenizer.add_blank and not tokenizer.use_phonemes
+
+
+class AudioProcessor(FakeProcessor):
+    def __call__(self, audio_id, text):
+        result = super().__call__(audio_id, text)
+        result["audio"] = np.full(result["num_samples"], len(text), dtype=np.int16)
+        return result
+
+
+def test_preprocess_metadata_stores_audio(metadata, tmp_path):
+    manifest = preprocess_metadata(metadata, tmp_path / "out", AudioProcessor(), shard_size=2)
+    assert [shard["audio"] for shard in manifest["shards"].values()] == [True, False, True]
+
+    corpus = PreprocessedCorpus(tmp_path / "out")
+    assert corpus.has_audio
+    for audio_id, text in [("a_1", "ab"), ("a_2", "abc"), ("a_4", "a"), ("a_5", "bcd")]:
+        audio = corpus.get(audio_id)["audio"]
+        assert isinstance(audio, np.memmap) and audio.dtype == np.int16
+        assert audio.size == 100 * len(text) and (audio == len(text)).all()
+
+
+class TrimmedAudioProcessor(FakeProcessor):
+    def __call__(self, audio_id, text):
+        result = super().__call__(audio_id, text)
+        # the stored samples and the length measured for the mel can differ
+        result["audio"] = np.full(result["num_samples"] - 7, len(text), dtype=np.int16)
+        return result
+
+
+def test_preprocess_metadata_offsets_follow_stored_audio(metadata, tmp_path):
+    preprocess_metadata(metadata, tmp_path / "out", TrimmedAudioProcessor(), shard_size=10)
+    corpus = PreprocessedCorpus(tmp_path / "out")
+    for audio_id, text in [("a_1", "ab"), ("a_2", "abc"), ("a_4", "a"), ("a_5", "bcd")]:
+        item = corpus.get(audio_id)
+        assert item["num_samples"] == item["audio"].size == 100 * len(text) - 7
+        assert (item["audio"] == len(text)).all()
+
+
+def test_read_pcm16(tmp_path):
+    samples = np.array([0, 1, -1, 32767, -32768], dtype=np.int16)
+    path = tmp_path / "a.wav"
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(samples.tobytes())
+    assert read_pcm16(path, 16000).tolist() == samples.tolist()
+    with pytest.raises(ValueError):
+        read_pcm16(path, 22050)
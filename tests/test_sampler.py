@@ -0,0 +1,39 @@
+import numpy as np
+
+from training.arabic_tts.sampler import FrameBudgetBatchSampler, build_length_index
+
+FRAMES = np.random.default_rng(0).integers(50, 800, size=500)
+
+
+def test_batches_respect_budget_and_cover_samples():
+    sampler = FrameBudgetBatchSampler(FRAMES, max_frames=4000, max_batch_size=32)
+    batches = list(sampler)
+    assert sorted(i for batch in batches for i in batch) == list(range(FRAMES.size))
+    for batch in batches:
+        assert len(batch) <= 32
+        assert FRAMES[batch].max() * len(batch) <= 4000
+
+
+def test_plan_is_seeded_per_epoch():
+    sampler = FrameBudgetBatchSampler(FRAMES, max_frames=4000)
+    first, second = sampler.plan(0), sampler.plan(1)
+    assert first != second
+    assert FrameBudgetBatchSampler(FRAMES, max_frames=4000).plan(1) == second
+    assert list(sampler) == first and sampler.epoch == 1 and len(sampler) == len(second)
+
+
+def test_padding_efficiency_and_oversized():
+    sampler = FrameBudgetBatchSampler(list(FRAMES) + [5000], max_frames=4000, tokens=np.ones(FRAMES.size + 1), max_tokens=8)
+    stats = sampler.stats()
+    assert stats["oversized"] == 1 and stats["padding_efficiency"] > 0.9
+    assert all(len(batch) <= 8 for batch in sampler.plan())
+
+
+def test_build_length_index_prefers_corpus():
+    class Corpus:
+        def get(self, audio_id):
+            return {"num_samples": 2560, "token_ids": np.zeros(7)} if audio_id == "a_1" else None
+
+    samples = [{"audio_file": "wavs/a_1.wav", "text": "ab"}, {"audio_file": "wavs/a_2.wav", "audio_length": 512, "text_length": 3}]
+    lengths = build_length_index(samples, hop_length=256, corpus=Corpus())
+    assert lengths["frames"].tolist() == [10, 2] and lengths["tokens"].tolist() == [7, 3]
@@ -0,0 +1,112 @@
+import asyncio
+import io
+import json
+import threading
+import wave
+
+import numpy as np
+import pytest
+from inference.arabspeak import Synthesizer
+from inference.arabspeak.batching import MicroBatcher, QueueFullError
+from inference.arabspeak.server import SynthesisServer
+
+
+def test_micro_batcher_groups_requests():
+    calls = []
+
+    def synthesize_batch(texts):
+        calls.append(list(texts))
+        return [np.full(3, len(t), dtype=np.float32) for t in texts]
+
+    async def main():
+        batcher = MicroBatcher(synthesize_batch, max_batch_size=4, max_wait=0.05)
+        results = await asyncio.gather(*[batcher.submit("x" * i) for i in range(1, 7)])
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+    assert [r[0] for r in results] == [1, 2, 3, 4, 5, 6]
+    assert [len(c) for c in calls] == [4, 2]
+
+
+def test_micro_batcher_isolates_failures():
+    def synthesize_batch(texts):
+        if "bad" in texts:
+            raise ValueError("bad text")
+        return [np.zeros(1, dtype=np.float32) for _ in texts]
+
+    async def main():
+        batcher = MicroBatcher(synthesize_batch, max_batch_size=4, max_wait=0.05)
+        results = await asyncio.gather(batcher.submit("ok"), batcher.submit("bad"), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    ok, bad = asyncio.run(main())
+    assert isinstance(ok, np.ndarray)
+    assert isinstance(bad, ValueError)
+
+
+def test_micro_batcher_backpressure():
+    release = threading.Event()
+
+    def synthesize_batch(texts):
+        release.wait()
+        return [np.zeros(1, dtype=np.float32) for _ in texts]
+
+    async def main():
+        batcher = MicroBatcher(synthesize_batch, max_batch_size=1, max_wait=0, max_queue_size=1)
+        first = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(batcher.submit("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await batcher.submit("c")
+        release.set()
+        await asyncio.gather(first, second)
+        await batcher.stop()
+
+    asyncio.run(main())
+
+
+async def request(app, method, path, body=b""):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path}, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"]), b"".join(message["body"] for message in sent[1:])
+
+
+def test_server_synthesize(export_dir):
+    synthesizer = Synthesizer.init_from_path(export_dir)
+    app = SynthesisServer(MicroBatcher(synthesizer.synthesize_batch, max_wait=0.01), sample_rate=synthesizer.sample_rate)
+    text = "السَّلامُ عَلَيكُم"
+
+    async def main():
+        body = json.dumps({"text": text}).encode()
+        wav_response = await request(app, "POST", "/synthesize", body)
+        pcm_response = await request(app, "POST", "/synthesize", json.dumps({"text": text, "format": "pcm"}).encode())
+        errors = [
+            await request(app, "POST", "/synthesize", b"{}"),
+            await request(app, "GET", "/synthesize"),
+            await request(app, "GET", "/missing"),
+        ]
+        health = await request(app, "GET", "/health")
+        await app.batcher.stop()
+        return wav_response, pcm_response, errors, health
+
+    wav_response, pcm_response, errors, health = asyncio.run(main())
+    status, headers, body = wav_response
+    assert status == 200 and headers[b"content-type"] == b"audio/wav"
+    with wave.open(io.BytesIO(body)) as f:
+        assert f.getframerate() == synthesizer.sample_rate
+        assert f.getnframes() == synthesizer.synthesize(text).size
+    status, _, body = pcm_response
+    assert status == 200 and len(body) == 2 * synthesizer.synthesize(text).size
+    assert [e[0] for e in errors] == [400, 405, 404]
+    assert health[0] == 200 and json.loads(health[2])["requests"] == 2
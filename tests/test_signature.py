@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import onnx
+import pytest
+
+from inference.arabspeak.signature import SIGNATURE_FILE, ModelSignature
+from inference.arabspeak.synthesizer import Synthesizer, make_warmup_profiles
+from training.arabic_tts.export import get_signature, save_signature
+
+TEXT = "السَّلامُ عَلَيكُم"
+
+
+def test_export_signature_round_trip(export_dir):
+    config = get_signature(export_dir / "model.onnx")
+    assert [spec["role"] for spec in config["inputs"]] == ["tokens", "lengths", "scales"]
+    assert config["inputs"][0]["dynamic_axes"] == {"0": "batch_size", "1": "phonemes"}
+    signature = ModelSignature.init_from_config(config)
+    assert signature["scales"].dtype == "float32"
+    assert signature.to_config() == config
+
+
+def test_export_signature_by_name(export_dir):
+    model = onnx.load(str(export_dir / "model.onnx"))
+    inputs = list(model.graph.input)
+    del model.graph.input[:]
+    model.graph.input.extend(inputs[::-1])
+    onnx.save(model, str(export_dir / "model.onnx"))
+    config = get_signature(export_dir / "model.onnx")
+    assert [(spec["name"], spec["role"]) for spec in config["inputs"]] == [
+        ("scales", "scales"), ("input_lengths", "lengths"), ("input", "tokens")]
+    assert [spec["role"] for spec in config["outputs"]] == ["audio", "audio_lengths"]
+
+    model.graph.input[0].name = "noise_scale"
+    onnx.save(model, str(export_dir / "model.onnx"))
+    with pytest.raises(ValueError, match="unknown inputs \\['noise_scale'\\]"):
+        get_signature(export_dir / "model.onnx")
+
+
+def test_bind_by_name_with_reordered_inputs(export_dir):
+    expected = Synthesizer.init_from_path(export_dir).synthesize(TEXT)
+    save_signature(export_dir / SIGNATURE_FILE, get_signature(export_dir / "model.onnx"))
+    model = onnx.load(str(export_dir / "model.onnx"))
+    inputs = list(model.graph.input)
+    del model.graph.input[:]
+    model.graph.input.extend(inputs[::-1])
+    onnx.save(model, str(export_dir / "model.onnx"))
+
+    synthesizer = Synthesizer.init_from_path(export_dir)
+    assert list(synthesizer.prepare_inputs([np.zeros((1, 2), dtype=np.int32), np.ones(1), synthesizer.scales])) == ["input", "input_lengths", "scales"]
+    np.testing.assert_array_equal(synthesizer.synthesize(TEXT), expected)
+
+
+def test_validate_rejects_mismatch(export_dir):
+    config = get_signature(export_dir / "model.onnx")
+    config["inputs"][2]["dtype"] = "float16"
+    config["inputs"][0]["shape"] = [1, "phonemes"]
+    with open(export_dir / SIGNATURE_FILE, "w") as f:
+        json.dump(config, f)
+    with pytest.raises(ValueError, match="axis 0 is batch_size, expected 1.*dtype float32, expected float16"):
+        Synthesizer.init_from_path(export_dir)
+
+
+def test_warmup(export_dir):
+    profiles = make_warmup_profiles([8, 32], batch_sizes=[1, 4])
+    assert profiles == [(1, 8), (1, 32), (4, 8), (4, 32)]
+    synthesizer = Synthesizer.init_from_path(export_dir, warmup_profiles=profiles)
+    assert set(synthesizer.warmup(profiles)) == set(profiles)
@@ -0,0 +1,132 @@
+import json
+import os
+import wave
+
+import numpy as np
+import onnx
+import pytest
+from inference.arabspeak import Synthesizer
+from inference.arabspeak.cache import file_fingerprint
+from inference.arabspeak.components.text import TextCleaner
+from inference.arabspeak.synthesizer import COMPILED_TOKENIZER_FILE, TOKENIZER_CONFIG_FILE, load_tokenizer
+
+TEXTS = [
+    "الشَّمْسُ تَغْرُبُ فِي الأُفُقْ، مُلَوِّنَةً السَّمَاءَ بِألْوَانٍ دَافِئَةٍ.",
+    "وَرَجَحَتْ مَدْرَسَةْ سُعُودُ الثَانَوِيَّةُ.",
+    "الكَلََامْ",
+]
+
+
+@pytest.fixture
+def synthesizer(export_dir):
+    return Synthesizer.init_from_path(export_dir)
+
+
+def test_synthesize(synthesizer):
+    wav = synthesizer.synthesize(TEXTS[0])
+    expected = np.array(synthesizer.tokenizer.encode(TEXTS[0]), dtype=np.float32)
+    assert wav.dtype == np.float32
+    np.testing.assert_array_equal(wav, expected)
+
+
+def test_synthesize_batch_matches_single(synthesizer):
+    wavs = synthesizer.synthesize_batch(TEXTS)
+    assert len(wavs) == len(TEXTS)
+    for text, wav in zip(TEXTS, wavs):
+        np.testing.assert_array_equal(wav, synthesizer.synthesize(text))
+
+
+def test_synthesize_batch_keeps_quiet_rows(export_dir):
+    # rows are cut to the lengths returned by the model, not by amplitude
+    quiet = Synthesizer.init_from_path(export_dir, length_scale=1e-7)
+    wavs = quiet.synthesize_batch(TEXTS)
+    for text, wav in zip(TEXTS, wavs):
+        assert wav.size == quiet.tokenizer.encode_array(text).size
+        assert np.abs(wav).max() < 1e-4
+
+
+def test_synthesize_batch_without_output_lengths(export_dir):
+    model = onnx.load(str(export_dir / "model.onnx"))
+    del model.graph.output[1]
+    del model.graph.node[-1]
+    onnx.save(model, str(export_dir / "model.onnx"))
+    synthesizer = Synthesizer.init_from_path(export_dir)
+    assert "audio_lengths" not in synthesizer.signature
+    width = max(synthesizer.tokenizer.encode_array(text).size for text in TEXTS)
+    wavs = synthesizer.synthesize_batch(TEXTS)
+    # without the lengths, rows are returned whole, padded tail included
+    assert [wav.size for wav in wavs] == [width] * len(TEXTS)
+    np.testing.assert_array_equal(wavs[2][:synthesizer.synthesize(TEXTS[2]).size], synthesizer.synthesize(TEXTS[2]))
+
+
+def test_synthesize_batch_empty(synthesizer):
+    assert synthesizer.synthesize_batch([]) == []
+
+
+def test_init_from_path_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Synthesizer.init_from_path(tmp_path)
+
+
+def test_synthesize_stream_segments(synthesizer):
+    text = "السَّلامُ عَلَيكُم، يَا صَدِيقِي. كَيْفَ حَالُكَ؟"
+    chunks = list(synthesizer.synthesize_stream(text))
+    expected = [synthesizer.synthesize(s) for s in ["السَّلامُ عَلَيكُم,", "يَا صَدِيقِي.", "كَيْفَ حَالُكَ?"]]
+    assert len(chunks) == 3
+    for chunk, wav in zip(chunks, expected):
+        np.testing.assert_array_equal(chunk, wav)
+
+
+def test_synthesize_stream_cleans_once(synthesizer):
+    cleaner = synthesizer.tokenizer.text_cleaner
+    calls = []
+    synthesizer.tokenizer.text_cleaner = lambda text: calls.append(text) or cleaner(text)
+    text = "السَّلامُ عَلَيكُم، يَا صَدِيقِي. كَيْفَ حَالُكَ؟"
+    assert len(list(synthesizer.synthesize_stream(text))) == 3
+    assert calls == [text]
+
+
+def test_synthesize_stream_silence(synthesizer):
+    text = "السَّلامُ عَلَيكُم، يَا صَدِيقِي."
+    chunks = list(synthesizer.synthesize_stream(text, silence=0.01))
+    assert len(chunks) == 3
+    assert not chunks[1].any() and chunks[1].size == 160
+
+
+def test_synthesize_stream_crossfade_length(synthesizer):
+    text = "السَّلامُ عَلَيكُم، يَا صَدِيقِي. كَيْفَ حَالُكَ؟"
+    plain = np.concatenate(list(synthesizer.synthesize_stream(text)))
+    faded = np.concatenate(list(synthesizer.synthesize_stream(text, crossfade=0.0005)))
+    assert faded.size == plain.size - 2 * 8
+
+
+def test_load_tokenizer_checks_compiled_source(export_dir):
+    config_path = export_dir / TOKENIZER_CONFIG_FILE
+    tokenizer = load_tokenizer(export_dir)
+    tokenizer.save_compiled(export_dir / COMPILED_TOKENIZER_FILE, source_fingerprint=file_fingerprint(config_path))
+    # the cleaner of a compiled tokenizer is rebuilt from the artifact
+    assert isinstance(load_tokenizer(export_dir).text_cleaner, TextCleaner)
+
+    # an edited config is not covered by the artifact, whatever the file times say
+    config = json.loads(config_path.read_text())
+    config["use_eos_bos"] = not tokenizer.use_eos_bos
+    config_path.write_text(json.dumps(config))
+    stale = (export_dir / COMPILED_TOKENIZER_FILE).stat().st_mtime - 10
+    os.utime(config_path, (stale, stale))
+    assert load_tokenizer(export_dir).use_eos_bos != tokenizer.use_eos_bos
+
+
+def test_load_tokenizer_falls_back_on_broken_compiled(export_dir, capsys):
+    expected = load_tokenizer(export_dir).fingerprint
+    for content in ("{not json", '{"version": 3, "config": {}}', '{"version": 3, "source_fingerprint": null, "config": {"characters": {}}}'):
+        (export_dir / COMPILED_TOKENIZER_FILE).write_text(content)
+        assert load_tokenizer(export_dir).fingerprint == expected
+        assert "Falling back" in capsys.readouterr().out
+
+
+def test_synthesize_to(synthesizer, tmp_path):
+    text = "السَّلامُ عَلَيكُم، كَيْفَ حَالُكَ؟"
+    expected = np.concatenate(list(synthesizer.synthesize_stream(text)))
+    num_samples = synthesizer.synthesize_to(text, tmp_path / "out.wav")
+    with wave.open(str(tmp_path / "out.wav")) as f:
+        assert f.getnframes() == num_samples == expected.size
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from inference.arabspeak.components.text import Tokenizer
+
+
+@pytest.mark.parametrize("add_blank", [False, True])
+@pytest.mark.parametrize("use_eos_bos", [False, True])
+def test_encode_array_matches_encode(add_blank, use_eos_bos, make_tokenizer, tokenizer_texts):
+    tokenizer = make_tokenizer(add_blank, use_eos_bos)
+    for text in tokenizer_texts:
+        token_ids = tokenizer.encode_array(text)
+        assert token_ids.dtype == np.int64
+        assert token_ids.tolist() == tokenizer.encode(text)
+
+
+def test_encode_array_records_unknown_characters(capsys, make_tokenizer):
+    tokenizer = make_tokenizer()
+    tokenizer.encode_array("@# @")
+    assert tokenizer.unknown_characters == {"@", "#"}
+    assert capsys.readouterr().out == ""
+
+
+def test_array_helpers(make_tokenizer):
+    tokenizer = make_tokenizer()
+    ids = np.array([5, 6], dtype=np.int64)
+    chars = tokenizer.characters
+    assert tokenizer.intersperse_blank_char(ids).tolist() == [chars.blank_id, 5, chars.blank_id, 6, chars.blank_id]
+    assert tokenizer.pad_with_bos_eos(ids).tolist() == [chars.bos_id, 5, 6, chars.eos_id]
+
+
+def test_encode_batch(make_tokenizer, tokenizer_texts):
+    tokenizer = make_tokenizer()
+    batch = tokenizer.encode_batch(tokenizer_texts, return_attention_mask=True)
+    assert batch.tokens.dtype == np.int64
+    assert batch.tokens.shape == (len(tokenizer_texts), batch.lengths.max())
+    for row, text in enumerate(tokenizer_texts):
+        expected = tokenizer.encode(text)
+        assert batch.lengths[row] == len(expected)
+        assert batch.tokens[row, : len(expected)].tolist() == expected
+        assert (batch.tokens[row, len(expected):] == tokenizer.characters.pad_id).all()
+        assert batch.attention_mask[row].sum() == len(expected)
+    assert batch.inverse_permutation is None
+
+
+def test_encode_batch_padding_options(make_tokenizer, tokenizer_texts):
+    tokenizer = make_tokenizer()
+    batch = tokenizer.encode_batch(tokenizer_texts, pad_to_multiple_of=16, max_length=20)
+    assert batch.tokens.shape == (len(tokenizer_texts), 32)
+    assert batch.lengths.max() == 20
+    assert batch.attention_mask is None
+
+
+def test_encode_batch_sort_by_length(make_tokenizer, tokenizer_texts):
+    tokenizer = make_tokenizer()
+    unsorted = tokenizer.encode_batch(tokenizer_texts)
+    batch = tokenizer.encode_batch(tokenizer_texts, sort_by_length=True)
+    assert (np.diff(batch.lengths) <= 0).all()
+    np.testing.assert_array_equal(batch.tokens[batch.inverse_permutation], unsorted.tokens)
+    np.testing.assert_array_equal(batch.lengths[batch.inverse_permutation], unsorted.lengths)
+
+
+def test_stage_sink(make_tokenizer, tokenizer_texts):
+    from inference.arabspeak.components.text import HistogramSink
+
+    tokenizer = make_tokenizer(add_blank=True, use_eos_bos=True)
+    tokenizer.stage_sink = HistogramSink()
+    expected = tokenizer.encode(tokenizer_texts[0])
+    tokenizer.encode_array(tokenizer_texts[0])
+    summary = tokenizer.stage_sink.summary()
+    assert set(summary) == {"clean", "phonemize", "text_to_ids", "intersperse_blank", "pad_bos_eos", "add_special_tokens"}
+    assert summary["phonemize"]["count"] == 2
+    assert summary["clean"]["p99"] >= summary["clean"]["mean"] > 0
+    tokenizer.stage_sink = None
+    assert tokenizer.encode(tokenizer_texts[0]) == expected
+
+
+def test_compiled_tokenizer_round_trip(tmp_path, make_tokenizer, tokenizer_texts):
+    tokenizer = make_tokenizer(add_blank=True, use_eos_bos=True)
+    tokenizer.save_compiled(tmp_path / "tokenizer.compiled.json")
+    loaded = Tokenizer.load_compiled(tmp_path / "tokenizer.compiled.json")
+    assert loaded.fingerprint == tokenizer.fingerprint
+    assert loaded.fingerprint == Tokenizer.init_from_config(tokenizer.to_config()).fingerprint
+    assert loaded._phonemizer is None
+    for text in tokenizer_texts:
+        np.testing.assert_array_equal(loaded.encode_array(text), tokenizer.encode_array(text))
+    loaded.text_to_id_array("x☃")
+    assert "☃" in loaded.unknown_characters
@@ -0,0 +1,48 @@
+import multiprocessing
+
+import numpy as np
+from inference.arabspeak.components.text import TokenCache
+
+
+def test_token_cache_round_trip(tmp_path):
+    cache = TokenCache(tmp_path / "cache.db")
+    assert cache.get("fp", "text") is None
+    cache.put("fp", "text", np.array([1, 2, 3]))
+    assert cache.get("fp", "text").tolist() == [1, 2, 3]
+    assert cache.get("other", "text") is None
+    cache.put_many("fp", [("a", np.array([4])), ("b", np.array([], dtype=np.int64))])
+    assert len(cache) == 3
+    assert cache.get("fp", "b").size == 0
+    cache.clear("fp")
+    assert len(cache) == 0
+
+
+def test_tokenizer_uses_token_cache(tmp_path, make_tokenizer, tokenizer_texts):
+    tokenizer = make_tokenizer(add_blank=True)
+    expected = [tokenizer.encode_array(text) for text in tokenizer_texts]
+    tokenizer.token_cache = TokenCache(tmp_path / "cache.db")
+    for text, token_ids in zip(tokenizer_texts, expected):
+        np.testing.assert_array_equal(tokenizer.encode_array(text), token_ids)
+    assert len(tokenizer.token_cache) == len(tokenizer_texts)
+
+    reloaded = make_tokenizer(add_blank=True)
+    reloaded.token_cache = TokenCache(tmp_path / "cache.db")
+    reloaded.phonemizer = None  # a hit never reaches the phonemizer
+    for text, token_ids in zip(tokenizer_texts, expected):
+        np.testing.assert_array_equal(reloaded.encode_array(text), token_ids)
+
+
+def _write(path, worker):
+    cache = TokenCache(path)
+    cache.put_many(f"fp{worker}", [(str(i), np.arange(i)) for i in range(50)])
+
+
+def test_token_cache_shared_across_processes(tmp_path):
+    path = tmp_path / "cache.db"
+    TokenCache(path)
+    processes = [multiprocessing.Process(target=_write, args=(path, worker)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert len(TokenCache(path)) == 200
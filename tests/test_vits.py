@@ -0,0 +1,84 @@
+import wave
+
+import numpy as np
+import pytest
+
+pytest.importorskip("TTS")
+pytest.importorskip("torch")
+
+from TTS.tts.configs.vits_config import VitsConfig
+from TTS.tts.models import vits as coqui_vits
+from TTS.tts.utils.text.tokenizer import TTSTokenizer
+
+from training.arabic_tts.dataset import PCM16_SCALE, StoredVitsDataset
+from training.arabic_tts.preprocess import PreprocessedCorpus, PreprocessedTokenizer, preprocess_metadata
+from training.arabic_tts.sampler import FrameBudgetBatchSampler
+from training.arabic_tts.vits import ArabicVits
+
+TEXTS = {"a_1": "ab", "a_2": "abc", "a_3": "abcd"}
+HOP_LENGTH = 256
+
+
+def samples_of(text):
+    return np.full(HOP_LENGTH * 4 * len(text), 1000, dtype=np.int16)
+
+
+def process(audio_id, text):
+    audio = samples_of(text)
+    return {"token_ids": np.arange(1, len(text) + 1, dtype=np.int32), "num_samples": audio.size,
+            "num_frames": audio.size // HOP_LENGTH, "audio": audio}
+
+
+@pytest.fixture
+def config():
+    return VitsConfig(batch_size=2, eval_batch_size=2, num_loader_workers=0, num_eval_loader_workers=0,
+                      min_audio_len=1, max_audio_len=10 ** 6, min_text_len=1, max_text_len=100,
+                      use_phonemes=False, text_cleaner=None)
+
+
+@pytest.fixture
+def samples(tmp_path):
+    (tmp_path / "wavs").mkdir()
+    samples = []
+    for audio_id, text in TEXTS.items():
+        path = tmp_path / "wavs" / f"{audio_id}.wav"
+        with wave.open(str(path), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(22050)
+            # the files are silent, the stored samples are not
+            f.writeframes(np.zeros_like(samples_of(text)).tobytes())
+        samples.append({"text": text, "audio_file": str(path), "speaker_name": "speaker", "language": "",
+                        "audio_unique_name": audio_id, "root_path": str(tmp_path)})
+    return samples
+
+
+@pytest.fixture
+def model(config, tmp_path):
+    metadata = tmp_path / "metadata.txt"
+    metadata.write_text("\n".join(f"{audio_id}|{text}" for audio_id, text in TEXTS.items()), encoding="utf-16")
+    preprocess_metadata(metadata, tmp_path / "store", process)
+    tokenizer, config = TTSTokenizer.init_from_config(config)
+    return ArabicVits(config, None, PreprocessedTokenizer(tokenizer, PreprocessedCorpus(tmp_path / "store")))
+
+
+def test_data_loader_reads_the_store(model, config, samples):
+    loader = model.get_data_loader(config, {}, False, samples, False, 1)
+    assert isinstance(loader.dataset, StoredVitsDataset)
+    assert coqui_vits.VitsDataset is not StoredVitsDataset
+    batches = list(loader)
+    assert sum(batch["waveform"].shape[0] for batch in batches) == len(TEXTS)
+    for batch in batches:
+        for waveform, length in zip(batch["waveform"], batch["waveform_lens"]):
+            np.testing.assert_allclose(waveform[..., :length].numpy(), 1000 * PCM16_SCALE)
+
+
+def test_data_loader_frame_budget_sampler(model, config, samples):
+    model.sampler_config = {"max_frames": 32}
+    loader = model.get_data_loader(config, {}, False, samples, False, 1)
+    assert isinstance(loader.batch_sampler, FrameBudgetBatchSampler)
+    # 8, 12 and 16 frames: any two fit 32 padded frames, not all three
+    assert sorted(len(batch) for batch in loader.batch_sampler) == [1, 2]
+
+    model.sampler_config = {}
+    assert not isinstance(model.get_sampler(config, loader.dataset), FrameBudgetBatchSampler)
@@ -5,7 +5,10 @@ import typer
 import wandb
 from omegaconf import OmegaConf
 from .factory import create_trainer, create_model, create_main_config
-from .utils import get_tokenizer_config, save_tokenizer_config, get_latest_checkpoint
+from .utils import get_tokenizer_config, save_tokenizer_config
+from .checkpoints import CheckpointManager
+from .preprocess import TTSItemProcessor, preprocess_metadata
+from .export import SIGNATURE_FILE, export_variants, format_variants, get_signature, save_signature
 
 cli = typer.Typer()
 
@@ -25,16 +28,28 @@ def train(config: str = typer.Option("config.yaml", "-c", "--config", help="Conf
     if wandb_key:
         config.common.wandb_api_key = wandb_key
     if continue_path:
+        # resolved through the index, create_trainer keeps it instead of rescanning the run
+        checkpoints = CheckpointManager(continue_path)
+        path = checkpoints.latest()
+        if path is None:
+            raise FileNotFoundError(f"No checkpoint found in {continue_path}.")
         config.trainer_args.continue_path = continue_path
+        config.trainer_args.restore_path = str(path)
+        best_path = checkpoints.best()
+        if best_path is not None:
+            config.trainer_args.best_path = str(best_path)
         used_path = continue_path
     if restore_path:
-        path = os.path.join(restore_path, get_latest_checkpoint(restore_path))
-        config.trainer_args.restore_path = path
+        path = CheckpointManager(restore_path).latest()
+        if path is None:
+            raise FileNotFoundError(f"No checkpoint found in {restore_path}.")
+        config.trainer_args.restore_path = str(path)
         used_path = restore_path
 
     if(continue_path and restore_path):
         print(f"\t|> ! Both restore_path and continue_path are provided, restore_path takes precedence.")
         config.trainer_args.continue_path = ""
+        config.trainer_args.best_path = ""
         used_path = restore_path
 
     config = OmegaConf.to_container(config, resolve=True)
@@ -57,13 +72,51 @@ def train(config: str = typer.Option("config.yaml", "-c", "--config", help="Conf
 
     wandb.login(key=config["common"]["wandb_api_key"])
     trainer = create_trainer(config)
-    trainer.fit()
+    checkpoints = CheckpointManager(trainer.output_path,
+                                    async_save=config.get("checkpoints", {}).get("async_save", True)).attach(trainer)
+    try:
+        trainer.fit()
+    finally:
+        checkpoints.close()
     
     
+@cli.command()
+def preprocess(config: str = typer.Option("config.yaml", "-c", "--config", help="Configuration path."),
+               output_path: str = typer.Option("", "--output-path", help="Output directory. Defaults to preprocess.output_path in the config."),
+               workers: int = typer.Option(-1, "--workers", help="Worker processes, 0 to run in this process. Defaults to preprocess.num_workers in the config."),
+               encoding: str = typer.Option("utf-16", "--encoding", help="Encoding of the metadata file."),
+               no_mel_stats: bool = typer.Option(False, "--no-mel-stats", help="Only read durations from the WAV headers instead of computing mel statistics."),
+               no_audio: bool = typer.Option(False, "--no-audio", help="Do not store the audio samples next to the token ids.")):
+    """
+    Cleans, phonemizes and tokenizes the dataset metadata, and stores the audio, into memory-mapped shards, resuming an interrupted run.
+    """
+    config = OmegaConf.to_container(OmegaConf.load(config), resolve=True)
+    options = config.get("preprocess", {})
+    dataset_config = config["dataset_config"]
+    output_path = output_path or options.get("output_path", "preprocessed")
+    workers = options.get("num_workers", os.cpu_count()) if workers < 0 else workers
+    processor = TTSItemProcessor(config,
+                                 wavs_dir=options.get("wavs_dir", "wavs"),
+                                 compute_mel_stats=options.get("compute_mel_stats", True) and not no_mel_stats,
+                                 store_audio=options.get("store_audio", True) and not no_audio)
+    manifest = preprocess_metadata(os.path.join(dataset_config["path"], dataset_config["meta_file_train"]),
+                                   output_path,
+                                   processor,
+                                   num_workers=workers,
+                                   shard_size=options.get("shard_size", 1000),
+                                   encoding=encoding,
+                                   sample_rate=config.get("audio_config", {}).get("sample_rate"))
+    num_items = sum(shard["num_items"] for shard in manifest["shards"].values())
+    num_failed = sum(len(shard["failed"]) for shard in manifest["shards"].values())
+    print(f"> Preprocessed {num_items} items ({num_failed} failed) into {output_path}.")
+
+
 @cli.command()
 def export_model(config: str = typer.Option("config.yaml","--config-path", help="The path to the config file used to train the checkpoint model. That must explicitly be the one used to train the model."),
                  checkpoint_path: str = typer.Option("", "--checkpoint-path", help="Path to the checkpoint to be exported."),
-                 export_path: str = typer.Option("", "--export-path", help="Path to save the exported model and metadata.")):
+                 export_path: str = typer.Option("", "--export-path", help="Path to save the exported model and metadata."),
+                 variants: str = typer.Option("", "--variants", help="Comma separated extra model variants to build: optimized, ort, int8, fp16."),
+                 min_snr_db: float = typer.Option(20.0, "--min-snr-db", help="Minimum SNR against the fp32 model for a variant to pass the parity check.")):
 
     config = OmegaConf.load(config)
     config = OmegaConf.to_container(config, resolve=True)
@@ -89,6 +142,17 @@ def export_model(config: str = typer.Option("config.yaml","--config-path", help=
     model.export_onnx(os.path.join(export_path, "model.onnx"))
     print(f"> Exporting tokenizer config to {export_path}.")
     save_tokenizer_config(os.path.join(export_path, "tokenizer_config.json"), get_tokenizer_config(model))
+    print(f"> Exporting model signature to {export_path}.")
+    save_signature(os.path.join(export_path, SIGNATURE_FILE), get_signature(os.path.join(export_path, "model.onnx")))
+    variants = [variant.strip() for variant in variants.split(",") if variant.strip()]
+    if variants:
+        sentences = [s[0] if isinstance(s, (list, tuple)) else s for s in config.test_sentences]
+        if not sentences:
+            print(f"\t|> ! No test sentences in the config, skipping the variants.")
+        else:
+            sequences = [model.tokenizer.text_to_ids(sentence) for sentence in sentences]
+            metadata = export_variants(export_path, variants, sequences, config.audio.sample_rate, min_snr_db=min_snr_db)
+            print(format_variants(metadata))
     print(f"> Model exported to {export_path} successfully.")
 
 if __name__ == "__main__":
@@ -0,0 +1,231 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from .utils import get_latest_checkpoint
+
+INDEX_FILE = "checkpoints.json"
+INDEX_VERSION = 1
+# Entries of a coqui checkpoint state recorded as metrics in the index. Recent trainers save
+# ``model_loss`` as a ``{"train_loss": ..., "eval_loss": ...}`` dict, recorded as its two losses.
+METRIC_KEYS = ("model_loss",)
+LOSS_KEYS = ("train_loss", "eval_loss")
+# Metrics ``best`` ranks by when none is given, in order of preference, like the trainer.
+BEST_METRICS = ("eval_loss", "train_loss", "model_loss")
+
+
+def _is_scalar(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def state_metrics(state: Dict) -> Dict[str, float]:
+    """The metrics of a checkpoint state, flattening dict losses into ``train_loss`` and ``eval_loss``."""
+    metrics = {}
+    for key in METRIC_KEYS:
+        value = state.get(key)
+        if _is_scalar(value):
+            metrics[key] = float(value)
+        elif isinstance(value, dict):
+            metrics.update({loss: float(value[loss]) for loss in LOSS_KEYS if _is_scalar(value.get(loss))})
+    return metrics
+
+
+def snapshot_to_cpu(state):
+    """Copies the tensors of a (nested) state dict to CPU memory.
+
+    ``state_dict()`` returns the live parameter and optimizer tensors, which the training
+    loop keeps updating, so they are copied before being serialized in the background.
+    """
+    import torch
+
+    if isinstance(state, torch.Tensor):
+        return state.detach().to("cpu", copy=True)
+    if isinstance(state, dict):
+        return {key: snapshot_to_cpu(value) for key, value in state.items()}
+    if type(state) in (list, tuple):
+        return type(state)(snapshot_to_cpu(value) for value in state)
+    return state
+
+
+def torch_save(state, path: str):
+    import torch
+
+    torch.save(state, path)
+
+
+class CheckpointManager:
+    """Saves checkpoints in a background thread and keeps an index of them.
+
+    A save snapshots the state to CPU, which is fast, and hands it to a writer thread that
+    serializes it to ``<name>.tmp`` and renames it into place, so the training loop does not
+    wait for the file system and a checkpoint is never seen half written. At most one save
+    is in flight: the next one first waits for it, which bounds the memory held by snapshots.
+
+    ``checkpoints.json`` records the step, epoch, file, size and metrics of each checkpoint,
+    so the latest or best one is found without listing (or loading) the files of the run.
+    Entries whose file was deleted, e.g. by coqui's ``save_n_checkpoints``, are dropped when
+    the index is next written.
+
+    Args:
+        directory:
+            The run directory holding the checkpoints.
+        async_save(bool):
+            Whether checkpoints are written in the background.
+        save_func:
+            Serializes a state to a path, ``torch.save`` by default.
+        snapshot:
+            Copies a state before it is saved in the background, ``snapshot_to_cpu`` by default.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        async_save: bool = True,
+        save_func: Optional[Callable] = None,
+        snapshot: Optional[Callable] = None,
+    ):
+        self.directory = Path(directory)
+        self.async_save = async_save
+        self.save_func = save_func or torch_save
+        self.snapshot = snapshot or snapshot_to_cpu
+        self._entries = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / INDEX_FILE
+
+    def entries(self) -> List[Dict]:
+        """The indexed checkpoints, oldest step first."""
+        with self._lock:
+            return list(self._load())
+
+    def _load(self) -> List[Dict]:
+        if self._entries is None:
+            self._entries = []
+            if self.index_path.exists():
+                with open(self.index_path, "r") as f:
+                    index = json.load(f)
+                if index.get("version") == INDEX_VERSION:
+                    self._entries = index["checkpoints"]
+        return self._entries
+
+    def _write_index(self):
+        entries = [entry for entry in self._load() if (self.directory / entry["path"]).exists()]
+        self._entries = sorted(entries, key=lambda entry: (entry["step"], entry["path"]))
+        tmp_path = self.index_path.with_name(INDEX_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "checkpoints": self._entries}, f, indent=4)
+        os.replace(tmp_path, self.index_path)
+
+    def _record(self, state: Dict, path: Path):
+        entry = {
+            "step": int(state.get("step", 0)),
+            "epoch": int(state.get("epoch", 0)),
+            "path": path.name,
+            "size": path.stat().st_size,
+            "time": time.time(),
+            "metrics": state_metrics(state),
+        }
+        with self._lock:
+            entries = [e for e in self._load() if e["path"] != path.name]
+            self._entries = entries + [entry]
+            self._write_index()
+
+    def _write(self, state: Dict, path: Path):
+        tmp_path = path.with_name(path.name + ".tmp")
+        self.save_func(state, str(tmp_path))
+        os.replace(tmp_path, path)
+        self._record(state, path)
+
+    def _write_in_background(self, state: Dict, path: Path):
+        try:
+            self._write(state, path)
+        except BaseException as e:
+            self._error = e
+
+    def wait(self):
+        """Waits for the save in flight, raising its error if it failed."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Saving a checkpoint failed.") from error
+
+    def save(self, state: Dict, path: Union[str, Path], wait: bool = False):
+        """Atomically saves ``state`` to ``path`` (inside the run directory) and indexes it.
+
+        Unless ``wait`` is set or saves are synchronous, this returns once the state is
+        snapshotted and the file is written in the background.
+        """
+        path = Path(path)
+        self.wait()
+        if wait or not self.async_save:
+            self._write(state, path)
+            return
+        self._thread = threading.Thread(target=self._write_in_background, args=(self.snapshot(state), path),
+                                         name="arabic-tts-checkpoint")
+        self._thread.start()
+
+    def save_model(self, state: Dict, path: str):
+        """Drop-in for the coqui ``dashboard_logger.save_model`` used by the trainer.
+
+        Only ``checkpoint_<step>.pth`` files are written in the background: coqui copies the
+        best model file right after saving it, so those are written before returning.
+        """
+        self.save(state, path, wait=not os.path.basename(path).startswith("checkpoint_"))
+
+    def attach(self, trainer):
+        """Routes the checkpoints saved by a coqui ``Trainer`` through this manager."""
+        trainer.dashboard_logger.save_model = self.save_model
+        return self
+
+    def close(self):
+        self.wait()
+
+    def latest(self) -> Optional[Path]:
+        """The path of the checkpoint with the highest step, ``None`` if there is none.
+
+        Directories without an index (runs older than the manager) are scanned once and the
+        step-numbered checkpoint found is indexed.
+        """
+        with self._lock:
+            for entry in reversed(self._load()):
+                path = self.directory / entry["path"]
+                if entry["path"].startswith("checkpoint_") and path.exists():
+                    return path
+            name = get_latest_checkpoint(self.directory) if self.directory.is_dir() else None
+            if name is None:
+                return None
+            path = self.directory / name
+            step = int(name.split("_")[1].split(".")[0])
+            self._entries.append({"step": step, "epoch": 0, "path": name, "size": path.stat().st_size,
+                                  "time": path.stat().st_mtime, "metrics": {}})
+            self._write_index()
+            return path
+
+    def best(self, metric: Optional[str] = None) -> Optional[Path]:
+        """The path of the indexed checkpoint with the lowest ``metric``, ``None`` if there is none.
+
+        Without a ``metric``, the first of ``BEST_METRICS`` recorded for any checkpoint is used.
+        """
+        with self._lock:
+            entries = [entry for entry in self._load() if (self.directory / entry["path"]).exists()]
+        if metric is None:
+            metric = next((key for key in BEST_METRICS if any(key in entry["metrics"] for entry in entries)), None)
+        entries = [entry for entry in entries if metric in entry["metrics"]]
+        if not entries:
+            return None
+        return self.directory / min(entries, key=lambda entry: entry["metrics"][metric])["path"]
+
+    def __enter__(self) -> "CheckpointManager":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import torch
+from TTS.tts.models.vits import VitsDataset
+
+from .preprocess import PreprocessedCorpus
+from .sampler import sample_audio_id
+
+# torchaudio.load normalizes 16-bit PCM by this factor.
+PCM16_SCALE = 1.0 / 32768
+
+
+class StoredVitsDataset(VitsDataset):
+    """``VitsDataset`` that reads waveforms and token ids from a ``PreprocessedCorpus``.
+
+    Samples whose shard stores audio are served from the memory-mapped arrays, so loader
+    workers share the pages through the OS cache instead of each opening and decoding the
+    WAV files. The int16 samples are scaled the way ``torchaudio.load`` scales 16-bit PCM,
+    so the waveforms are the ones coqui would read. Other samples go through ``VitsDataset``.
+
+    Args:
+        corpus(PreprocessedCorpus):
+            The preprocessed shards, written with ``preprocess.store_audio``.
+        *args, **kwargs:
+            The ``VitsDataset`` arguments.
+    """
+
+    def __init__(self, *args, corpus: PreprocessedCorpus, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.corpus = corpus
+
+    def __getitem__(self, idx):
+        item = self.samples[idx]
+        stored = self.corpus.get(sample_audio_id(item))
+        if stored is None or "audio" not in stored:
+            return super().__getitem__(idx)
+
+        wav = torch.from_numpy(np.multiply(stored["audio"], PCM16_SCALE, dtype=np.float32)).unsqueeze(0)
+        encoder_sample_rate = self.model_args.encoder_sample_rate
+        if encoder_sample_rate is not None and wav.size(1) % encoder_sample_rate != 0:
+            wav = wav[:, : -int(wav.size(1) % encoder_sample_rate)]
+        token_ids = np.array(stored["token_ids"])
+
+        # same filtering as VitsDataset
+        if len(token_ids) > self.max_text_len or wav.shape[1] < self.min_audio_len:
+            self.rescue_item_idx += 1
+            return self.__getitem__(self.rescue_item_idx)
+
+        return {
+            "raw_text": item["text"],
+            "token_ids": token_ids,
+            "token_len": len(token_ids),
+            "wav": wav,
+            "wav_file": os.path.basename(item["audio_file"]),
+            "speaker_name": item["speaker_name"],
+            "language_name": item["language"],
+            "audio_unique_name": item["audio_unique_name"],
+        }
@@ -0,0 +1,245 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import onnxruntime as ort
+
+MODEL_FILE = "model.onnx"
+METADATA_FILE = "export_metadata.json"
+SIGNATURE_FILE = "signature.json"
+# Names of the inputs and outputs of the VITS export (see ``ArabicVits.export_onnx``) and the
+# roles the inference side binds them by. ``output_lengths`` is missing from older exports.
+EXPORT_INPUTS = {"input": "tokens", "input_lengths": "lengths", "scales": "scales"}
+EXPORT_OUTPUTS = {"output": "audio", "output_lengths": "audio_lengths"}
+OPTIONAL_OUTPUTS = ("output_lengths",)
+VARIANT_FILES = {
+    "optimized": "model.optimized.onnx",
+    "ort": "model.ort",
+    "int8": "model.int8.onnx",
+    "fp16": "model.fp16.onnx",
+}
+# Noise free scales make the VITS output deterministic, so variants can be compared sample by sample.
+PARITY_SCALES = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+DEFAULT_SCALES = np.array([0.667, 1.0, 1.0], dtype=np.float32)
+
+
+def get_signature(model_path) -> Dict:
+    """Reads the input/output manifest (names, roles, dtypes, shapes and dynamic axes) of an exported model.
+
+    Roles are assigned by the names given by ``ArabicVits.export_onnx``, so the inference side
+    can bind inputs by name whatever their order in the graph.
+
+    Raises:
+        ValueError: If the model has an input or output the export does not define, or lacks
+            a required one.
+    """
+    import onnx
+
+    graph = onnx.load(str(model_path), load_external_data=False).graph
+    initializers = {tensor.name for tensor in graph.initializer}
+
+    def specs(values, roles, kind):
+        values = [value for value in values if value.name not in initializers]
+        unknown = [value.name for value in values if value.name not in roles]
+        if unknown:
+            raise ValueError(f"{model_path} has unknown {kind} {unknown}, expected {list(roles)}.")
+        missing = [name for name in roles if name not in OPTIONAL_OUTPUTS and name not in {value.name for value in values}]
+        if missing:
+            raise ValueError(f"{model_path} has no {kind} {missing}.")
+        entries = []
+        for value in values:
+            tensor_type = value.type.tensor_type
+            shape = [dim.dim_value if dim.HasField("dim_value") else (dim.dim_param or None) for dim in tensor_type.shape.dim]
+            entries.append({
+                "name": value.name,
+                "role": roles[value.name],
+                "dtype": onnx.helper.tensor_dtype_to_np_dtype(tensor_type.elem_type).name,
+                "shape": shape,
+                "dynamic_axes": {str(axis): dim or f"dim_{axis}" for axis, dim in enumerate(shape) if not isinstance(dim, int)},
+            })
+        return entries
+
+    return {"inputs": specs(graph.input, EXPORT_INPUTS, "inputs"), "outputs": specs(graph.output, EXPORT_OUTPUTS, "outputs")}
+
+
+def save_signature(path, signature: Dict):
+    with open(path, "w") as f:
+        json.dump(signature, f, indent=4)
+
+
+def optimize_model(model_path, output_path, ort_format: bool = False):
+    """Saves the graph after onnxruntime's offline optimizations.
+
+    Extended (not hardware specific) optimizations are used so the result can be shipped to
+    other CPUs. With ``ort_format`` the model is saved in the ``.ort`` flatbuffer format,
+    which loads faster.
+    """
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = str(output_path)
+    if ort_format:
+        options.add_session_config_entry("session.save_model_format", "ORT")
+    ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+
+
+def quantize_int8(model_path, output_path):
+    """Dynamic int8 quantization of the weights."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(model_input=str(model_path), model_output=str(output_path), weight_type=QuantType.QInt8)
+
+
+def convert_fp16(model_path, output_path):
+    """Converts weights and activations to fp16, keeping fp32/int64 inputs and outputs."""
+    import onnx
+    try:
+        from onnxconverter_common import float16
+    except ImportError:
+        raise ImportError("The fp16 variant requires `onnxconverter-common`.")
+
+    model = float16.convert_float_to_float16(onnx.load(str(model_path)), keep_io_types=True)
+    # The converter retypes the outputs of Cast(to=float) nodes but not their target type.
+    fp16_values = {value.name for value in model.graph.value_info
+                   if value.type.tensor_type.elem_type == onnx.TensorProto.FLOAT16}
+    for node in model.graph.node:
+        if node.op_type == "Cast" and node.output[0] in fp16_values:
+            for attribute in node.attribute:
+                if attribute.name == "to" and attribute.i == onnx.TensorProto.FLOAT:
+                    attribute.i = onnx.TensorProto.FLOAT16
+    onnx.save(model, str(output_path))
+
+
+VARIANT_BUILDERS = {
+    "optimized": lambda src, dst: optimize_model(src, dst),
+    "ort": lambda src, dst: optimize_model(src, dst, ort_format=True),
+    "int8": quantize_int8,
+    "fp16": convert_fp16,
+}
+
+
+def run_model(session: ort.InferenceSession, token_ids: Sequence[int], scales: np.ndarray) -> np.ndarray:
+    tokens = np.asarray(token_ids, dtype=np.int64)[None, :]
+    lengths = np.array([tokens.shape[1]], dtype=np.int64)
+    # EXPORT_INPUTS lists the inputs in the order of their roles, and the audio first.
+    outputs = session.run(list(EXPORT_OUTPUTS)[:1], dict(zip(EXPORT_INPUTS, (tokens, lengths, scales))))
+    return outputs[0].reshape(-1).astype(np.float32)
+
+
+def compare_waveforms(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Compares two waveforms over their common length.
+
+    returns:
+        The maximum absolute difference, the signal-to-noise ratio of the candidate against the
+        reference in dB and the candidate/reference length ratio.
+    """
+    n = min(reference.size, candidate.size)
+    ref, cand = reference[:n].astype(np.float64), candidate[:n].astype(np.float64)
+    noise = np.sum((ref - cand) ** 2)
+    signal = np.sum(ref ** 2)
+    snr = float("inf") if noise == 0 else 10 * np.log10(max(signal, 1e-20) / noise)
+    return {
+        "max_abs_diff": float(np.max(np.abs(ref - cand))) if n else 0.0,
+        "snr_db": float(snr),
+        "length_ratio": candidate.size / reference.size if reference.size else 1.0,
+    }
+
+
+def measure_speed(session: ort.InferenceSession, sequences: List[List[int]], sample_rate: int, repeats: int = 3) -> Dict[str, float]:
+    """Mean latency per sentence and real-time factor on the CPU."""
+    run_model(session, sequences[0], DEFAULT_SCALES)
+    elapsed, samples = 0.0, 0
+    for _ in range(repeats):
+        for token_ids in sequences:
+            start = time.perf_counter()
+            wav = run_model(session, token_ids, DEFAULT_SCALES)
+            elapsed += time.perf_counter() - start
+            samples += wav.size
+    return {
+        "mean_latency_ms": elapsed / (repeats * len(sequences)) * 1000,
+        "rtf": elapsed / (samples / sample_rate) if samples else float("inf"),
+    }
+
+
+def export_variants(
+    export_path: str,
+    variants: Sequence[str],
+    sequences: List[List[int]],
+    sample_rate: int,
+    min_snr_db: float = 20.0,
+    max_length_deviation: float = 0.05,
+) -> Dict:
+    """Builds model variants next to ``model.onnx``, checks parity and records size and speed.
+
+    Each variant is run on the token sequences (e.g. the tokenized test sentences) with noise
+    free scales and compared against the fp32 model. A variant passes parity when its SNR is
+    at least ``min_snr_db`` on every sentence and its lengths are within
+    ``max_length_deviation`` of the reference. The results, including those of the fp32
+    model, are written to ``export_metadata.json``.
+    """
+    unknown = set(variants) - set(VARIANT_BUILDERS)
+    if unknown:
+        raise ValueError(f"Unknown export variants: {sorted(unknown)}. Available: {sorted(VARIANT_BUILDERS)}.")
+    if not sequences:
+        raise ValueError("At least one token sequence is needed to check parity and speed.")
+
+    model_path = Path(export_path) / MODEL_FILE
+    reference_session = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+    reference = [run_model(reference_session, token_ids, PARITY_SCALES) for token_ids in sequences]
+    metadata = {
+        "sample_rate": sample_rate,
+        "parity": {"min_snr_db": min_snr_db, "max_length_deviation": max_length_deviation,
+                   "num_sentences": len(sequences)},
+        "variants": {
+            "fp32": {"file": MODEL_FILE, "size_bytes": os.path.getsize(model_path),
+                     **measure_speed(reference_session, sequences, sample_rate)},
+        },
+    }
+
+    for name in variants:
+        output_path = Path(export_path) / VARIANT_FILES[name]
+        print(f"> Building the {name} variant.")
+        try:
+            VARIANT_BUILDERS[name](model_path, output_path)
+            session = ort.InferenceSession(str(output_path), providers=["CPUExecutionProvider"])
+        except Exception as e:
+            print(f"\t|> ! Could not build the {name} variant: {e}")
+            metadata["variants"][name] = {"file": output_path.name, "error": str(e)}
+            continue
+        comparisons = [compare_waveforms(ref, run_model(session, token_ids, PARITY_SCALES))
+                       for ref, token_ids in zip(reference, sequences)]
+        parity = {
+            "min_snr_db": min(c["snr_db"] for c in comparisons),
+            "max_abs_diff": max(c["max_abs_diff"] for c in comparisons),
+            "max_length_deviation": max(abs(c["length_ratio"] - 1) for c in comparisons),
+        }
+        parity["passed"] = bool(parity["min_snr_db"] >= min_snr_db
+                                and parity["max_length_deviation"] <= max_length_deviation)
+        metadata["variants"][name] = {
+            "file": output_path.name,
+            "size_bytes": os.path.getsize(output_path),
+            **measure_speed(session, sequences, sample_rate),
+            "parity": parity,
+        }
+        if not parity["passed"]:
+            print(f"\t|> ! The {name} variant failed the parity check (SNR {parity['min_snr_db']:.1f} dB).")
+
+    with open(Path(export_path) / METADATA_FILE, "w") as f:
+        json.dump(metadata, f, indent=4)
+    return metadata
+
+
+def format_variants(metadata: Dict) -> str:
+    lines = [f"{'variant':>10} {'size MB':>8} {'latency ms':>10} {'rtf':>7} {'snr dB':>7} {'parity':>6}"]
+    for name, variant in metadata["variants"].items():
+        if "error" in variant:
+            lines.append(f"{name:>10} {'error':>8}")
+            continue
+        parity = variant.get("parity")
+        snr = f"{parity['min_snr_db']:.1f}" if parity else "-"
+        passed = ("ok" if parity["passed"] else "FAIL") if parity else "ref"
+        lines.append(f"{name:>10} {variant['size_bytes'] / 2 ** 20:>8.2f} {variant['mean_latency_ms']:>10.1f} "
+                     f"{variant['rtf']:>7.3f} {snr:>7} {passed:>6}")
+    return "\n".join(lines)
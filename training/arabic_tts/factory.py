@@ -5,9 +5,11 @@ from trainer import Trainer, TrainerArgs
 from TTS.tts.configs.shared_configs import BaseDatasetConfig, CharactersConfig
 from TTS.tts.configs.vits_config import VitsConfig
 from TTS.tts.datasets import load_tts_samples
-from TTS.tts.models.vits import Vits, VitsArgs, VitsAudioConfig
+from TTS.tts.models.vits import VitsArgs, VitsAudioConfig
 from TTS.tts.utils.text.tokenizer import TTSTokenizer
 from TTS.utils.audio import AudioProcessor
+from .preprocess import MANIFEST_FILE, PreprocessedCorpus, PreprocessedTokenizer
+from .vits import ArabicVits
 
 
 def create_model_args(config:dict):
@@ -28,6 +30,29 @@ def create_tokenizer(config:dict):
 def create_trainer_args(config:dict):
     return TrainerArgs(**config)
 
+
+class ArabicTrainer(Trainer):
+    """A coqui ``Trainer`` that resumes from a checkpoint resolved by the caller.
+
+    ``Trainer.init_training`` globs ``continue_path`` for the last checkpoint and overwrites
+    ``restore_path`` with it. When both are given, e.g. ``restore_path`` resolved through
+    the ``CheckpointManager`` index, the given checkpoint is kept and the directory is not scanned.
+    """
+
+    @staticmethod
+    def init_training(args, coqpit_overrides, config=None):
+        if not (args.continue_path and args.restore_path):
+            return Trainer.init_training(args, coqpit_overrides, config)
+        # use the same config, as coqui does when continuing, then apply the overrides
+        args.config_path = os.path.join(args.continue_path, "config.json")
+        config.load_json(args.config_path)
+        continue_path, args.continue_path = args.continue_path, ""
+        try:
+            return Trainer.init_training(args, coqpit_overrides, config)
+        finally:
+            args.continue_path = continue_path
+
+
 def read_test_sentences(path:Optional[str]=None):
     if path:
         path = Path(path)
@@ -61,12 +86,19 @@ def create_model(config:dict):
     tokenizer, main_config = TTSTokenizer.init_from_config(main_config)
 
     # init model
-    model = Vits(main_config, audio_processor, tokenizer, speaker_manager=None)
+    model = ArabicVits(main_config, audio_processor, tokenizer, speaker_manager=None)
 
     return model, main_config
 
 def create_trainer(config:dict):
     model, main_config = create_model(config)
+    preprocessed_path = config.get("preprocess", {}).get("output_path")
+    if preprocessed_path and os.path.exists(os.path.join(preprocessed_path, MANIFEST_FILE)):
+        corpus = PreprocessedCorpus(preprocessed_path)
+        features = "token ids and audio" if corpus.has_audio else "token ids"
+        print(f"> Using preprocessed {features} from {preprocessed_path}.")
+        model.tokenizer = PreprocessedTokenizer(model.tokenizer, corpus)
+    model.sampler_config = config.get("sampler", {})
     dataset_config = create_dataset_config(config.get("dataset_config", {}))
     train_samples, eval_samples = load_tts_samples(dataset_config,
                                                    eval_split=True,
@@ -75,12 +107,12 @@ def create_trainer(config:dict):
                                                    )
     trainer_args = create_trainer_args(config.get("trainer_args", {}))
 
-    trainer = Trainer(trainer_args,
-                      main_config,
-                      output_path=config.get("output_path", ""),
-                      model=model,
-                      train_samples=train_samples,
-                      eval_samples=eval_samples)
+    trainer = ArabicTrainer(trainer_args,
+                            main_config,
+                            output_path=config.get("output_path", ""),
+                            model=model,
+                            train_samples=train_samples,
+                            eval_samples=eval_samples)
     
     return trainer
 
@@ -0,0 +1,396 @@
+import json
+import multiprocessing
+import os
+import wave
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+INDEX_DTYPE = np.dtype([
+    ("offset", np.int64),
+    ("length", np.int32),
+    ("num_samples", np.int64),
+    ("num_frames", np.int32),
+    ("line", np.int64),
+    ("audio_offset", np.int64),
+])
+
+
+def read_metadata(path: str, encoding: str = "utf-16") -> Iterator[Tuple[int, str, str]]:
+    """Streams ``(line_number, audio_id, text)`` from a ``audio_id|text`` metadata file, skipping blank lines."""
+    with open(path, "r", encoding=encoding) as f:
+        for line_number, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            audio_id, _, text = line.partition("|")
+            yield line_number, audio_id, text.strip()
+
+
+def shard_name(index: int) -> str:
+    return f"shard-{index:05d}"
+
+
+def read_pcm16(path: str, sample_rate: Optional[int] = None) -> np.ndarray:
+    """Reads the samples of a mono 16-bit PCM WAV file without decoding them to float.
+
+    Raises:
+        ValueError: If the file is not mono 16-bit PCM or its rate differs from ``sample_rate``.
+    """
+    with wave.open(str(path), "rb") as f:
+        if f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise ValueError(f"{path} is not mono 16-bit PCM.")
+        if sample_rate and f.getframerate() != sample_rate:
+            raise ValueError(f"{path} has a sample rate of {f.getframerate()}, expected {sample_rate}.")
+        return np.frombuffer(f.readframes(f.getnframes()), dtype="<i2").astype(np.int16, copy=False)
+
+
+class TTSItemProcessor:
+    """Cleans, phonemizes and tokenizes one metadata line and measures its audio.
+
+    The coqui tokenizer and audio processor are built from the training config on the first
+    call in each worker process, so the object itself stays cheap to pickle.
+
+    Args:
+        config(dict):
+            The training config (``config.yaml`` resolved to a dict).
+        wavs_dir(str):
+            Directory of the ``<audio_id>.wav`` files, relative to ``dataset_config.path``.
+        compute_mel_stats(bool):
+            Whether to compute the per-channel mel sums used for the dataset statistics.
+        store_audio(bool):
+            Whether to also return the 16-bit samples, which ``write_shard`` stores next to the
+            token ids so training reads them from the memory-mapped shards.
+    """
+
+    def __init__(self, config: dict, wavs_dir: str = "wavs", compute_mel_stats: bool = True, store_audio: bool = False):
+        self.config = config
+        self.wavs_path = Path(config.get("dataset_config", {}).get("path", "")) / wavs_dir
+        self.compute_mel_stats = compute_mel_stats
+        self.store_audio = store_audio
+        self._tokenizer = None
+        self._audio_processor = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_tokenizer=None, _audio_processor=None)
+        return state
+
+    def _setup(self):
+        from TTS.tts.utils.text.tokenizer import TTSTokenizer
+        from TTS.utils.audio import AudioProcessor
+        from .factory import create_main_config
+
+        main_config = create_main_config(self.config)
+        self._tokenizer, _ = TTSTokenizer.init_from_config(main_config)
+        self._audio_processor = AudioProcessor.init_from_config(main_config, verbose=False)
+
+    def __call__(self, audio_id: str, text: str) -> Dict:
+        if self._tokenizer is None:
+            self._setup()
+        token_ids = np.asarray(self._tokenizer.text_to_ids(text), dtype=np.int32)
+        wav_path = self.wavs_path / f"{audio_id}.wav"
+        result = {"token_ids": token_ids, "mel_sum": None, "mel_sq_sum": None, "num_frames": 0}
+        if self.store_audio:
+            result["audio"] = read_pcm16(wav_path, self.config.get("audio_config", {}).get("sample_rate"))
+        if self.compute_mel_stats:
+            wav = self._audio_processor.load_wav(str(wav_path))
+            mel = self._audio_processor.melspectrogram(wav)
+            # The stored samples are what training reads, even if loading for the mel trimmed them.
+            num_samples = result["audio"].size if self.store_audio else wav.size
+            result.update(num_samples=num_samples, num_frames=mel.shape[1],
+                          mel_sum=mel.sum(axis=1), mel_sq_sum=(mel.astype(np.float64) ** 2).sum(axis=1))
+        elif self.store_audio:
+            result["num_samples"] = result["audio"].size
+            result["num_frames"] = result["num_samples"] // self._audio_processor.hop_length
+        else:
+            with wave.open(str(wav_path), "rb") as f:
+                result["num_samples"] = f.getnframes()
+            result["num_frames"] = result["num_samples"] // self._audio_processor.hop_length
+        return result
+
+
+# The processor of the current worker process, installed once so its lazily built state is reused.
+_processor = None
+
+
+def _init_worker(processor):
+    global _processor
+    _processor = processor
+
+
+def _run_item(args):
+    line_number, audio_id, text = args
+    try:
+        result = _processor(audio_id, text)
+        result["text"] = text
+        return line_number, audio_id, result, None
+    except Exception as e:
+        return line_number, audio_id, None, f"{type(e).__name__}: {e}"
+
+
+def _atomic_save(path: Path, array: np.ndarray):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _atomic_write_json(path: Path, content):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(content, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(output_path: str) -> Optional[Dict]:
+    path = Path(output_path) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_shard(output_path: Path, index: int, results: List[Tuple]) -> Dict:
+    """Writes the tokens, index, ids and mel sums of one shard and returns its manifest entry.
+
+    When every item carries ``audio``, the samples are concatenated into one int16 array
+    (``shard-NNNNN.audio.npy``) addressed by the ``audio_offset``/``num_samples`` index columns,
+    both taken from the lengths of the stored arrays.
+    Files are renamed into place, and the shard only counts as done once the manifest lists
+    it, so an interrupted write is simply redone.
+    """
+    name = shard_name(index)
+    items = [(line, audio_id, result) for line, audio_id, result, error in results if result is not None]
+    failed = {audio_id: error for _, audio_id, result, error in results if result is None}
+    lengths = np.array([result["token_ids"].size for _, _, result in items], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(items) else lengths
+
+    entries = np.zeros(len(items), dtype=INDEX_DTYPE)
+    entries["offset"] = offsets
+    entries["length"] = lengths
+    entries["num_samples"] = [result["num_samples"] for _, _, result in items]
+    entries["num_frames"] = [result["num_frames"] for _, _, result in items]
+    entries["line"] = [line for line, _, _ in items]
+    tokens = np.concatenate([result["token_ids"] for _, _, result in items]) if items else np.zeros(0, np.int32)
+    _atomic_save(output_path / f"{name}.tokens.npy", tokens.astype(np.int32))
+    _atomic_write_json(output_path / f"{name}.ids.json", [[audio_id, result["text"]] for _, audio_id, result in items])
+
+    has_audio = bool(items) and all(result.get("audio") is not None for _, _, result in items)
+    if has_audio:
+        entries["num_samples"] = [result["audio"].size for _, _, result in items]
+        entries["audio_offset"] = np.concatenate([[0], np.cumsum(entries["num_samples"])[:-1]])
+        audio = np.concatenate([result["audio"] for _, _, result in items]).astype(np.int16, copy=False)
+        _atomic_save(output_path / f"{name}.audio.npy", audio)
+    _atomic_save(output_path / f"{name}.index.npy", entries)
+
+    mel_sums = [result["mel_sum"] for _, _, result in items if result.get("mel_sum") is not None]
+    entry = {"name": name, "num_items": len(items), "failed": failed, "audio": has_audio}
+    if mel_sums:
+        entry["mel_sum"] = np.sum(mel_sums, axis=0).tolist()
+        entry["mel_sq_sum"] = np.sum([result["mel_sq_sum"] for _, _, result in items], axis=0).tolist()
+        entry["mel_frames"] = int(entries["num_frames"].sum())
+    return entry
+
+
+def mel_statistics(manifest: Dict) -> Optional[Dict]:
+    """Per-channel mel mean and standard deviation over all completed shards."""
+    shards = [shard for shard in manifest["shards"].values() if "mel_sum" in shard]
+    frames = sum(shard["mel_frames"] for shard in shards)
+    if not frames:
+        return None
+    mean = np.sum([shard["mel_sum"] for shard in shards], axis=0) / frames
+    sq_mean = np.sum([shard["mel_sq_sum"] for shard in shards], axis=0) / frames
+    return {"mel_mean": mean.tolist(), "mel_std": np.sqrt(np.maximum(sq_mean - mean ** 2, 0)).tolist(), "num_frames": frames}
+
+
+def preprocess_metadata(
+    metadata_path: str,
+    output_path: str,
+    processor: Callable[[str, str], Dict],
+    num_workers: int = 0,
+    shard_size: int = 1000,
+    encoding: str = "utf-16",
+    sample_rate: Optional[int] = None,
+) -> Dict:
+    """Preprocesses a metadata file into memory-mappable shards, resuming an interrupted run.
+
+    Line ``n`` of the metadata always belongs to shard ``n // shard_size``. The file is
+    streamed one shard at a time, the lines of a shard are processed across ``num_workers``
+    processes (in this process when ``0``), and the shard is committed to ``manifest.json``
+    once its files are written. Rerunning the command skips committed shards.
+
+    Args:
+        processor:
+            Picklable callable mapping ``(audio_id, text)`` to a dict with ``token_ids``,
+            ``num_samples``, ``num_frames`` and optional ``mel_sum``/``mel_sq_sum``, e.g. a
+            ``TTSItemProcessor``. Lines whose processing raises are recorded as failed.
+        shard_size:
+            Metadata lines per shard. Must match the value of the run being resumed.
+    returns:
+        The manifest.
+    """
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(output_path)
+    if manifest is None:
+        manifest = {"version": MANIFEST_VERSION, "metadata": str(metadata_path), "shard_size": shard_size,
+                    "sample_rate": sample_rate, "shards": {}}
+    elif manifest["shard_size"] != shard_size:
+        raise ValueError(f"{output_path} was written with shard_size={manifest['shard_size']}, got {shard_size}.")
+    elif manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"{output_path} has manifest version {manifest.get('version')}, expected {MANIFEST_VERSION}.")
+    if manifest["shards"]:
+        print(f"> Resuming, {len(manifest['shards'])} shards already done.")
+
+    if num_workers > 0:
+        pool = multiprocessing.Pool(num_workers, initializer=_init_worker, initargs=(processor,))
+    else:
+        pool = None
+        _init_worker(processor)
+    try:
+        def flush(index, lines):
+            if pool is not None:
+                results = pool.map(_run_item, lines, chunksize=max(1, len(lines) // (4 * num_workers)))
+            else:
+                results = list(map(_run_item, lines))
+            entry = write_shard(output_path, index, results)
+            manifest["shards"][entry["name"]] = entry
+            manifest["mel_stats"] = mel_statistics(manifest)
+            _atomic_write_json(output_path / MANIFEST_FILE, manifest)
+            failed = f", {len(entry['failed'])} failed" if entry["failed"] else ""
+            print(f"> {entry['name']}: {entry['num_items']} items{failed}.")
+
+        current, lines = None, []
+        for line in read_metadata(metadata_path, encoding):
+            index = line[0] // shard_size
+            if index != current:
+                if lines:
+                    flush(current, lines)
+                current, lines = index, []
+            if shard_name(index) not in manifest["shards"]:
+                lines.append(line)
+        if lines:
+            flush(current, lines)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return manifest
+
+
+class PreprocessedCorpus:
+    """Read-only view of a ``preprocess_metadata`` output directory.
+
+    Token and audio arrays are memory-mapped, so loader workers share the pages through the
+    OS cache and opening the corpus costs only the small index files. Items of shards
+    written with ``store_audio`` also carry their int16 ``audio`` samples.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.manifest = load_manifest(self.path)
+        if self.manifest is None:
+            raise FileNotFoundError(f"{self.path / MANIFEST_FILE} does not exist.")
+        self._shards = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shards"] = None
+        return state
+
+    def _load(self):
+        if self._shards is not None:
+            return
+        self._tokens, self._audio, self._index, self._ids, self._by_id, self._by_text = [], [], [], [], {}, {}
+        for shard, name in enumerate(sorted(self.manifest["shards"])):
+            self._tokens.append(np.load(self.path / f"{name}.tokens.npy", mmap_mode="r"))
+            has_audio = self.manifest["shards"][name].get("audio")
+            self._audio.append(np.load(self.path / f"{name}.audio.npy", mmap_mode="r") if has_audio else None)
+            self._index.append(np.load(self.path / f"{name}.index.npy"))
+            with open(self.path / f"{name}.ids.json", "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            self._ids.append([audio_id for audio_id, _ in entries])
+            for row, (audio_id, text) in enumerate(entries):
+                self._by_id[audio_id] = (shard, row)
+                self._by_text.setdefault(text, (shard, row))
+        self._shards = [(shard, row) for shard, index in enumerate(self._index) for row in range(len(index))]
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._shards)
+
+    def __contains__(self, audio_id: str) -> bool:
+        self._load()
+        return audio_id in self._by_id
+
+    def _item(self, shard: int, row: int) -> Dict:
+        entry = self._index[shard][row]
+        offset, length = int(entry["offset"]), int(entry["length"])
+        item = {
+            "audio_id": self._ids[shard][row],
+            "token_ids": self._tokens[shard][offset:offset + length],
+            "num_samples": int(entry["num_samples"]),
+            "num_frames": int(entry["num_frames"]),
+        }
+        if self._audio[shard] is not None:
+            audio_offset = int(entry["audio_offset"])
+            item["audio"] = self._audio[shard][audio_offset:audio_offset + item["num_samples"]]
+        return item
+
+    def __getitem__(self, i: int) -> Dict:
+        self._load()
+        return self._item(*self._shards[i])
+
+    def get(self, audio_id: str) -> Optional[Dict]:
+        """The item of an audio id, ``None`` if it was not preprocessed."""
+        self._load()
+        position = self._by_id.get(audio_id)
+        return None if position is None else self._item(*position)
+
+    def get_by_text(self, text: str) -> Optional[Dict]:
+        """The first item whose metadata text is ``text``, ``None`` if there is none."""
+        self._load()
+        position = self._by_text.get(text.strip())
+        return None if position is None else self._item(*position)
+
+    @property
+    def mel_stats(self) -> Optional[Dict]:
+        return self.manifest.get("mel_stats")
+
+    @property
+    def has_audio(self) -> bool:
+        """Whether any shard stores audio samples."""
+        return any(shard.get("audio") for shard in self.manifest["shards"].values())
+
+
+class PreprocessedTokenizer:
+    """Wraps a coqui tokenizer so the training dataset reads precomputed token ids.
+
+    ``VitsDataset`` asks the model tokenizer for the ids of every sample text. This wrapper
+    answers from a ``PreprocessedCorpus`` and only cleans and phonemizes texts that were not
+    preprocessed (``misses``). Phonemes are reported as disabled so the dataset does not
+    build its own phoneme cache; every other attribute comes from the wrapped tokenizer.
+    """
+
+    use_phonemes = False
+
+    def __init__(self, tokenizer, corpus: PreprocessedCorpus):
+        self.tokenizer = tokenizer
+        self.corpus = corpus
+        self.misses = 0
+
+    def __getattr__(self, name):
+        if name in ("tokenizer", "corpus"):
+            raise AttributeError(name)
+        return getattr(self.tokenizer, name)
+
+    def text_to_ids(self, text: str, language: str = None) -> List[int]:
+        item = self.corpus.get_by_text(text)
+        if item is None:
+            self.misses += 1
+            return self.tokenizer.text_to_ids(text, language=language)
+        return np.asarray(item["token_ids"])
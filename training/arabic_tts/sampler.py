@@ -0,0 +1,147 @@
+import os
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+
+def sample_audio_id(sample: Dict) -> str:
+    """The metadata id of a coqui sample, i.e. its audio file name without extension."""
+    return os.path.splitext(os.path.basename(sample["audio_file"]))[0]
+
+
+def build_length_index(samples: List[Dict], hop_length: int, corpus=None) -> Dict[str, np.ndarray]:
+    """Audio frames and token counts of each sample.
+
+    Lengths come from a ``PreprocessedCorpus`` when one is given and holds the sample, so no
+    file is touched. Otherwise the ``audio_length`` (in samples) and ``text_length`` computed by
+    the coqui dataset are used, falling back to the file size of 16-bit audio.
+
+    returns:
+        ``frames`` and ``tokens`` arrays aligned with ``samples``.
+    """
+    frames = np.empty(len(samples), dtype=np.int64)
+    tokens = np.empty(len(samples), dtype=np.int64)
+    for i, sample in enumerate(samples):
+        item = corpus.get(sample_audio_id(sample)) if corpus is not None else None
+        if item is not None:
+            frames[i] = item["num_samples"] // hop_length
+            tokens[i] = item["token_ids"].size
+            continue
+        audio_length = sample.get("audio_length")
+        if audio_length is None:
+            audio_length = os.path.getsize(sample["audio_file"]) / 2
+        frames[i] = int(audio_length) // hop_length
+        tokens[i] = sample.get("text_length", len(sample.get("text", "")))
+    return {"frames": frames, "tokens": tokens}
+
+
+class FrameBudgetBatchSampler:
+    """Batch sampler that fills batches up to a padded frame budget instead of a fixed size.
+
+    Every epoch, samples are ordered by length bucket (``bucket_width`` frames wide) with a
+    random order inside each bucket, packed greedily into batches whose padded size
+    (``longest sample * batch size``) stays within ``max_frames``, and the batches are
+    shuffled. Batches of short clips are therefore larger than batches of long ones, memory
+    use per step stays roughly constant and little padding is computed. A sample longer
+    than the budget gets a batch of its own.
+
+    It can be passed as ``batch_sampler`` to a ``DataLoader``.
+
+    Args:
+        frames(Sequence[int]):
+            The length in frames of each sample.
+        max_frames(int):
+            The padded frame budget per batch.
+        max_batch_size(int):
+            Maximum number of samples per batch, ``0`` for no limit.
+        bucket_width(int):
+            Width in frames of the length buckets shuffled within.
+        tokens(Sequence[int]):
+            Optional token count of each sample, checked against ``max_tokens``.
+        max_tokens(int):
+            Optional padded token budget per batch, ``0`` for no limit.
+        shuffle(bool):
+            Whether to shuffle within buckets and across batches.
+        seed(int):
+            The seed of the per-epoch shuffles.
+    """
+
+    def __init__(
+        self,
+        frames: Sequence[int],
+        max_frames: int,
+        max_batch_size: int = 0,
+        bucket_width: int = 50,
+        tokens: Optional[Sequence[int]] = None,
+        max_tokens: int = 0,
+        shuffle: bool = True,
+        seed: int = 0,
+    ):
+        if max_frames <= 0:
+            raise ValueError("max_frames must be positive.")
+        self.frames = np.asarray(frames, dtype=np.int64)
+        self.tokens = np.asarray(tokens, dtype=np.int64) if tokens is not None else None
+        self.max_frames = max_frames
+        self.max_batch_size = max_batch_size
+        self.bucket_width = max(1, bucket_width)
+        self.max_tokens = max_tokens
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self._plan = None
+        self._plan_epoch = None
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def _fits(self, size: int, longest_frames: int, longest_tokens: int) -> bool:
+        if self.max_batch_size and size > self.max_batch_size:
+            return False
+        if longest_frames * size > self.max_frames:
+            return False
+        return not (self.max_tokens and longest_tokens * size > self.max_tokens)
+
+    def plan(self, epoch: Optional[int] = None) -> List[List[int]]:
+        """The batches of an epoch (the current one by default), as lists of sample indices."""
+        epoch = self.epoch if epoch is None else epoch
+        if self._plan_epoch == epoch:
+            return self._plan
+        rng = np.random.default_rng((self.seed, epoch))
+        tie_breaker = rng.random(self.frames.size) if self.shuffle else np.arange(self.frames.size)
+        order = np.lexsort((tie_breaker, self.frames // self.bucket_width))
+        tokens = self.tokens if self.tokens is not None else np.zeros_like(self.frames)
+
+        batches, batch, longest_frames, longest_tokens = [], [], 0, 0
+        for i in order.tolist():
+            frames, n_tokens = max(longest_frames, self.frames[i]), max(longest_tokens, tokens[i])
+            if batch and not self._fits(len(batch) + 1, frames, n_tokens):
+                batches.append(batch)
+                batch, frames, n_tokens = [], self.frames[i], tokens[i]
+            batch.append(i)
+            longest_frames, longest_tokens = frames, n_tokens
+        if batch:
+            batches.append(batch)
+        if self.shuffle:
+            batches = [batches[j] for j in rng.permutation(len(batches))]
+        self._plan, self._plan_epoch = batches, epoch
+        return batches
+
+    def __iter__(self) -> Iterator[List[int]]:
+        batches = self.plan()
+        self.epoch += 1
+        return iter(batches)
+
+    def __len__(self) -> int:
+        return len(self.plan())
+
+    def stats(self) -> Dict[str, float]:
+        """Batch count, mean batch size, padding efficiency and samples over the budget for the current epoch."""
+        batches = self.plan()
+        real = int(self.frames.sum())
+        padded = sum(int(self.frames[batch].max()) * len(batch) for batch in batches)
+        return {
+            "num_batches": len(batches),
+            "mean_batch_size": self.frames.size / len(batches) if batches else 0.0,
+            "padding_efficiency": real / padded if padded else 1.0,
+            "oversized": int((self.frames > self.max_frames).sum()),
+        }
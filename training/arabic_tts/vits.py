@@ -0,0 +1,131 @@
+import contextlib
+import functools
+from typing import Callable, Dict, Optional
+
+import torch
+from TTS.tts.models import vits as coqui_vits
+from TTS.tts.models.vits import Vits
+
+from .dataset import StoredVitsDataset
+from .export import EXPORT_INPUTS, EXPORT_OUTPUTS
+from .sampler import FrameBudgetBatchSampler, build_length_index
+
+
+class OnnxVits(torch.nn.Module):
+    """The inference graph of a ``Vits`` as exported to ONNX.
+
+    Besides the waveforms, it returns the number of real samples of each row (the decoded
+    frames times the samples per frame), so the rows of a padded batch can be cut to their
+    own length instead of guessing it from the amplitude of the padded tail.
+    """
+
+    def __init__(self, model: Vits):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input, input_lengths, scales):
+        self.model.inference_noise_scale = scales[0]
+        self.model.length_scale = scales[1]
+        self.model.inference_noise_scale_dp = scales[2]
+        outputs = self.model.inference(input, aux_input={"x_lengths": input_lengths, "d_vectors": None,
+                                                         "speaker_ids": None, "language_ids": None})
+        wav, y_mask = outputs["model_outputs"], outputs["y_mask"]
+        samples_per_frame = wav.shape[-1] // y_mask.shape[-1]
+        return wav, (y_mask.sum(dim=(1, 2)) * samples_per_frame).long()
+
+
+@contextlib.contextmanager
+def _vits_dataset(factory: Callable):
+    """Makes ``Vits.get_data_loader``, which builds its ``VitsDataset`` inline, build ``factory`` instead."""
+    original = coqui_vits.VitsDataset
+    coqui_vits.VitsDataset = factory
+    try:
+        yield
+    finally:
+        coqui_vits.VitsDataset = original
+
+
+class ArabicVits(Vits):
+    """``Vits`` with the data loading options of ``config.yaml``.
+
+    When ``sampler_config["max_frames"]`` is set, batches are formed by a
+    ``FrameBudgetBatchSampler`` over the dataset samples instead of a fixed ``batch_size``.
+    Lengths are read from the preprocessed corpus when the tokenizer is a
+    ``PreprocessedTokenizer``. Multi-GPU runs and weighted sampling keep the coqui sampler.
+
+    When that corpus stores audio, the loaders read samples through ``StoredVitsDataset``
+    instead of decoding the WAV files.
+    """
+
+    sampler_config: Dict = {}
+
+    def export_onnx(self, output_path: str = "coqui_vits.onnx", verbose: bool = True):
+        """Exports ``OnnxVits`` with the input and output names of ``EXPORT_INPUTS`` and ``EXPORT_OUTPUTS``.
+
+        They are the names of the coqui export, plus ``output_lengths``.
+        """
+        disc, training = getattr(self, "disc", None), self.training
+        defaults = (self.inference_noise_scale, self.length_scale, self.inference_noise_scale_dp)
+        self.disc = None
+        self.eval()
+        tokens_name, lengths_name, _ = EXPORT_INPUTS
+        audio_name, audio_lengths_name = EXPORT_OUTPUTS
+        tokens = torch.randint(low=0, high=2, size=(1, 100), dtype=torch.long)
+        lengths = torch.LongTensor([tokens.size(1)])
+        scales = torch.FloatTensor(list(defaults))
+        try:
+            torch.onnx.export(
+                OnnxVits(self),
+                args=(tokens, lengths, scales),
+                f=output_path,
+                opset_version=15,
+                verbose=verbose,
+                input_names=list(EXPORT_INPUTS),
+                output_names=list(EXPORT_OUTPUTS),
+                dynamic_axes={
+                    tokens_name: {0: "batch_size", 1: "phonemes"},
+                    lengths_name: {0: "batch_size"},
+                    audio_name: {0: "batch_size", 1: "time1", 2: "time2"},
+                    audio_lengths_name: {0: "batch_size"},
+                },
+            )
+        finally:
+            self.inference_noise_scale, self.length_scale, self.inference_noise_scale_dp = defaults
+            self.disc = disc
+            self.train(training)
+
+    def get_sampler(self, config, dataset, num_gpus=1, is_eval=False):
+        options = self.sampler_config
+        if not options.get("max_frames") or num_gpus > 1 or getattr(config, "use_weighted_sampler", False):
+            return super().get_sampler(config, dataset, num_gpus, is_eval)
+        lengths = build_length_index(dataset.samples, config.audio.hop_length, getattr(self.tokenizer, "corpus", None))
+        sampler = FrameBudgetBatchSampler(
+            lengths["frames"],
+            max_frames=options["max_frames"],
+            max_batch_size=options.get("max_batch_size", 0),
+            bucket_width=options.get("bucket_width", 50),
+            tokens=lengths["tokens"],
+            max_tokens=options.get("max_tokens", 0),
+            seed=options.get("seed", 0),
+        )
+        stats = sampler.stats()
+        print(f" > Frame budget sampler: {stats['num_batches']} batches, mean size {stats['mean_batch_size']:.1f}, "
+              f"padding efficiency {stats['padding_efficiency']:.2f}.")
+        if stats["oversized"]:
+            print(f"\t|> ! {stats['oversized']} samples are longer than max_frames and get a batch of their own.")
+        return sampler
+
+    def dataset_factory(self) -> Optional[Callable]:
+        """Builds the datasets of the loaders in place of ``VitsDataset``, ``None`` to keep it."""
+        corpus = getattr(self.tokenizer, "corpus", None)
+        if corpus is None or not corpus.has_audio:
+            return None
+        return functools.partial(StoredVitsDataset, corpus=corpus)
+
+    def get_data_loader(self, config, assets, is_eval, samples, verbose, num_gpus, rank=None):
+        factory = self.dataset_factory()
+        if factory is None:
+            return super().get_data_loader(config, assets, is_eval, samples, verbose, num_gpus, rank)
+        # Only the dataset class differs, the loader is the one of Vits.get_data_loader.
+        with _vits_dataset(factory):
+            return super().get_data_loader(config, assets, is_eval, samples, verbose, num_gpus, rank)